@@ -3,7 +3,7 @@
 import React, { useEffect, useState } from 'react';
 import { useParams } from 'next/navigation';
 import { Tweet } from '@/types';
-import { getTweets } from '@/services/api';
+import { getTweetById } from '@/services/api';
 import { useAuth } from '@/context/AppContext';
 import { redirect } from 'next/navigation';
 import Layout from '@/components/Layout';
@@ -28,19 +28,11 @@ export default function TweetPage() {
     const fetchTweet = async () => {
       setLoading(true);
       try {
-        // Pour l'instant, on récupère tous les tweets et on filtre
-        // À terme, il faudrait créer une route API spécifique
-        const tweets = await getTweets();
-        const foundTweet = tweets.find(t => t.id === tweetId);
-        
-        if (foundTweet) {
-          setTweet(foundTweet);
-        } else {
-          setError('Tweet non trouvé');
-        }
+        // GET /tweets ne renvoie qu'une page : lecture directe du tweet par son id
+        setTweet(await getTweetById(tweetId));
       } catch (error) {
         console.error('Error fetching tweet:', error);
-        setError('Erreur lors du chargement du tweet');
+        setError('Tweet non trouvé');
       } finally {
         setLoading(false);
       }
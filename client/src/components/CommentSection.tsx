@@ -13,13 +13,17 @@ export const CommentSection: React.FC<CommentSectionProps> = ({ tweetId, onComme
   const [newComment, setNewComment] = useState('');
   const [isLoading, setIsLoading] = useState(true);
   const [isSubmitting, setIsSubmitting] = useState(false);
+  // Curseur de la page suivante des commentaires (null : tout est chargé)
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchComments = async () => {
       setIsLoading(true);
       try {
-        const data = await getTweetComments(tweetId);
-        setComments(data);
+        const page = await getTweetComments(tweetId);
+        setComments(page.items);
+        setNextCursor(page.nextCursor);
       } catch (error) {
         console.error('Error fetching comments:', error);
       } finally {
@@ -30,6 +34,21 @@ export const CommentSection: React.FC<CommentSectionProps> = ({ tweetId, onComme
     fetchComments();
   }, [tweetId]);
 
+  const loadMore = async () => {
+    if (!nextCursor || isLoadingMore) return;
+
+    setIsLoadingMore(true);
+    try {
+      const page = await getTweetComments(tweetId, nextCursor);
+      setComments((prev) => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error fetching more comments:', error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!newComment.trim()) return;
@@ -83,6 +102,15 @@ export const CommentSection: React.FC<CommentSectionProps> = ({ tweetId, onComme
           {comments.map((comment) => (
             <CommentCard key={comment.id} comment={comment} />
           ))}
+          {nextCursor && (
+            <button
+              onClick={loadMore}
+              disabled={isLoadingMore}
+              className="w-full text-center text-primary hover:underline py-2 disabled:opacity-50"
+            >
+              {isLoadingMore ? '...' : 'Voir plus de commentaires'}
+            </button>
+          )}
         </div>
       ) : (
         <p className="text-center text-gray-500 py-2">Aucun commentaire pour l'instant.</p>
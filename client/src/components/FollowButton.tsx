@@ -1,7 +1,7 @@
 'use client';
 
 import React, { useState, useEffect } from 'react';
-import { followUser, unfollowUser, checkFollowStatus } from '@/services/api';
+import { followUser, unfollowUser, loadFollowStatus } from '@/services/api';
 import { useAuth } from '@/context/AppContext';
 
 interface FollowButtonProps {
@@ -21,7 +21,7 @@ const FollowButton: React.FC<FollowButtonProps> = ({ username, onFollowChange, i
     const checkFollowing = async () => {
       try {
         if (user && user.username !== username) {
-          const status = await checkFollowStatus(username);
+          const status = await loadFollowStatus(username);
           setIsFollowing(status.following);
         }
       } catch (error) {
@@ -19,6 +19,9 @@ const FollowingList: React.FC<FollowingListProps> = ({ username, isVisible, onCl
   const [following, setFollowing] = useState<User[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  // Curseur de la page suivante (null : tout est chargé)
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchFollowing = async () => {
@@ -26,8 +29,9 @@ const FollowingList: React.FC<FollowingListProps> = ({ username, isVisible, onCl
 
       try {
         setLoading(true);
-        const data = await getUserFollowing(username);
-        setFollowing(data);
+        const page = await getUserFollowing(username);
+        setFollowing(page.items);
+        setNextCursor(page.nextCursor);
         setError('');
       } catch (error) {
         console.error('Erreur lors de la récupération des abonnements:', error);
@@ -40,6 +44,21 @@ const FollowingList: React.FC<FollowingListProps> = ({ username, isVisible, onCl
     fetchFollowing();
   }, [username, isVisible]);
 
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+
+    try {
+      setLoadingMore(true);
+      const page = await getUserFollowing(username, nextCursor);
+      setFollowing((prev) => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Erreur lors de la récupération des abonnements:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (!isVisible) return null;
 
   return (
@@ -123,6 +142,21 @@ const FollowingList: React.FC<FollowingListProps> = ({ username, isVisible, onCl
                     </div>
                   </li>
                 ))}
+                {nextCursor && (
+                  <li className="p-4 flex justify-center">
+                    <button
+                      onClick={loadMore}
+                      disabled={loadingMore}
+                      className={`px-4 py-1.5 rounded-full transition-colors disabled:opacity-50 ${
+                        isDarkMode
+                          ? 'bg-gray-700 hover:bg-gray-600 text-white'
+                          : 'bg-gray-200 hover:bg-gray-300 text-gray-900'
+                      }`}
+                    >
+                      {loadingMore ? 'Chargement...' : 'Charger plus'}
+                    </button>
+                  </li>
+                )}
               </ul>
             ) : (
               <div className={`p-8 text-center ${
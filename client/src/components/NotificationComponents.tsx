@@ -2,7 +2,7 @@
 
 import React, { useState, useEffect, useRef } from 'react';
 import { Notification } from '@/types';
-import { getNotifications, getUnreadNotificationsCount, markNotificationAsRead, markAllNotificationsAsRead } from '@/services/api';
+import { getNotifications, getUnreadNotificationsCount, markNotificationAsRead, markAllNotificationsAsRead, openNotificationStream } from '@/services/api';
 import Link from 'next/link';
 import { FiHeart, FiMessageCircle, FiRepeat, FiUserPlus, FiBell } from 'react-icons/fi';
 import { motion, AnimatePresence } from 'framer-motion';
@@ -21,6 +21,13 @@ interface NotificationsPageProps {
   isDarkMode: boolean;
 }
 
+// « et 41 autres » pour une notification regroupée (plusieurs acteurs)
+const formatOtherActors = (notification: Notification) => {
+  const others = (notification.actor_count ?? 1) - 1;
+  if (others <= 0) return null;
+  return <span> et {others} {others === 1 ? 'autre' : 'autres'}</span>;
+};
+
 // Composant pour l'icône de notification avec badge
 export const NotificationBell: React.FC<NotificationComponentsProps> = ({ isDarkMode }) => {
   const [notificationCount, setNotificationCount] = useState(0);
@@ -28,6 +35,8 @@ export const NotificationBell: React.FC<NotificationComponentsProps> = ({ isDark
   const [notifications, setNotifications] = useState<Notification[]>([]);
   const [loading, setLoading] = useState(false);
   const notificationRef = useRef<HTMLDivElement>(null);
+  const showNotificationsRef = useRef(false);
+  showNotificationsRef.current = showNotifications;
 
   useEffect(() => {
     const fetchNotificationCount = async () => {
@@ -40,8 +49,34 @@ export const NotificationBell: React.FC<NotificationComponentsProps> = ({ isDark
     };
 
     fetchNotificationCount();
-    const interval = setInterval(fetchNotificationCount, 30000);
-    return () => clearInterval(interval);
+
+    // Flux temps réel : le compteur est poussé par le serveur, plus de polling
+    const stream = openNotificationStream();
+    if (!stream) {
+      const interval = setInterval(fetchNotificationCount, 30000);
+      return () => clearInterval(interval);
+    }
+
+    stream.addEventListener('unread_count', (event) => {
+      setNotificationCount(JSON.parse((event as MessageEvent).data).count);
+    });
+    // Nouvelle notification, ou événements manqués pendant une déconnexion :
+    // liste rechargée tout de suite si le menu est ouvert, sinon à sa prochaine ouverture
+    const invalidateList = () => {
+      if (!showNotificationsRef.current) {
+        setNotifications([]);
+        return;
+      }
+      getNotifications()
+        .then(setNotifications)
+        .catch((error) => console.error('Error fetching notifications:', error));
+    };
+    stream.addEventListener('notification', invalidateList);
+    stream.addEventListener('resync', () => {
+      invalidateList();
+      fetchNotificationCount();
+    });
+    return () => stream.close();
   }, []);
 
   useEffect(() => {
@@ -264,6 +299,7 @@ const NotificationItem: React.FC<NotificationItemProps> = ({ notification, onMar
         <div className="flex-1 min-w-0">
           <p className={`text-sm font-medium ${isDarkMode ? 'text-white' : 'text-gray-900'}`}>
             <span className="font-bold">{notification.sender_username}</span>
+            {formatOtherActors(notification)}
             {getNotificationText()}
           </p>
           {notification.type !== 'follow' && notification.tweet_content && (
@@ -370,6 +406,7 @@ export const NotificationsPage: React.FC<NotificationsPageProps> = ({ isDarkMode
                     >
                       {notification.sender_username}
                     </Link>
+                    {formatOtherActors(notification)}
                     {notification.type === 'like' && <span> a aimé votre tweet</span>}
                     {notification.type === 'comment' && <span> a commenté votre tweet</span>}
                     {notification.type === 'retweet' && <span> a retweeté votre tweet</span>}
@@ -2,7 +2,7 @@
 
 import React, {useEffect, useState, useCallback} from 'react';
 import {getUserTweets, getUserStats, getUserLikedTweets, getUserRetweetedTweets, getUserMediaUrl} from '@/services/api';
-import {Tweet, User} from '@/types';
+import {Page, Tweet, User} from '@/types';
 import {TweetCard} from '@/components/TweetCard';
 import {useAuth} from '@/context/AppContext';
 import {redirect} from 'next/navigation';
@@ -43,6 +43,33 @@ export default function ProfilePage({username}: { username: string }) {
     const [bookmarkedTweets, setBookmarkedTweets] = useState<Tweet[]>([]);
     const [bookmarksLoaded, setBookmarksLoaded] = useState(false);
 
+    // Curseur de la page suivante de chaque onglet (null : tout est chargé)
+    const [nextCursors, setNextCursors] = useState<Record<TabType, string | null>>({
+        tweets: null,
+        likes: null,
+        retweets: null,
+        bookmarks: null,
+    });
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Une page de l'onglet, à partir du curseur donné (première page sans curseur)
+    const fetchTabPage = useCallback((tab: TabType, cursor?: string | null): Promise<Page<Tweet>> => {
+        switch (tab) {
+            case 'tweets':
+                return getUserTweets(username, cursor);
+            case 'likes':
+                return getUserLikedTweets(username, cursor);
+            case 'retweets':
+                return getUserRetweetedTweets(username, cursor);
+            case 'bookmarks':
+                return getUserBookmarkedTweets(cursor);
+        }
+    }, [username]);
+
+    const rememberCursor = useCallback((tab: TabType, page: Page<Tweet>) => {
+        setNextCursors(prev => ({...prev, [tab]: page.nextCursor}));
+    }, []);
+
 
     // Charger les tweets en fonction de l'onglet actif (stabilisé avec useCallback)
     const fetchTweetsForActiveTab = useCallback(async (tab: TabType) => {
@@ -52,33 +79,37 @@ export default function ProfilePage({username}: { username: string }) {
             switch (tab) {
                 case 'tweets':
                     if (!tweetsLoaded) {
-                        const tweetsData = await getUserTweets(username);
-                        setTweets(tweetsData);
+                        const tweetsPage = await fetchTabPage(tab);
+                        setTweets(tweetsPage.items);
+                        rememberCursor(tab, tweetsPage);
                         setTweetsLoaded(true);
                     }
                     break;
 
                 case 'likes':
                     if (!likesLoaded) {
-                        const likedData = await getUserLikedTweets(username);
-                        setLikedTweets(likedData);
+                        const likedPage = await fetchTabPage(tab);
+                        setLikedTweets(likedPage.items);
+                        rememberCursor(tab, likedPage);
                         setLikesLoaded(true);
                     }
                     break;
 
                 case 'retweets':
                     if (!retweetsLoaded) {
-                        const retweetedData = await getUserRetweetedTweets(username);
-                        setRetweetedTweets(retweetedData);
+                        const retweetedPage = await fetchTabPage(tab);
+                        setRetweetedTweets(retweetedPage.items);
+                        rememberCursor(tab, retweetedPage);
                         setRetweetsLoaded(true);
                     }
                     break;
 
                 case 'bookmarks':
                     if (!bookmarksLoaded) {
-                        const bookmarkedData = await getUserBookmarkedTweets(username);
-                        console.log("📥 Favoris récupérés :", bookmarkedData);
-                        setBookmarkedTweets(bookmarkedData);
+                        const bookmarkedPage = await fetchTabPage(tab);
+                        console.log("📥 Favoris récupérés :", bookmarkedPage.items);
+                        setBookmarkedTweets(bookmarkedPage.items);
+                        rememberCursor(tab, bookmarkedPage);
                         setBookmarksLoaded(true);
                     }
                     break;
@@ -89,7 +120,40 @@ export default function ProfilePage({username}: { username: string }) {
         } finally {
             setLoading(false);
         }
-    }, [username, tweetsLoaded, likesLoaded, retweetsLoaded, bookmarksLoaded]);
+    }, [fetchTabPage, rememberCursor, tweetsLoaded, likesLoaded, retweetsLoaded, bookmarksLoaded]);
+
+    // Charger la page suivante de l'onglet actif
+    const loadMore = async () => {
+        const tab = activeTab;
+        const cursor = nextCursors[tab];
+        if (!cursor || loadingMore) return;
+
+        try {
+            setLoadingMore(true);
+            const page = await fetchTabPage(tab, cursor);
+            const append = (prev: Tweet[]) => [...prev, ...page.items];
+            switch (tab) {
+                case 'tweets':
+                    setTweets(append);
+                    break;
+                case 'likes':
+                    setLikedTweets(append);
+                    break;
+                case 'retweets':
+                    setRetweetedTweets(append);
+                    break;
+                case 'bookmarks':
+                    setBookmarkedTweets(append);
+                    break;
+            }
+            rememberCursor(tab, page);
+        } catch (error) {
+            console.error(`Error fetching more ${tab}:`, error);
+            setError(`Impossible de charger la suite des ${tab}.`);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
 
     // Effet pour le chargement initial des données utilisateur
@@ -229,6 +293,21 @@ export default function ProfilePage({username}: { username: string }) {
                 {currentTweets.map((tweet) => (
                     <TweetCard key={tweet.id} tweet={tweet}/>
                 ))}
+                {nextCursors[activeTab] && (
+                    <div className="flex justify-center p-4">
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className={`px-4 py-1.5 rounded-full transition-colors disabled:opacity-50 ${
+                                isDarkMode
+                                    ? 'bg-gray-700 hover:bg-gray-600 text-white'
+                                    : 'bg-gray-200 hover:bg-gray-300 text-gray-900'
+                            }`}
+                        >
+                            {loadingMore ? 'Chargement...' : 'Charger plus'}
+                        </button>
+                    </div>
+                )}
             </div>
         );
     };
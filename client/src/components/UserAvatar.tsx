@@ -1,7 +1,7 @@
 'use client';
 
 import React, { useState, useEffect } from 'react';
-import { getUserByUsername, getUserMediaUrl } from '@/services/api';
+import { loadUserByUsername, getUserMediaUrl } from '@/services/api';
 import { User } from '@/types';
 
 interface UserAvatarProps {
@@ -45,7 +45,7 @@ const UserAvatar: React.FC<UserAvatarProps> = ({
       const fetchUser = async () => {
         try {
           setLoading(true);
-          const userData = await getUserByUsername(username);
+          const userData = await loadUserByUsername(username);
           if (userData) {
             setUser(userData);
           } else {
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Tweet, User, Like, Comment, Follow } from '@/types';
+import { Tweet, User, Like, Comment, Follow, Page } from '@/types';
 import { EmotionReaction, EmotionReactionSummary } from '@/types';
 
 const API_URL = 'http://backend:8000';
@@ -97,14 +97,19 @@ export const getMediaUrl = (mediaId: string) => {
   return `${API_URL}/media/${mediaId}`;
 };
 
+// Les listes sont servies par pages : le curseur de la suivante arrive dans l'en-tête X-Next-Cursor
+const getPage = async <T>(url: string, cursor?: string | null): Promise<Page<T>> => {
+  const response = await api.get<T[]>(url, { params: cursor ? { cursor } : undefined });
+  return { items: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+};
+
 export const getTweets = async () => {
   const response = await api.get<Tweet[]>('/tweets');
   return response.data;
 };
 
-export const getUserTweets = async (username: string) => {
-  const response = await api.get<Tweet[]>(`/users/${username}/tweets`);
-  return response.data;
+export const getUserTweets = async (username: string, cursor?: string | null) => {
+  return getPage<Tweet>(`/users/${username}/tweets`, cursor);
 };
 
 export const createComment = async (tweetId: string, content: string) => {
@@ -115,9 +120,8 @@ export const createComment = async (tweetId: string, content: string) => {
   return response.data;
 };
 
-export const getTweetComments = async (tweetId: string) => {
-  const response = await api.get<Comment[]>(`/tweets/${tweetId}/comments`);
-  return response.data;
+export const getTweetComments = async (tweetId: string, cursor?: string | null) => {
+  return getPage<Comment>(`/tweets/${tweetId}/comments`, cursor);
 };
 
 // Fonctions pour les likes
@@ -151,6 +155,19 @@ export const getUnreadNotificationsCount = async () => {
   return response.data;
 };
 
+// Flux temps réel des notifications (Server-Sent Events). EventSource ne peut pas
+// envoyer d'en-tête Authorization : le jeton passe dans l'URL.
+export const openNotificationStream = (): EventSource | null => {
+  if (typeof window === 'undefined' || typeof EventSource === 'undefined') {
+    return null;
+  }
+  const token = localStorage.getItem('token');
+  if (!token) {
+    return null;
+  }
+  return new EventSource(`${API_URL}/notifications/stream?token=${encodeURIComponent(token)}`);
+};
+
 export const markNotificationAsRead = async (notificationId: string) => {
   const response = await api.put(`/notifications/${notificationId}/read`);
   return response.data;
@@ -253,15 +270,13 @@ export const checkFollowStatus = async (username: string) => {
 };
 
 // Récupérer la liste des abonnés d'un utilisateur
-export const getUserFollowers = async (username: string) => {
-  const response = await api.get<User[]>(`/users/${username}/followers`);
-  return response.data;
+export const getUserFollowers = async (username: string, cursor?: string | null) => {
+  return getPage<User>(`/users/${username}/followers`, cursor);
 };
 
 // Récupérer la liste des abonnements d'un utilisateur
-export const getUserFollowing = async (username: string) => {
-  const response = await api.get<User[]>(`/users/${username}/following`);
-  return response.data;
+export const getUserFollowing = async (username: string, cursor?: string | null) => {
+  return getPage<User>(`/users/${username}/following`, cursor);
 };
 
 // Récupérer les statistiques d'un utilisateur (nombre d'abonnés, d'abonnements)
@@ -271,15 +286,13 @@ export const getUserStats = async (username: string) => {
 };
 
 // Récupérer les tweets likés par un utilisateur
-export const getUserLikedTweets = async (username: string) => {
-  const response = await api.get<Tweet[]>(`/users/${username}/liked-tweets`);
-  return response.data;
+export const getUserLikedTweets = async (username: string, cursor?: string | null) => {
+  return getPage<Tweet>(`/users/${username}/liked-tweets`, cursor);
 };
 
 // Récupérer les tweets retweetés par un utilisateur
-export const getUserRetweetedTweets = async (username: string) => {
-  const response = await api.get<Tweet[]>(`/users/${username}/retweeted-tweets`);
-  return response.data;
+export const getUserRetweetedTweets = async (username: string, cursor?: string | null) => {
+  return getPage<Tweet>(`/users/${username}/retweeted-tweets`, cursor);
 };
 
 export const searchUsers = async (query: string) => {
@@ -385,6 +398,87 @@ export const getUserByUsername = async (username: string) => {
   }
 };
 
+export const getUsersBatch = async (usernames: string[] = [], ids: string[] = []) => {
+  const response = await api.post<User[]>('/users/batch', { usernames, ids });
+  return response.data;
+};
+
+// Regroupe les clés demandées pendant le même tick en appels groupés de 100 clés au plus
+const createTickBatcher = <V>(
+  fetchChunk: (keys: string[]) => Promise<Record<string, V>>,
+  fallback: V,
+  label: string,
+) => {
+  let pending: Map<string, ((value: V) => void)[]> = new Map();
+  let timer: ReturnType<typeof setTimeout> | null = null;
+
+  const flush = async () => {
+    const batch = pending;
+    pending = new Map();
+    timer = null;
+
+    const keys = Array.from(batch.keys());
+    for (let i = 0; i < keys.length; i += 100) {
+      const chunk = keys.slice(i, i + 100);
+      let values: Record<string, V> = {};
+      try {
+        values = await fetchChunk(chunk);
+      } catch (error) {
+        console.error(`Erreur lors de la récupération groupée ${label}:`, error);
+      }
+      chunk.forEach((key) => {
+        (batch.get(key) || []).forEach((resolve) => resolve(values[key] ?? fallback));
+      });
+    }
+  };
+
+  return (key: string): Promise<V> => new Promise((resolve) => {
+    const waiting = pending.get(key) || [];
+    waiting.push(resolve);
+    pending.set(key, waiting);
+    if (!timer) {
+      timer = setTimeout(flush, 0);
+    }
+  });
+};
+
+// Profils : un seul POST /users/batch pour tous les avatars affichés
+export const loadUserByUsername = createTickBatcher<User | null>(
+  async (usernames) => Object.fromEntries((await getUsersBatch(usernames)).map((user) => [user.username, user])),
+  null,
+  'des utilisateurs',
+);
+
+export interface TweetStatus {
+  liked: boolean;
+  retweeted: boolean;
+  bookmarked: boolean;
+}
+
+export const getTweetsStatus = async (tweetIds: string[]) => {
+  const response = await api.post<Record<string, TweetStatus>>('/tweets/status', { tweet_ids: tweetIds });
+  return response.data;
+};
+
+export const getFollowStatuses = async (usernames: string[]) => {
+  const response = await api.post<Record<string, { following: boolean }>>('/users/follow_status', { usernames });
+  return response.data;
+};
+
+// États like/retweet/favori : un seul POST /tweets/status pour toutes les cartes affichées
+export const loadTweetStatus = createTickBatcher<TweetStatus>(
+  getTweetsStatus,
+  { liked: false, retweeted: false, bookmarked: false },
+  'des statuts de tweets',
+);
+
+// Statut de suivi : un seul POST /users/follow_status pour tous les boutons affichés
+export const loadFollowStatus = createTickBatcher<{ following: boolean }>(
+  getFollowStatuses,
+  { following: false },
+  'des statuts de suivi',
+);
+
 export const searchTweets = async (query: string) => {
   if (!query || query.trim() === '') return [];
   
@@ -416,8 +510,10 @@ export const getFeedData = async () => {
   return response.data;
 };
 
-export const getTrendingHashtags = async (limit: number = 10) => {
-  const response = await api.get<{ tag: string, count: number, sample_tweets: Tweet[] }[]>(`/trends?limit=${limit}`);
+export const getTrendingHashtags = async (limit: number = 10, windowMinutes?: number, mode: 'count' | 'velocity' = 'count') => {
+  const params: Record<string, number | string> = { limit, mode };
+  if (windowMinutes) params.window_minutes = windowMinutes;
+  const response = await api.get<{ tag: string, count: number, baseline?: number, score?: number, sample_tweets: Tweet[] }[]>('/trends', { params });
   return response.data;
 };
 
@@ -443,29 +539,14 @@ export const toggleBookmark = async (tweetId: string) => {
 };
 
 export const checkBookmarkStatus = async (tweetId: string) => {
-  try {
-    const response = await fetch(`http://localhost:8000/users/me/bookmarks`, {
-      method: 'GET',
-      headers: {
-        'Authorization': `Bearer ${localStorage.getItem('token')}`,
-      },
-    });
-
-    if (!response.ok) {
-      throw new Error('Erreur lors de la vérification du favori');
-    }
-
-    const bookmarks = await response.json();
-    return bookmarks.some((tweet: any) => tweet.id === tweetId);
-  } catch (error) {
-    console.error('Erreur lors de la vérification du favori :', error);
-    return false;
-  }
+  const status = await loadTweetStatus(tweetId);
+  return status.bookmarked;
 };
 
-export const getUserBookmarkedTweets = async () => {
+export const getUserBookmarkedTweets = async (cursor?: string | null): Promise<Page<Tweet>> => {
   try {
-    const response = await fetch(`http://localhost:8000/users/me/bookmarks`, {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await fetch(`http://localhost:8000/users/me/bookmarks${query}`, {
       method: 'GET',
       headers: {
         'Authorization': `Bearer ${localStorage.getItem('token')}`,
@@ -476,10 +557,10 @@ export const getUserBookmarkedTweets = async () => {
       throw new Error('Erreur lors de la récupération des favoris');
     }
 
-    return await response.json();
+    return { items: await response.json(), nextCursor: response.headers.get('X-Next-Cursor') };
   } catch (error) {
     console.error('Erreur lors de la récupération des favoris:', error);
-    return [];
+    return { items: [], nextCursor: null };
   }
 };
 
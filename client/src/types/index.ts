@@ -73,6 +73,9 @@ export interface Notification {
   comment_content?: string;
   read: boolean;
   created_at: string;
+  // Notifications regroupées : derniers acteurs et nombre total d'acteurs
+  actors?: { id: string; username: string }[];
+  actor_count?: number;
 }
 
 export interface EmotionReaction {
@@ -90,4 +93,10 @@ export interface EmotionReactionSummary {
   reactions: {
     [key: string]: number;
   };
-}
\ No newline at end of file
+}
+
+// Page d'une liste paginée par curseur ; `nextCursor` vaut null sur la dernière page
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
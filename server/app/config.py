@@ -5,4 +5,116 @@ load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+# Connexion MongoDB (pool de connexions partagé par toutes les requêtes d'un worker)
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://mongodb:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "twitter_db")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "200"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "10"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+
+# Fil d'actualité matérialisé (fan-out à l'écriture, fusion à la lecture pour les gros comptes)
+TIMELINE_MAX_ENTRIES = int(os.getenv("TIMELINE_MAX_ENTRIES", "800"))
+FANOUT_FOLLOWER_THRESHOLD = int(os.getenv("FANOUT_FOLLOWER_THRESHOLD", "10000"))
+FANOUT_BATCH_SIZE = int(os.getenv("FANOUT_BATCH_SIZE", "1000"))
+
+# Cache des profils publics (LRU borné + expiration)
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60"))
+
+# Cache des utilisateurs authentifiés (clé : sujet + expiration du jeton)
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+
+# Hachage des mots de passe (bcrypt) dans un pool de threads dédié
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
+
+# Cache tag -> id des hashtags (un hashtag n'est jamais renommé ni supprimé)
+HASHTAG_CACHE_SIZE = int(os.getenv("HASHTAG_CACHE_SIZE", "50000"))
+HASHTAG_CACHE_TTL_SECONDS = float(os.getenv("HASHTAG_CACHE_TTL_SECONDS", "3600"))
+
+# Autocomplétion des usernames en mémoire (mentions)
+USERNAME_INDEX_PREFIX_DEPTH = int(os.getenv("USERNAME_INDEX_PREFIX_DEPTH", "3"))
+USERNAME_INDEX_TOP_K = int(os.getenv("USERNAME_INDEX_TOP_K", "10"))
+USERNAME_INDEX_REFRESH_SECONDS = float(os.getenv("USERNAME_INDEX_REFRESH_SECONDS", "300"))
+USERNAME_INDEX_BATCH_SIZE = int(os.getenv("USERNAME_INDEX_BATCH_SIZE", "10000"))
+
+# Notifications regroupées : un document par (destinataire, type, tweet, fenêtre de temps)
+NOTIFICATION_GROUP_WINDOW_SECONDS = int(os.getenv("NOTIFICATION_GROUP_WINDOW_SECONDS", "86400"))
+NOTIFICATION_GROUP_MAX_ACTORS = int(os.getenv("NOTIFICATION_GROUP_MAX_ACTORS", "10"))
+
+# Rétention des notifications : expiration TTL des lues, archivage des non-lues anciennes
+NOTIFICATION_READ_TTL_DAYS = int(os.getenv("NOTIFICATION_READ_TTL_DAYS", "30"))
+NOTIFICATION_ARCHIVE_AFTER_DAYS = int(os.getenv("NOTIFICATION_ARCHIVE_AFTER_DAYS", "90"))
+NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", "1000"))
+
+# Flux temps réel des notifications (GET /notifications/stream, Server-Sent Events)
+NOTIFICATION_STREAM_BROKER = os.getenv("NOTIFICATION_STREAM_BROKER", "local")  # "mongo" : plusieurs processus
+NOTIFICATION_STREAM_QUEUE_SIZE = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", "100"))
+NOTIFICATION_STREAM_REPLAY_SIZE = int(os.getenv("NOTIFICATION_STREAM_REPLAY_SIZE", "10000"))
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", "15"))
+NOTIFICATION_STREAM_CAPPED_BYTES = int(os.getenv("NOTIFICATION_STREAM_CAPPED_BYTES", str(16 * 1024 * 1024)))
+
+# Recherche plein texte (index inversé search_postings, classement BM25 avec bonus de fraîcheur)
+SEARCH_BM25_K1 = float(os.getenv("SEARCH_BM25_K1", "1.2"))
+SEARCH_BM25_B = float(os.getenv("SEARCH_BM25_B", "0.75"))
+SEARCH_RECENCY_WEIGHT = float(os.getenv("SEARCH_RECENCY_WEIGHT", "0.5"))  # bonus maximal d'un tweet tout juste publié
+SEARCH_RECENCY_HALF_LIFE_HOURS = float(os.getenv("SEARCH_RECENCY_HALF_LIFE_HOURS", "48"))
+SEARCH_MAX_POSTINGS_PER_TERM = int(os.getenv("SEARCH_MAX_POSTINGS_PER_TERM", "5000"))
+SEARCH_MAX_QUERY_TERMS = int(os.getenv("SEARCH_MAX_QUERY_TERMS", "8"))
+SEARCH_REINDEX_BATCH_SIZE = int(os.getenv("SEARCH_REINDEX_BATCH_SIZE", "1000"))
+
+# Tendances des hashtags en flux (comptes par minute sur fenêtre glissante, sketch pour la longue traîne)
+TRENDS_MAX_WINDOW_MINUTES = int(os.getenv("TRENDS_MAX_WINDOW_MINUTES", "1440"))
+TRENDS_DEFAULT_WINDOW_MINUTES = int(os.getenv("TRENDS_DEFAULT_WINDOW_MINUTES", "1440"))
+TRENDS_TRACKED_TAGS = int(os.getenv("TRENDS_TRACKED_TAGS", "2000"))
+TRENDS_SKETCH_WIDTH = int(os.getenv("TRENDS_SKETCH_WIDTH", "16384"))
+TRENDS_SKETCH_DEPTH = int(os.getenv("TRENDS_SKETCH_DEPTH", "4"))
+TRENDS_SKETCH_DECAY_MINUTES = int(os.getenv("TRENDS_SKETCH_DECAY_MINUTES", "60"))
+TRENDS_SAMPLES_PER_TAG = int(os.getenv("TRENDS_SAMPLES_PER_TAG", "3"))
+TRENDS_SNAPSHOT_SIZE = int(os.getenv("TRENDS_SNAPSHOT_SIZE", "100"))  # limite maximale de GET /trends
+TRENDS_MAX_CACHED_WINDOWS = int(os.getenv("TRENDS_MAX_CACHED_WINDOWS", "8"))
+TRENDS_POLL_SECONDS = float(os.getenv("TRENDS_POLL_SECONDS", "2"))
+TRENDS_POLL_OVERLAP_SECONDS = float(os.getenv("TRENDS_POLL_OVERLAP_SECONDS", "30"))  # insertions tardives
+TRENDS_POLL_BATCH_SIZE = int(os.getenv("TRENDS_POLL_BATCH_SIZE", "5000"))
+TRENDS_READY_TIMEOUT_SECONDS = float(os.getenv("TRENDS_READY_TIMEOUT_SECONDS", "2"))
+TRENDS_VELOCITY_SHORT_MINUTES = int(os.getenv("TRENDS_VELOCITY_SHORT_MINUTES", "60"))
+TRENDS_VELOCITY_BASELINE_MINUTES = int(os.getenv("TRENDS_VELOCITY_BASELINE_MINUTES", "1440"))  # fenêtre courte comprise
+TRENDS_VELOCITY_MIN_COUNT = int(os.getenv("TRENDS_VELOCITY_MIN_COUNT", "5"))  # occurrences minimales sur la fenêtre courte
+TRENDS_VELOCITY_REFRESH_SECONDS = float(os.getenv("TRENDS_VELOCITY_REFRESH_SECONDS", "60"))
+
+# Recommandations : profils d'affinité par utilisateur (tags et auteurs aimés, avec décroissance)
+AFFINITY_HALF_LIFE_DAYS = float(os.getenv("AFFINITY_HALF_LIFE_DAYS", "30"))
+AFFINITY_MAX_TAGS = int(os.getenv("AFFINITY_MAX_TAGS", "20"))
+AFFINITY_MAX_AUTHORS = int(os.getenv("AFFINITY_MAX_AUTHORS", "20"))
+AFFINITY_MIN_WEIGHT = float(os.getenv("AFFINITY_MIN_WEIGHT", "0.01"))  # poids oubliés en dessous
+AFFINITY_LOOKBACK_DAYS = int(os.getenv("AFFINITY_LOOKBACK_DAYS", "180"))  # likes relus par la reconstruction
+AFFINITY_ON_DEMAND_LIKES = int(os.getenv("AFFINITY_ON_DEMAND_LIKES", "200"))  # profil absent : derniers likes relus
+AFFINITY_REBUILD_BATCH_SIZE = int(os.getenv("AFFINITY_REBUILD_BATCH_SIZE", "5000"))
+AFFINITY_UPDATE_RETRIES = int(os.getenv("AFFINITY_UPDATE_RETRIES", "5"))
+RECOMMENDATION_CANDIDATE_TAGS = int(os.getenv("RECOMMENDATION_CANDIDATE_TAGS", "5"))
+RECOMMENDATION_CANDIDATE_AUTHORS = int(os.getenv("RECOMMENDATION_CANDIDATE_AUTHORS", "5"))
+RECOMMENDATION_CANDIDATES_PER_LIST = int(os.getenv("RECOMMENDATION_CANDIDATES_PER_LIST", "50"))
+RECOMMENDATION_MAX_AGE_DAYS = int(os.getenv("RECOMMENDATION_MAX_AGE_DAYS", "30"))
+
+# Compteurs en écriture différée (likes, commentaires, retweets, follows)
+COUNTER_FLUSH_INTERVAL_SECONDS = float(os.getenv("COUNTER_FLUSH_INTERVAL_SECONDS", "1"))
+COUNTER_FLUSH_MAX_PENDING = int(os.getenv("COUNTER_FLUSH_MAX_PENDING", "5000"))
+COUNTER_SHUTDOWN_FLUSH_RETRIES = int(os.getenv("COUNTER_SHUTDOWN_FLUSH_RETRIES", "3"))
+
+# File de tâches (collection jobs) pour les effets de bord après écriture
+JOB_RUN_IN_PROCESS = int(os.getenv("JOB_RUN_IN_PROCESS", "1"))  # 0 : workers lancés via `python -m app.worker`
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "0.5"))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "1"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "300"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "86400"))
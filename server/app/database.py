@@ -1,14 +1,28 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
-from dotenv import load_dotenv
-import gridfs
-
-# Charger les variables d'environnement
-load_dotenv()
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from app.config import (
+    MONGO_URL,
+    MONGO_DB_NAME,
+    MONGO_MAX_POOL_SIZE,
+    MONGO_MIN_POOL_SIZE,
+    MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    MONGO_CONNECT_TIMEOUT_MS,
+    MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
 
 # Connexion MongoDB
-MONGO_URL = "mongodb://mongodb:27017"
-client = AsyncIOMotorClient(MONGO_URL)
-db = client.twitter_db
+client = AsyncIOMotorClient(
+    MONGO_URL,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+)
+db = client[MONGO_DB_NAME]
 
-fs = gridfs.GridFS(db, collection="media")
\ No newline at end of file
+# Stockage des médias (GridFS asynchrone, mêmes collections media.files / media.chunks)
+fs = AsyncIOMotorGridFSBucket(db, bucket_name="media")
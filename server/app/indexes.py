@@ -0,0 +1,276 @@
+"""
+Registre déclaratif des index MongoDB.
+
+Chaque requête « chaude » des routes déclare ici l'index dont elle a besoin.
+Les index sont créés de manière idempotente au démarrage de l'application
+(voir `ensure_indexes` dans `app/main.py`).
+
+Utilisation en ligne de commande :
+
+    python -m app.indexes            # crée les index manquants
+    python -m app.indexes --explain  # exécute explain() sur chaque requête enregistrée
+                                     # et signale les COLLSCAN
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.config import JOB_RETENTION_SECONDS, NOTIFICATION_GROUP_WINDOW_SECONDS, NOTIFICATION_READ_TTL_DAYS
+
+logger = logging.getLogger(__name__)
+
+# Code d'erreur MongoDB : un index de même clé existe avec d'autres options
+INDEX_OPTIONS_CONFLICT = 85
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def to_model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, unique=self.unique, **self.options)
+
+
+@dataclass(frozen=True)
+class RouteQuery:
+    """Requête représentative d'une route, utilisée pour vérifier le plan d'exécution"""
+    route: str
+    collection: str
+    filter: Dict[str, Any]
+    sort: Optional[List[Tuple[str, int]]] = None
+    limit: int = 50
+
+
+# Tri de la pagination par curseur (voir app/services/pagination.py)
+_KEYSET = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+# Valeurs d'exemple pour les requêtes d'explain (seule la forme du plan nous intéresse)
+_SAMPLE_ID = str(ObjectId())
+_SAMPLE_USERNAME = "sample_user"
+
+INDEXES: List[IndexSpec] = [
+    # users : recherche par username / email à chaque requête authentifiée
+    IndexSpec("users", [("username", ASCENDING)], unique=True),
+    IndexSpec("users", [("email", ASCENDING)], unique=True),
+
+    # tweets : fil global, profils, retweets (pagination par curseur sur created_at, _id)
+    IndexSpec("tweets", [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexSpec("tweets", [("author_username", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexSpec("tweets", [("author_username", ASCENDING), ("is_retweet", ASCENDING),
+                         ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexSpec("tweets", [("author_id", ASCENDING), ("created_at", DESCENDING)]),
+    # un retweet par (tweet d'origine, utilisateur)
+    IndexSpec("tweets", [("original_tweet_id", ASCENDING), ("author_id", ASCENDING)], unique=True,
+              options={"partialFilterExpression": {"is_retweet": True}}),
+    IndexSpec("tweets", [("tags", ASCENDING), ("created_at", DESCENDING)]),
+    IndexSpec("tweets", [("like_count", DESCENDING)]),
+
+    # likes : un like par (tweet, utilisateur)
+    IndexSpec("likes", [("tweet_id", ASCENDING), ("user_id", ASCENDING)], unique=True),
+    IndexSpec("likes", [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+
+    # comments
+    IndexSpec("comments", [("tweet_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+
+    # bookmarks : un favori par (utilisateur, tweet)
+    IndexSpec("bookmarks", [("user_id", ASCENDING), ("tweet_id", ASCENDING)], unique=True),
+    IndexSpec("bookmarks", [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+
+    # follows : une relation par (follower, followed)
+    IndexSpec("follows", [("follower_id", ASCENDING), ("followed_id", ASCENDING)], unique=True),
+    IndexSpec("follows", [("followed_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+    IndexSpec("follows", [("follower_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+
+    # notifications : liste, comptage des non-lues (initialisation et réconciliation du compteur)
+    IndexSpec("notifications", [("recipient_id", ASCENDING), ("created_at", DESCENDING)]),
+    IndexSpec("notifications", [("recipient_id", ASCENDING), ("read", ASCENDING)]),
+    # un groupe par (destinataire, type, tweet, fenêtre) ; les notifications non groupées n'ont pas de bucket
+    IndexSpec("notifications", [("recipient_id", ASCENDING), ("type", ASCENDING), ("tweet_id", ASCENDING),
+                                ("bucket", ASCENDING)], unique=True,
+              options={"partialFilterExpression": {"bucket": {"$exists": True}}}),
+    # acteurs comptés par groupe (rejeux) ; inutiles une fois la fenêtre du groupe passée
+    IndexSpec("notification_group_members", [("recipient_id", ASCENDING), ("type", ASCENDING),
+                                             ("tweet_id", ASCENDING), ("bucket", ASCENDING),
+                                             ("actor_id", ASCENDING)], unique=True),
+    IndexSpec("notification_group_members", [("bucket", ASCENDING)],
+              options={"expireAfterSeconds": 2 * NOTIFICATION_GROUP_WINDOW_SECONDS}),
+    # rétention : expiration des notifications lues, archivage des non-lues les plus anciennes
+    IndexSpec("notifications", [("read_at", ASCENDING)],
+              options={"expireAfterSeconds": NOTIFICATION_READ_TTL_DAYS * 86400}),
+    IndexSpec("notifications", [("created_at", ASCENDING)],
+              options={"partialFilterExpression": {"read": False}}),
+    IndexSpec("notifications_archive", [("recipient_id", ASCENDING), ("created_at", DESCENDING)]),
+
+    # hashtags
+    IndexSpec("hashtags", [("tag", ASCENDING)], unique=True),
+    IndexSpec("tweet_hashtags", [("tweet_id", ASCENDING), ("hashtag_id", ASCENDING)], unique=True),
+    IndexSpec("tweet_hashtags", [("hashtag_id", ASCENDING)]),
+
+    # réactions émotionnelles
+    IndexSpec("emotion_reactions", [("tweet_id", ASCENDING), ("user_id", ASCENDING)]),
+
+    # recherche plein texte : entrées d'un terme par date, une entrée par (tweet, terme)
+    IndexSpec("search_postings", [("term", ASCENDING), ("created_at", DESCENDING)]),
+    IndexSpec("search_postings", [("tweet_id", ASCENDING), ("term", ASCENDING)], unique=True),
+
+    # file de tâches : prochaine tâche prête, déduplication, purge des tâches terminées
+    IndexSpec("jobs", [("status", ASCENDING), ("run_at", ASCENDING)]),
+    IndexSpec("jobs", [("idempotency_key", ASCENDING)], unique=True, options={"sparse": True}),
+    IndexSpec("jobs", [("finished_at", ASCENDING)], options={"expireAfterSeconds": JOB_RETENTION_SECONDS}),
+]
+
+ROUTE_QUERIES: List[RouteQuery] = [
+    RouteQuery("POST /token", "users", {"username": _SAMPLE_USERNAME}, limit=1),
+    RouteQuery("POST /users", "users", {"email": "sample@example.com"}, limit=1),
+    RouteQuery("GET /tweets", "tweets", {}, _KEYSET),
+    RouteQuery("GET /users/{username}/tweets", "tweets", {"author_username": _SAMPLE_USERNAME}, _KEYSET),
+    RouteQuery("GET /users/{username}/retweeted-tweets", "tweets",
+               {"author_username": _SAMPLE_USERNAME, "is_retweet": True}, _KEYSET),
+    RouteQuery("GET /tweets/{tweet_id}/retweet_status", "tweets",
+               {"original_tweet_id": _SAMPLE_ID, "author_id": _SAMPLE_ID, "is_retweet": True}, limit=1),
+    RouteQuery("GET /tweets/{tweet_id}/like_status", "likes",
+               {"tweet_id": _SAMPLE_ID, "user_id": _SAMPLE_ID}, limit=1),
+    RouteQuery("GET /users/{username}/liked-tweets", "likes", {"user_id": _SAMPLE_ID}, _KEYSET),
+    RouteQuery("GET /tweets/{tweet_id}/comments", "comments", {"tweet_id": _SAMPLE_ID}, _KEYSET),
+    RouteQuery("GET /users/me/bookmarks", "bookmarks", {"user_id": _SAMPLE_ID}, _KEYSET),
+    RouteQuery("POST /tweets/{tweet_id}/bookmark", "bookmarks",
+               {"user_id": _SAMPLE_ID, "tweet_id": _SAMPLE_ID}, limit=1),
+    RouteQuery("GET /users/{username}/follow_status", "follows",
+               {"follower_id": _SAMPLE_ID, "followed_id": _SAMPLE_ID}, limit=1),
+    RouteQuery("POST /tweets/status", "likes",
+               {"user_id": _SAMPLE_ID, "tweet_id": {"$in": [_SAMPLE_ID]}}),
+    RouteQuery("POST /tweets/status", "tweets",
+               {"original_tweet_id": {"$in": [_SAMPLE_ID]}, "author_id": _SAMPLE_ID, "is_retweet": True}),
+    RouteQuery("POST /tweets/status", "bookmarks",
+               {"user_id": _SAMPLE_ID, "tweet_id": {"$in": [_SAMPLE_ID]}}),
+    RouteQuery("POST /users/follow_status", "follows",
+               {"follower_id": _SAMPLE_ID, "followed_id": {"$in": [_SAMPLE_ID]}}),
+    RouteQuery("GET /users/{username}/followers", "follows", {"followed_id": _SAMPLE_ID}, _KEYSET),
+    RouteQuery("GET /users/{username}/following", "follows", {"follower_id": _SAMPLE_ID}, _KEYSET),
+    RouteQuery("GET /notifications", "notifications",
+               {"recipient_id": _SAMPLE_ID}, [("created_at", DESCENDING)]),
+    RouteQuery("GET /notifications/count", "notification_counters", {"_id": _SAMPLE_ID}, limit=1),
+    RouteQuery("notifications.reconcile_unread", "notifications",
+               {"read": False, "recipient_id": {"$in": [_SAMPLE_ID]}}),
+    RouteQuery("notifications.archive", "notifications",
+               {"read": False, "created_at": {"$lt": datetime.utcnow()}}, [("created_at", ASCENDING)]),
+    RouteQuery("trends.poll", "tweets",
+               {"created_at": {"$gte": datetime.utcnow() - timedelta(days=1)}, "tags": {"$exists": True, "$ne": []}},
+               [("created_at", ASCENDING), ("_id", ASCENDING)]),
+    RouteQuery("GET /recommendations (tag)", "tweets",
+               {"tags": "sample", "created_at": {"$gte": datetime.utcnow() - timedelta(days=30)}},
+               [("created_at", DESCENDING)], limit=50),
+    RouteQuery("GET /recommendations (author)", "tweets",
+               {"author_id": _SAMPLE_ID, "created_at": {"$gte": datetime.utcnow() - timedelta(days=30)},
+                "is_retweet": {"$ne": True}}, [("created_at", DESCENDING)], limit=50),
+    RouteQuery("recommendations.build_profile", "likes", {"user_id": _SAMPLE_ID}, _KEYSET, limit=200),
+    RouteQuery("recommendations.rebuild", "likes",
+               {"created_at": {"$gte": datetime.utcnow() - timedelta(days=180)}}, [("_id", ASCENDING)]),
+    RouteQuery("GET /api/tweets/{tweet_id}/reactions", "emotion_reactions",
+               {"tweet_id": ObjectId(_SAMPLE_ID)}),
+    RouteQuery("GET /tweets/{searchword}/search", "search_postings",
+               {"term": "sample", "created_at": {"$lte": datetime.utcnow()}}, [("created_at", DESCENDING)], limit=5000),
+    RouteQuery("search.index", "search_postings", {"tweet_id": _SAMPLE_ID, "term": "sample"}, limit=1),
+    RouteQuery("hashtags.get_or_create", "hashtags", {"tag": "sample"}, limit=1),
+    RouteQuery("hashtags.get_hashtags_for_tweets", "tweet_hashtags", {"tweet_id": {"$in": [_SAMPLE_ID]}}),
+    RouteQuery("jobs.claim", "jobs", {"status": "pending", "run_at": {"$lte": datetime.utcnow()}},
+               [("run_at", ASCENDING)], limit=1),
+]
+
+
+async def ensure_indexes(database) -> None:
+    """Crée les index déclarés dans `INDEXES` (idempotent)"""
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in INDEXES:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    for collection, specs in by_collection.items():
+        try:
+            await database[collection].create_indexes([spec.to_model() for spec in specs])
+        except OperationFailure as e:
+            # Un index unique peut échouer sur des doublons existants : on crée les autres un par un
+            logger.warning("Création groupée des index de %s impossible (%s), repli index par index", collection, e)
+            for spec in specs:
+                try:
+                    await database[collection].create_indexes([spec.to_model()])
+                except OperationFailure as err:
+                    if err.code == INDEX_OPTIONS_CONFLICT and "expireAfterSeconds" in spec.options:
+                        # Durée de rétention modifiée dans la configuration : collMod plutôt que recréer l'index
+                        await database.command("collMod", collection, index={
+                            "keyPattern": dict(spec.keys),
+                            "expireAfterSeconds": spec.options["expireAfterSeconds"],
+                        })
+                        logger.info("Index TTL %s.%s mis à jour", collection, spec.name)
+                        continue
+                    logger.error("Index %s.%s non créé : %s", collection, spec.name, err)
+
+
+def _find_stages(plan: Dict[str, Any]) -> List[str]:
+    """Liste récursivement les étapes d'un plan d'exécution"""
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_find_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_find_stages(child))
+    return stages
+
+
+async def explain_route_queries(database) -> List[Dict[str, Any]]:
+    """Exécute explain() sur chaque requête de `ROUTE_QUERIES`"""
+    report = []
+    for query in ROUTE_QUERIES:
+        cursor = database[query.collection].find(query.filter)
+        if query.sort:
+            cursor = cursor.sort(query.sort)
+        explanation = await cursor.limit(query.limit).explain()
+        stages = _find_stages(explanation["queryPlanner"]["winningPlan"])
+        report.append({
+            "route": query.route,
+            "collection": query.collection,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
+
+
+async def _main(argv: List[str]) -> int:
+    from app.database import db
+
+    parser = argparse.ArgumentParser(prog="python -m app.indexes", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--explain", action="store_true", help="signale les requêtes enregistrées qui font un COLLSCAN")
+    args = parser.parse_args(argv)
+
+    await ensure_indexes(db)
+    print(f"{len(INDEXES)} index déclarés vérifiés")
+
+    if not args.explain:
+        return 0
+
+    report = await explain_route_queries(db)
+    collscans = [entry for entry in report if entry["collscan"]]
+    for entry in report:
+        status = "COLLSCAN" if entry["collscan"] else "ok"
+        print(f"{status:<9} {entry['route']:<45} {entry['collection']:<18} {' <- '.join(entry['stages'])}")
+    print(f"{len(collscans)} requête(s) en COLLSCAN sur {len(report)}")
+    return 1 if collscans else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
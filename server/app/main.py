@@ -485,15 +485,79 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, tweet, media
+from app.routes import auth, tweet, media, metrics
+from app.database import db
+from app.indexes import ensure_indexes
+from app.services.counters import counter_buffer
+from app.services.jobs import job_worker
+from app.services.notification_stream import notification_hub
+from app.services.username_index import username_index
+from app.services.trends import trend_engine
+from app.config import JOB_RUN_IN_PROCESS
+from app.services.pagination import NEXT_CURSOR_HEADER
 
 app = FastAPI()
 
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=[NEXT_CURSOR_HEADER])
 
 app.include_router(auth.router, prefix="")
 app.include_router(tweet.router, prefix="")
 app.include_router(media.router, prefix="/media", tags=["media"])
+app.include_router(metrics.router, prefix="")
+
+@app.on_event("startup")
+async def create_indexes():
+    # Création idempotente des index déclarés dans app/indexes.py
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def start_counter_buffer():
+    # Flush périodique des compteurs en écriture différée
+    counter_buffer.start()
+
+@app.on_event("startup")
+async def start_job_worker():
+    # Workers de la file de tâches dans le processus de l'API (sinon : python -m app.worker)
+    if JOB_RUN_IN_PROCESS:
+        job_worker.start()
+
+@app.on_event("startup")
+async def start_notification_hub():
+    # Suivi des événements publiés par les autres processus (NOTIFICATION_STREAM_BROKER=mongo)
+    notification_hub.start()
+
+@app.on_event("startup")
+async def start_username_index():
+    # Autocomplétion des mentions en mémoire : construction en tâche de fond puis rafraîchissement périodique
+    username_index.start()
+
+@app.on_event("startup")
+async def start_trend_engine():
+    # Tendances des hashtags : relecture de la fenêtre maximale puis suivi des nouveaux tweets
+    trend_engine.start()
+
+@app.on_event("shutdown")
+async def stop_trend_engine():
+    await trend_engine.stop()
+
+@app.on_event("shutdown")
+async def stop_username_index():
+    await username_index.stop()
+
+@app.on_event("shutdown")
+async def stop_notification_hub():
+    # Ferme les flux SSE ouverts : les navigateurs se reconnecteront à un autre processus
+    await notification_hub.stop()
+
+@app.on_event("shutdown")
+async def stop_job_worker():
+    # Les tâches interrompues seront reprises à l'expiration de leur bail
+    await job_worker.stop()
+
+@app.on_event("shutdown")
+async def flush_counter_buffer():
+    # Écrit les incréments encore en mémoire avant l'arrêt du processus
+    await counter_buffer.stop()
 
 @app.get("/")
 async def root():
@@ -1,5 +1,5 @@
-from .user import User, UserCreate, UserInDB
-from .tweet import Tweet, TweetCreate
+from .user import User, UserCreate, UserInDB, UserBatchRequest, FollowStatusRequest
+from .tweet import Tweet, TweetCreate, TweetStatusRequest, TweetStatus
 from .comment import Comment, CommentCreate
 from .like import Like, LikeCreate
 from .retweet import Retweet, RetweetCreate
@@ -7,4 +7,4 @@ from .bookmark import Bookmark, BookmarkCreate
 from .follow import Follow
 from .hashtag import Hashtag
 from .mention import Mention
-from .notification import Notification
\ No newline at end of file
+from .notification import Notification, NotificationActor
\ No newline at end of file
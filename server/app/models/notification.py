@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 # class Notification(BaseModel):
 #     id: str
@@ -12,6 +12,11 @@ from typing import Optional
 #     created_at: datetime
 
 
+class NotificationActor(BaseModel):
+    id: str
+    username: str
+
+
 class Notification(BaseModel):
     id: str
     recipient_id: str
@@ -23,4 +28,7 @@ class Notification(BaseModel):
     comment_id: Optional[str] = None
     comment_content: Optional[str] = None
     read: bool = False
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime  # Dernière activité pour une notification regroupée
+    # Notifications regroupées : derniers acteurs (le plus récent en premier) et nombre total
+    actors: List[NotificationActor] = []
+    actor_count: int = 1
\ No newline at end of file
@@ -24,4 +24,12 @@ class Tweet(BaseModel):
     is_retweet: bool = False
     original_tweet_id: Optional[str] = None
     original_author_username: Optional[str] = None
-    tags: Optional[List[str]] = []
\ No newline at end of file
+    tags: Optional[List[str]] = []
+
+class TweetStatusRequest(BaseModel):
+    tweet_ids: List[str] = []
+
+class TweetStatus(BaseModel):
+    liked: bool = False
+    retweeted: bool = False
+    bookmarked: bool = False
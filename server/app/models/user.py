@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -19,4 +19,11 @@ class User(BaseModel):
     created_at: datetime
 
 class UserInDB(User):
-    hashed_password: str
\ No newline at end of file
+    hashed_password: str
+
+class UserBatchRequest(BaseModel):
+    ids: List[str] = []
+    usernames: List[str] = []
+
+class FollowStatusRequest(BaseModel):
+    usernames: List[str] = []
@@ -0,0 +1,42 @@
+from app.database import db, fs
+from .base import BaseRepository
+from .user import UserRepository
+from .tweet import TweetRepository
+from .like import LikeRepository
+from .comment import CommentRepository
+from .bookmark import BookmarkRepository
+from .follow import FollowRepository
+from .notification import (
+    NotificationArchiveRepository,
+    NotificationGroupMemberRepository,
+    NotificationRepository,
+    UnreadCounterRepository,
+)
+from .hashtag import HashtagRepository, TweetHashtagRepository
+from .reaction import EmotionReactionRepository
+from .media import MediaRepository
+from .timeline import TimelineRepository
+from .job import JobRepository
+from .search import SearchPostingRepository, SearchTermRepository
+from .affinity import UserAffinityRepository
+
+# Instances partagées, utilisées par toutes les routes
+user_repository = UserRepository(db)
+tweet_repository = TweetRepository(db)
+like_repository = LikeRepository(db)
+comment_repository = CommentRepository(db)
+bookmark_repository = BookmarkRepository(db)
+follow_repository = FollowRepository(db)
+notification_repository = NotificationRepository(db)
+unread_counter_repository = UnreadCounterRepository(db)
+notification_archive_repository = NotificationArchiveRepository(db)
+notification_group_member_repository = NotificationGroupMemberRepository(db)
+hashtag_repository = HashtagRepository(db)
+tweet_hashtag_repository = TweetHashtagRepository(db)
+emotion_reaction_repository = EmotionReactionRepository(db)
+media_repository = MediaRepository(db, fs)
+timeline_repository = TimelineRepository(db)
+job_repository = JobRepository(db)
+search_posting_repository = SearchPostingRepository(db)
+search_term_repository = SearchTermRepository(db)
+user_affinity_repository = UserAffinityRepository(db)
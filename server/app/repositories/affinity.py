@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.repositories.base import DUPLICATE_KEY_ERROR, BaseRepository
+
+
+class UserAffinityRepository(BaseRepository):
+    """Profils d'affinité : un document par utilisateur (tags et auteurs pondérés, bornés)"""
+    collection_name = "user_affinities"
+
+    async def get(self, user_id: str):
+        return await self.collection.find_one({"_id": user_id})
+
+    async def save(self, user_id: str, profile: Dict[str, Any], expected_version: Optional[int]) -> bool:
+        """
+        Écriture conditionnelle du profil : création si `expected_version` est None,
+        sinon remplacement si la version lue n'a pas changé. False en cas de conflit.
+        """
+        if expected_version is None:
+            try:
+                await self.collection.insert_one({"_id": user_id, **profile, "version": 1})
+                return True
+            except DuplicateKeyError:
+                return False
+        result = await self.collection.replace_one(
+            {"_id": user_id, "version": expected_version}, {**profile, "version": expected_version + 1}
+        )
+        return result.matched_count > 0
+
+    async def upsert_many(self, profiles: List[Tuple[str, Dict[str, Any]]], rebuild_started: datetime) -> int:
+        """
+        Écrit les profils recalculés (reconstruction) ; la version est incrémentée.
+        Un profil mis à jour depuis `rebuild_started` (mise à jour incrémentale pendant
+        la reconstruction) n'est pas écrasé : le filtre ne le trouve pas et l'upsert
+        heurte son `_id`. Renvoie le nombre de profils écrits.
+        """
+        if not profiles:
+            return 0
+        try:
+            result = await self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": user_id, "updated_at": {"$lt": rebuild_started}},
+                    {"$set": profile, "$inc": {"version": 1}},
+                    upsert=True,
+                )
+                for user_id, profile in profiles
+            ], ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+            return e.details["nModified"] + e.details["nUpserted"]
+        return result.modified_count + result.upserted_count
+
+    async def delete_stale(self, before: datetime) -> int:
+        """Supprime les profils ni recalculés ni mis à jour depuis `before`"""
+        result = await self.collection.delete_many({"updated_at": {"$lt": before}})
+        return result.deleted_count
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bson import ObjectId
+from pymongo import UpdateOne
+from app.services.counters import counter_buffer
+from app.services.pagination import DEFAULT_PAGE_SIZE, KEYSET_SORT, keyset_query, split_page
+
+# Code d'erreur MongoDB d'une violation d'index unique
+DUPLICATE_KEY_ERROR = 11000
+
+
+def to_object_id(value) -> ObjectId:
+    """Convertit un identifiant (str ou ObjectId) en ObjectId"""
+    return value if isinstance(value, ObjectId) else ObjectId(value)
+
+
+class BaseRepository:
+    """Accès asynchrone à une collection MongoDB : chaque opération Motor est attendue"""
+    collection_name: str = ""
+    # Les compteurs de la collection passent par le tampon d'écriture différée
+    buffered_counters: bool = False
+
+    def __init__(self, database):
+        self.collection = database[self.collection_name]
+
+    def _with_pending_counters(self, documents, projection: Optional[Dict[str, Any]] = None):
+        """Ajoute aux documents lus les incréments pas encore écrits"""
+        if self.buffered_counters and counter_buffer.has_pending():
+            for document in documents:
+                if document and "_id" in document:
+                    counter_buffer.merge(self.collection_name, document, projection)
+        return documents
+
+    async def find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]] = None):
+        document = await self.collection.find_one(query, projection)
+        self._with_pending_counters([document], projection)
+        return document
+
+    async def find_many(
+        self,
+        query: Dict[str, Any],
+        sort: Optional[Sequence[Tuple[str, int]]] = None,
+        limit: int = 0,
+        skip: int = 0,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        cursor = self.collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(list(sort))
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return self._with_pending_counters(await cursor.to_list(length=limit or None), projection)
+
+    async def find_page(
+        self,
+        query: Dict[str, Any],
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page triée par (created_at, _id) décroissants et curseur de la page suivante"""
+        documents = await self.find_many(keyset_query(query, cursor), sort=KEYSET_SORT, limit=limit + 1, projection=projection)
+        return split_page(documents, limit)
+
+    async def get_by_id(self, document_id):
+        return await self.find_one({"_id": to_object_id(document_id)})
+
+    async def insert(self, document: Dict[str, Any]) -> str:
+        result = await self.collection.insert_one(document)
+        return str(result.inserted_id)
+
+    async def insert_many(self, documents: List[Dict[str, Any]]) -> List[str]:
+        if not documents:
+            return []
+        result = await self.collection.insert_many(documents, ordered=False)
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+    async def increment(self, document_id, field: str, amount: int = 1) -> None:
+        if self.buffered_counters:
+            await counter_buffer.increment(self.collection_name, str(document_id), field, amount)
+        else:
+            await self.collection.update_one({"_id": to_object_id(document_id)}, {"$inc": {field: amount}})
+
+    async def increment_many(self, increments: Sequence[Tuple[str, str, int]]) -> None:
+        """Plusieurs `(document_id, champ, delta)` en une seule écriture groupée"""
+        if self.buffered_counters:
+            await counter_buffer.increment_many(self.collection_name, increments)
+        else:
+            await self.collection.bulk_write(
+                [UpdateOne({"_id": to_object_id(document_id)}, {"$inc": {field: amount}})
+                 for document_id, field, amount in increments],
+                ordered=False,
+            )
+
+    async def delete_by_id(self, document_id) -> bool:
+        result = await self.collection.delete_one({"_id": to_object_id(document_id)})
+        return result.deleted_count > 0
+
+    async def count(self, query: Dict[str, Any]) -> int:
+        return await self.collection.count_documents(query)
+
+    async def aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self.collection.aggregate(pipeline).to_list(length=None)
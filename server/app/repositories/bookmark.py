@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo.errors import DuplicateKeyError
+from app.repositories.base import BaseRepository
+
+
+class BookmarkRepository(BaseRepository):
+    collection_name = "bookmarks"
+
+    async def get(self, user_id: str, tweet_id: str):
+        return await self.collection.find_one({"user_id": user_id, "tweet_id": tweet_id})
+
+    async def add(self, user_id: str, tweet_id: str) -> bool:
+        """Ajoute le favori (upsert sur l'index unique) ; False s'il existait déjà"""
+        try:
+            result = await self.collection.update_one(
+                {"user_id": user_id, "tweet_id": tweet_id},
+                {"$setOnInsert": {"created_at": datetime.utcnow()}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Upsert concurrent sur la même clé : l'autre requête a créé le favori
+            return False
+        return result.upserted_id is not None
+
+    async def remove(self, user_id: str, tweet_id: str) -> bool:
+        """Retire le favori ; False s'il n'existait pas"""
+        result = await self.collection.delete_one({"user_id": user_id, "tweet_id": tweet_id})
+        return result.deleted_count > 0
+
+    async def list_for_tweets(self, tweet_ids: List[str], user_id: str) -> List[Dict[str, Any]]:
+        return await self.find_many({"user_id": user_id, "tweet_id": {"$in": tweet_ids}}, projection={"tweet_id": 1})
+
+    async def page_by_user(self, user_id: str, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.find_page({"user_id": user_id}, cursor, limit)
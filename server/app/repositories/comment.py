@@ -0,0 +1,9 @@
+from typing import Any, Dict, List, Optional, Tuple
+from app.repositories.base import BaseRepository
+
+
+class CommentRepository(BaseRepository):
+    collection_name = "comments"
+
+    async def page_for_tweet(self, tweet_id: str, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.find_page({"tweet_id": tweet_id}, cursor, limit)
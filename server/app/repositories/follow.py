@@ -0,0 +1,90 @@
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pymongo.errors import DuplicateKeyError
+from app.repositories.base import BaseRepository
+from app.services.counters import counter_buffer
+from app.services.pagination import DEFAULT_PAGE_SIZE, KEYSET_SORT, keyset_query, split_page
+
+
+class FollowRepository(BaseRepository):
+    collection_name = "follows"
+
+    async def get(self, follower_id: str, followed_id: str):
+        return await self.collection.find_one({"follower_id": follower_id, "followed_id": followed_id})
+
+    async def list_followed_among(self, follower_id: str, followed_ids: List[str]) -> List[str]:
+        """Parmi `followed_ids`, ceux que `follower_id` suit"""
+        edges = await self.find_many(
+            {"follower_id": follower_id, "followed_id": {"$in": followed_ids}}, projection={"followed_id": 1}
+        )
+        return [edge["followed_id"] for edge in edges]
+
+    async def add(self, follow: Dict[str, Any]) -> Optional[str]:
+        """
+        Crée la relation par upsert sur l'index unique (follower, followed) ;
+        renvoie son id, ou None si elle existait déjà.
+        """
+        key = {"follower_id": follow["follower_id"], "followed_id": follow["followed_id"]}
+        fields = {field: value for field, value in follow.items() if field not in key}
+        try:
+            result = await self.collection.update_one(key, {"$setOnInsert": fields}, upsert=True)
+        except DuplicateKeyError:
+            # Upsert concurrent sur la même relation
+            return None
+        return str(result.upserted_id) if result.upserted_id is not None else None
+
+    async def remove(self, follower_id: str, followed_id: str) -> bool:
+        """Supprime la relation ; False si elle n'existait pas"""
+        result = await self.collection.delete_one({"follower_id": follower_id, "followed_id": followed_id})
+        return result.deleted_count > 0
+
+    async def page_followers(
+        self, user_id: str, projection: Dict[str, Any], cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page des profils qui suivent `user_id` (les plus récents d'abord)"""
+        return await self._page_profiles({"followed_id": user_id}, "follower_id", projection, cursor, limit)
+
+    async def page_following(
+        self, user_id: str, projection: Dict[str, Any], cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page des profils suivis par `user_id` (les plus récents d'abord)"""
+        return await self._page_profiles({"follower_id": user_id}, "followed_id", projection, cursor, limit)
+
+    async def _page_profiles(
+        self, query: Dict[str, Any], profile_field: str, projection: Dict[str, Any], cursor: Optional[str], limit: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Une seule agrégation : page de relations sur l'index (…, created_at, _id),
+        puis `$lookup` des utilisateurs en ne projetant que `projection`.
+        """
+        edges = await self.aggregate([
+            {"$match": keyset_query(query, cursor)},
+            {"$sort": dict(KEYSET_SORT)},
+            {"$limit": limit + 1},
+            {"$addFields": {"user_oid": {"$toObjectId": f"${profile_field}"}}},
+            {"$lookup": {"from": "users", "localField": "user_oid", "foreignField": "_id", "as": "user"}},
+            # En projection pointée, le _id du sous-document n'est pas inclus implicitement
+            {"$project": {"created_at": 1, "user._id": 1, **{f"user.{key}": 1 for key in projection}}},
+        ])
+        # Le curseur se calcule sur les relations : un compte supprimé ne décale pas la page
+        page, next_cursor = split_page(edges, limit)
+        users = [edge["user"][0] for edge in page if edge["user"]]
+        if counter_buffer.has_pending():
+            for user in users:
+                counter_buffer.merge("users", user, projection)
+        return users, next_cursor
+
+    async def list_following_ids(self, user_id: str) -> List[str]:
+        follows = await self.find_many({"follower_id": user_id}, projection={"_id": 0, "followed_id": 1})
+        return [follow["followed_id"] for follow in follows]
+
+    async def iter_follower_ids(self, user_id: str, batch_size: int) -> AsyncIterator[List[str]]:
+        """Parcourt les followers d'un utilisateur par lots (pour le fan-out)"""
+        batch: List[str] = []
+        cursor = self.collection.find({"followed_id": user_id}, {"_id": 0, "follower_id": 1}, batch_size=batch_size)
+        async for follow in cursor:
+            batch.append(follow["follower_id"])
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
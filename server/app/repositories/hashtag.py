@@ -0,0 +1,75 @@
+from typing import Any, Dict, List
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.repositories.base import DUPLICATE_KEY_ERROR, BaseRepository, to_object_id
+
+
+class HashtagRepository(BaseRepository):
+    collection_name = "hashtags"
+
+    async def get_by_tag(self, tag: str):
+        return await self.collection.find_one({"tag": tag})
+
+    async def get_many_by_ids(self, hashtag_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self.find_many({"_id": {"$in": [to_object_id(hid) for hid in hashtag_ids]}})
+
+    async def get_or_create(self, tag: str) -> str:
+        """Upsert atomique sur l'index unique `tag` ; renvoie l'id du hashtag"""
+        for attempt in range(2):
+            try:
+                hashtag = await self.collection.find_one_and_update(
+                    {"tag": tag},
+                    {"$setOnInsert": {"tag": tag}},
+                    projection={"_id": 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return str(hashtag["_id"])
+            except DuplicateKeyError:
+                # Upsert concurrent du même tag : le second essai trouve le document créé
+                if attempt:
+                    raise
+
+    async def upsert_many(self, tags: List[str]) -> Dict[str, str]:
+        """Crée les tags manquants en un `bulk_write` et renvoie {tag: id} pour tous"""
+        if not tags:
+            return {}
+        operations = [UpdateOne({"tag": tag}, {"$setOnInsert": {"tag": tag}}, upsert=True) for tag in tags]
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Deux upserts concurrents du même tag : l'index unique rejette le second, le tag existe
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+        hashtags = await self.find_many({"tag": {"$in": tags}}, projection={"tag": 1})
+        return {hashtag["tag"]: str(hashtag["_id"]) for hashtag in hashtags}
+
+
+class TweetHashtagRepository(BaseRepository):
+    collection_name = "tweet_hashtags"
+
+    async def list_for_tweet(self, tweet_id: str) -> List[Dict[str, Any]]:
+        return await self.find_many({"tweet_id": tweet_id})
+
+    async def tags_for_tweets(self, tweet_ids: List[str]) -> Dict[str, List[str]]:
+        """{tweet_id: [tags]} pour toute une page de tweets, en une seule agrégation"""
+        if not tweet_ids:
+            return {}
+        groups = await self.aggregate([
+            {"$match": {"tweet_id": {"$in": tweet_ids}}},
+            {"$addFields": {"hashtag_oid": {"$toObjectId": "$hashtag_id"}}},
+            {"$lookup": {"from": "hashtags", "localField": "hashtag_oid", "foreignField": "_id", "as": "hashtag"}},
+            {"$unwind": "$hashtag"},
+            {"$group": {"_id": "$tweet_id", "tags": {"$push": "$hashtag.tag"}}},
+        ])
+        return {group["_id"]: group["tags"] for group in groups}
+
+    async def link_many(self, tweet_id: str, hashtag_ids: List[str]) -> None:
+        """Associe les hashtags au tweet en un `bulk_write` ; rejouer l'appel ne crée pas de doublon"""
+        if not hashtag_ids:
+            return
+        await self.collection.bulk_write([
+            UpdateOne({"tweet_id": tweet_id, "hashtag_id": hashtag_id},
+                      {"$setOnInsert": {"tweet_id": tweet_id, "hashtag_id": hashtag_id}}, upsert=True)
+            for hashtag_id in hashtag_ids
+        ], ordered=False)
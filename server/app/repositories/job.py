@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from app.repositories.base import DUPLICATE_KEY_ERROR, BaseRepository
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobRepository(BaseRepository):
+    """File de tâches persistante : un document par tâche, réclamé par bail (lease)"""
+    collection_name = "jobs"
+
+    @staticmethod
+    def new_job(
+        name: str, payload: Dict[str, Any], idempotency_key: Optional[str], run_at: datetime, max_attempts: int
+    ) -> Dict[str, Any]:
+        job = {
+            "name": name,
+            "payload": payload,
+            "status": PENDING,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_at": run_at,
+            "created_at": datetime.utcnow(),
+        }
+        if idempotency_key:
+            job["idempotency_key"] = idempotency_key
+        return job
+
+    async def enqueue(self, job: Dict[str, Any]) -> str:
+        """Ajoute une tâche ; une clé d'idempotence déjà connue renvoie la tâche existante"""
+        try:
+            return await self.insert(job)
+        except DuplicateKeyError:
+            existing = await self.collection.find_one({"idempotency_key": job["idempotency_key"]}, {"_id": 1})
+            return str(existing["_id"]) if existing else ""
+
+    async def enqueue_many(self, jobs: List[Dict[str, Any]]) -> int:
+        """Ajoute plusieurs tâches en un `insert_many` ; renvoie le nombre de tâches nouvelles"""
+        if not jobs:
+            return 0
+        try:
+            return len(await self.insert_many(jobs))
+        except BulkWriteError as e:
+            # Non ordonné : seules les tâches dont la clé d'idempotence existe déjà sont écartées
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+            return e.details.get("nInserted", 0)
+
+    async def claim(self, worker_id: str, lease_seconds: float):
+        """
+        Réclame la prochaine tâche prête (ou dont le bail a expiré : son worker est mort).
+        La tâche reste en base jusqu'à `complete`, d'où une livraison au moins une fois.
+        Une tâche dont le bail expire alors que ses tentatives sont épuisées (elle tue ou
+        bloque son worker à chaque essai) est abandonnée au lieu d'être reprise.
+        """
+        now = datetime.utcnow()
+        await self.collection.update_many(
+            {"status": RUNNING, "locked_until": {"$lt": now}, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+            {"$set": {"status": FAILED, "last_error": "bail expiré, tentatives épuisées", "finished_at": now},
+             "$unset": {"locked_until": ""}},
+        )
+        return await self.collection.find_one_and_update(
+            {"$or": [
+                {"status": PENDING, "run_at": {"$lte": now}},
+                {"status": RUNNING, "locked_until": {"$lt": now}, "$expr": {"$lt": ["$attempts", "$max_attempts"]}},
+            ]},
+            {"$set": {"status": RUNNING, "worker": worker_id, "locked_until": now + timedelta(seconds=lease_seconds),
+                      "started_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("run_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    @staticmethod
+    def _held(job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Filtre de la tâche telle que réclamée : si son bail a expiré et qu'un autre worker
+        (ou une autre réclamation du même) l'a reprise, la mise à jour ne trouve rien.
+        """
+        return {"_id": job["_id"], "worker": job["worker"], "attempts": job["attempts"]}
+
+    async def complete(self, job: Dict[str, Any]) -> bool:
+        result = await self.collection.update_one(
+            self._held(job),
+            {"$set": {"status": DONE, "finished_at": datetime.utcnow()}, "$unset": {"locked_until": ""}}
+        )
+        return result.matched_count > 0
+
+    async def retry(self, job: Dict[str, Any], run_at: datetime, error: str) -> bool:
+        result = await self.collection.update_one(
+            self._held(job),
+            {"$set": {"status": PENDING, "run_at": run_at, "last_error": error}, "$unset": {"locked_until": ""}}
+        )
+        return result.matched_count > 0
+
+    async def fail(self, job: Dict[str, Any], error: str) -> bool:
+        """Abandon définitif (tentatives épuisées) : la tâche reste visible pour analyse"""
+        result = await self.collection.update_one(
+            self._held(job),
+            {"$set": {"status": FAILED, "last_error": error, "finished_at": datetime.utcnow()},
+             "$unset": {"locked_until": ""}}
+        )
+        return result.matched_count > 0
+
+    async def oldest_ready(self) -> Optional[datetime]:
+        """Date prévue de la plus ancienne tâche prête mais pas encore prise (retard de la file)"""
+        job = await self.collection.find_one(
+            {"status": PENDING, "run_at": {"$lte": datetime.utcnow()}},
+            {"run_at": 1},
+            sort=[("run_at", ASCENDING)],
+        )
+        return job["run_at"] if job else None
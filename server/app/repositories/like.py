@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+from app.repositories.base import BaseRepository
+
+
+class LikeRepository(BaseRepository):
+    collection_name = "likes"
+
+    async def get(self, tweet_id: str, user_id: str):
+        return await self.collection.find_one({"tweet_id": tweet_id, "user_id": user_id})
+
+    async def add(self, like: Dict[str, Any]) -> Optional[str]:
+        """Insère le like ; None si l'utilisateur avait déjà liké ce tweet (index unique)"""
+        try:
+            return await self.insert(like)
+        except DuplicateKeyError:
+            return None
+
+    async def remove(self, tweet_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+        """Supprime le like et le renvoie (_id, created_at) ; None s'il n'existait pas"""
+        return await self.collection.find_one_and_delete(
+            {"tweet_id": tweet_id, "user_id": user_id}, projection={"created_at": 1}
+        )
+
+    async def list_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+        return await self.find_many({"user_id": user_id})
+
+    async def list_recent_by_user(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        return await self.find_many(
+            {"user_id": user_id}, sort=[("created_at", DESCENDING), ("_id", DESCENDING)], limit=limit,
+            projection={"tweet_id": 1, "created_at": 1},
+        )
+
+    async def list_since_after(self, since: datetime, last_id: Optional[ObjectId], limit: int) -> List[Dict[str, Any]]:
+        """Likes postérieurs à `since`, par _id croissant après `last_id` (parcours complet par lots)"""
+        query: Dict[str, Any] = {"created_at": {"$gte": since}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        return await self.find_many(
+            query, sort=[("_id", ASCENDING)], limit=limit, projection={"user_id": 1, "tweet_id": 1, "created_at": 1}
+        )
+
+    async def page_by_user(self, user_id: str, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.find_page({"user_id": user_id}, cursor, limit)
+
+    async def list_for_tweets(self, tweet_ids: List[str], user_id: str) -> List[Dict[str, Any]]:
+        return await self.find_many({"tweet_id": {"$in": tweet_ids}, "user_id": user_id})
@@ -0,0 +1,28 @@
+from typing import Any, Dict, Optional
+from gridfs.errors import NoFile
+from app.repositories.base import to_object_id
+
+
+class MediaRepository:
+    """Fichiers médias stockés dans GridFS (bucket `media`)"""
+
+    def __init__(self, database, bucket):
+        self.files = database["media.files"]
+        self.bucket = bucket
+
+    async def put(self, contents: bytes, filename: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        file_id = await self.bucket.upload_from_stream(filename, contents, metadata=metadata or {})
+        return str(file_id)
+
+    async def exists(self, file_id: str) -> bool:
+        return await self.files.find_one({"_id": to_object_id(file_id)}, {"_id": 1}) is not None
+
+    async def open(self, file_id: str):
+        return await self.bucket.open_download_stream(to_object_id(file_id))
+
+    async def delete(self, file_id: str) -> bool:
+        try:
+            await self.bucket.delete(to_object_id(file_id))
+            return True
+        except NoFile:
+            return False
@@ -0,0 +1,286 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from app.repositories.base import DUPLICATE_KEY_ERROR, BaseRepository, to_object_id
+
+
+class NotificationRepository(BaseRepository):
+    collection_name = "notifications"
+
+    async def list_for_recipient(self, recipient_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self.find_many({"recipient_id": recipient_id}, sort=[("created_at", DESCENDING)], limit=limit)
+
+    async def insert_many_once(self, notifications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insère des notifications dont l'`_id` est fixé à l'avance ; celles déjà présentes
+        (tâche rejouée) sont ignorées. Renvoie les notifications réellement insérées.
+        """
+        try:
+            await self.insert_many(notifications)
+            return notifications
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in errors):
+                raise
+            # insert_many non ordonné : seuls les documents en erreur n'ont pas été écrits
+            duplicates = {error["index"] for error in errors}
+            return [notification for index, notification in enumerate(notifications) if index not in duplicates]
+
+    async def add_to_group(
+        self,
+        recipient_id: str,
+        notification_type: str,
+        tweet_id: Optional[str],
+        bucket: datetime,
+        actor: Dict[str, str],
+        fields: Dict[str, Any],
+        max_actors: int,
+    ) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """
+        Ajoute un acteur au groupe (destinataire, type, tweet, fenêtre) en un seul upsert.
+        Seuls les `max_actors` derniers acteurs sont gardés dans le document : c'est
+        `NotificationGroupMemberRepository.claim`, appelé avant, qui garantit qu'un
+        acteur n'est compté qu'une fois (rejeu, like/unlike/re-like). Le filtre
+        `actors.id` ne fait que couvrir la reprise d'un ajout interrompu.
+        Renvoie None si l'acteur figurait déjà dans le groupe (rien n'a changé), sinon le
+        groupe après mise à jour et True s'il devient non lu (créé, ou déjà lu puis
+        réactivé) : c'est alors une notification non lue de plus pour le destinataire.
+        """
+        now = datetime.utcnow()
+        key = {"recipient_id": recipient_id, "type": notification_type, "tweet_id": tweet_id, "bucket": bucket}
+        changes = {
+            **fields,
+            "sender_id": actor["id"],
+            "sender_username": actor["username"],
+            "read": False,
+            "created_at": now,
+        }
+        group_id = ObjectId()
+        try:
+            # État d'avant (pour savoir si le groupe était lu) ; celui d'après s'en déduit exactement
+            before = await self.collection.find_one_and_update(
+                {**key, "actors.id": {"$ne": actor["id"]}},
+                {
+                    "$set": changes,
+                    # Un groupe réactivé ne doit plus expirer comme une notification lue
+                    "$unset": {"read_at": ""},
+                    "$setOnInsert": {"_id": group_id, "first_at": now},
+                    "$push": {"actors": {"$each": [actor], "$position": 0, "$slice": max_actors}},
+                    "$inc": {"actor_count": 1},
+                },
+                upsert=True,
+                return_document=ReturnDocument.BEFORE,
+            )
+        except DuplicateKeyError:
+            return None
+        if before is None:
+            group: Dict[str, Any] = {"_id": group_id, **key, "first_at": now}
+        else:
+            group = {name: value for name, value in before.items() if name != "read_at"}
+        group.update(changes)
+        group["actors"] = [actor, *group.get("actors", [])][:max_actors]
+        group["actor_count"] = group.get("actor_count", 0) + 1
+        return group, before is None or before.get("read", False)
+
+    async def count_unread(self, recipient_id: str) -> int:
+        return await self.collection.count_documents({"recipient_id": recipient_id, "read": False})
+
+    async def count_unread_by_recipient(self, recipient_ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """{recipient_id: nombre de non-lues}, pour les destinataires donnés ou pour tous"""
+        match: Dict[str, Any] = {"read": False}
+        if recipient_ids is not None:
+            match["recipient_id"] = {"$in": recipient_ids}
+        rows = await self.aggregate([
+            {"$match": match},
+            {"$group": {"_id": "$recipient_id", "unread": {"$sum": 1}}},
+        ])
+        return {row["_id"]: row["unread"] for row in rows}
+
+    async def get_for_recipient(self, notification_id: str, recipient_id: str):
+        return await self.collection.find_one({"_id": to_object_id(notification_id), "recipient_id": recipient_id})
+
+    async def mark_read(self, notification_id: str) -> bool:
+        """Marque la notification comme lue ; renvoie False si elle l'était déjà"""
+        result = await self.collection.update_one(
+            {"_id": to_object_id(notification_id), "read": False}, {"$set": {"read": True, "read_at": datetime.utcnow()}}
+        )
+        return result.modified_count > 0
+
+    async def mark_all_read(self, recipient_id: str) -> int:
+        """Marque toutes les notifications comme lues ; renvoie le nombre de notifications modifiées"""
+        result = await self.collection.update_many(
+            {"recipient_id": recipient_id, "read": False}, {"$set": {"read": True, "read_at": datetime.utcnow()}}
+        )
+        return result.modified_count
+
+    async def backfill_read_at(self) -> int:
+        """
+        Date de lecture des notifications lues avant l'expiration TTL (date de création à
+        défaut) : sans `read_at`, l'index TTL ne les supprimerait jamais.
+        """
+        result = await self.collection.update_many(
+            {"read": True, "read_at": {"$exists": False}}, [{"$set": {"read_at": "$created_at"}}]
+        )
+        return result.modified_count
+
+    async def find_unread_before(self, cutoff: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Notifications non lues créées avant `cutoff`, les plus anciennes d'abord"""
+        return await self.find_many(
+            {"read": False, "created_at": {"$lt": cutoff}}, sort=[("created_at", 1)], limit=limit
+        )
+
+    async def delete_unread_before(self, notification_ids: List[ObjectId], cutoff: datetime) -> List[Dict[str, Any]]:
+        """
+        Supprime ces notifications si elles sont toujours non lues et antérieures à `cutoff`
+        (un groupe réactivé entre-temps reste en place) ; renvoie celles supprimées.
+        """
+        query = {"_id": {"$in": notification_ids}, "read": False, "created_at": {"$lt": cutoff}}
+        targets = await self.find_many(query, projection={"recipient_id": 1})
+        result = await self.collection.delete_many({**query, "_id": {"$in": [target["_id"] for target in targets]}})
+        if result.deleted_count == len(targets):
+            return targets
+        remaining = {document["_id"] for document in await self.find_many(
+            {"_id": {"$in": [target["_id"] for target in targets]}}, projection={"_id": 1}
+        )}
+        return [target for target in targets if target["_id"] not in remaining]
+
+    async def storage_stats(self) -> Dict[str, Any]:
+        return await collection_storage_stats(self.collection)
+
+
+async def collection_storage_stats(collection) -> Dict[str, Any]:
+    """Taille des données, du stockage et de chaque index d'une collection ($collStats)"""
+    try:
+        rows = await collection.aggregate([{"$collStats": {"storageStats": {}}}]).to_list(length=None)
+    except OperationFailure:
+        rows = []
+    if not rows:
+        # Collection absente (ou serveur sans $collStats)
+        return {"count": 0, "size": 0, "storage_size": 0, "total_index_size": 0, "index_sizes": {}}
+    stats = rows[0]["storageStats"]
+    return {
+        "count": stats.get("count", 0),
+        "size": stats.get("size", 0),
+        "storage_size": stats.get("storageSize", 0),
+        "total_index_size": stats.get("totalIndexSize", 0),
+        "index_sizes": stats.get("indexSizes", {}),
+    }
+
+
+class NotificationGroupMemberRepository(BaseRepository):
+    """
+    Acteurs déjà comptés dans chaque groupe de notifications, un document par
+    (destinataire, type, tweet, fenêtre, acteur) sous index unique. Le groupe ne
+    garde que ses derniers acteurs et ne suffit donc pas à écarter un rejeu.
+    """
+    collection_name = "notification_group_members"
+
+    async def claim(self, group: Dict[str, Any], actor_id: str) -> bool:
+        """
+        Enregistre l'acteur dans le groupe ; False s'il y figurait déjà et que son ajout
+        a été appliqué. Un ajout enregistré mais interrompu avant `mark_applied` est rejoué.
+        """
+        try:
+            await self.collection.insert_one({**group, "actor_id": actor_id, "applied": False})
+            return True
+        except DuplicateKeyError:
+            member = await self.collection.find_one({**group, "actor_id": actor_id}, {"applied": 1})
+            return member is not None and not member.get("applied", False)
+
+    async def mark_applied(self, group: Dict[str, Any], actor_id: str) -> None:
+        await self.collection.update_one({**group, "actor_id": actor_id}, {"$set": {"applied": True}})
+
+
+class NotificationArchiveRepository(BaseRepository):
+    """
+    Archive froide des notifications non lues trop anciennes. Forme compacte : ni
+    extraits de contenu ni liste d'acteurs, seulement de quoi retrouver l'événement.
+    """
+    collection_name = "notifications_archive"
+
+    ARCHIVED_FIELDS = ("recipient_id", "type", "sender_id", "tweet_id", "comment_id", "actor_count", "created_at")
+
+    async def archive_many(self, notifications: List[Dict[str, Any]]) -> int:
+        """Copie compacte des notifications (même `_id` : une archive rejouée ne duplique rien)"""
+        now = datetime.utcnow()
+        documents = [
+            {
+                "_id": notification["_id"],
+                **{field: notification[field] for field in self.ARCHIVED_FIELDS if notification.get(field) is not None},
+                "archived_at": now,
+            }
+            for notification in notifications
+        ]
+        try:
+            return len(await self.insert_many(documents))
+        except BulkWriteError as e:
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+            return e.details.get("nInserted", 0)
+
+    async def storage_stats(self) -> Dict[str, Any]:
+        return await collection_storage_stats(self.collection)
+
+
+class UnreadCounterRepository(BaseRepository):
+    """
+    Compteur de notifications non lues, un document par destinataire (`_id` = son id).
+    Les incréments ne créent jamais le document : il est initialisé à partir des
+    notifications à la première lecture, puis tenu à jour transition par transition.
+    """
+    collection_name = "notification_counters"
+
+    async def get(self, recipient_id: str) -> Optional[int]:
+        document = await self.collection.find_one({"_id": recipient_id}, {"unread": 1})
+        return document["unread"] if document else None
+
+    async def get_many(self, recipient_ids: List[str]) -> Dict[str, int]:
+        documents = await self.find_many({"_id": {"$in": recipient_ids}}, projection={"unread": 1})
+        return {document["_id"]: document["unread"] for document in documents}
+
+    async def add(self, recipient_id: str, delta: int) -> Optional[int]:
+        """Applique un delta et renvoie la nouvelle valeur (None si le compteur n'existe pas encore)"""
+        document = await self.collection.find_one_and_update(
+            {"_id": recipient_id},
+            {"$inc": {"unread": delta}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"unread": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        return document["unread"] if document else None
+
+    async def initialize(self, recipient_id: str, unread: int) -> int:
+        """Crée le compteur s'il n'existe pas encore ; renvoie la valeur en base"""
+        document = await self.collection.find_one_and_update(
+            {"_id": recipient_id},
+            {"$setOnInsert": {"unread": unread, "updated_at": datetime.utcnow()}},
+            projection={"unread": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return document["unread"]
+
+    async def add_many(self, deltas: Dict[str, int]) -> None:
+        """Applique {recipient_id: delta} en un seul bulk_write ; les compteurs absents sont ignorés"""
+        operations = [
+            UpdateOne({"_id": recipient_id}, {"$inc": {"unread": delta}, "$set": {"updated_at": datetime.utcnow()}})
+            for recipient_id, delta in deltas.items() if delta
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def set_many(self, counts: Dict[str, int]) -> None:
+        """Écrase {recipient_id: valeur} (réconciliation), en créant les compteurs manquants"""
+        operations = [
+            UpdateOne({"_id": recipient_id}, {"$set": {"unread": unread, "updated_at": datetime.utcnow()}}, upsert=True)
+            for recipient_id, unread in counts.items()
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def list_counters(self, after: Optional[str] = None, limit: int = 1000) -> Dict[str, int]:
+        """Compteurs existants par ordre d'`_id`, à partir de `after` exclu"""
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        documents = await self.find_many(query, sort=[("_id", 1)], limit=limit, projection={"unread": 1})
+        return {document["_id"]: document["unread"] for document in documents}
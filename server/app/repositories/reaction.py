@@ -0,0 +1,18 @@
+from typing import Any, Dict, List
+from app.repositories.base import BaseRepository, to_object_id
+
+
+class EmotionReactionRepository(BaseRepository):
+    collection_name = "emotion_reactions"
+
+    async def list_for_tweet(self, tweet_id: str) -> List[Dict[str, Any]]:
+        return await self.find_many({"tweet_id": to_object_id(tweet_id)})
+
+    async def replace_for_user(self, reaction: Dict[str, Any]) -> None:
+        """Remplace la réaction existante de l'utilisateur pour ce tweet"""
+        await self.collection.delete_many({"tweet_id": reaction["tweet_id"], "user_id": reaction["user_id"]})
+        await self.collection.insert_one(reaction)
+
+    async def delete_one_for_tweet(self, tweet_id: str) -> bool:
+        result = await self.collection.delete_one({"tweet_id": to_object_id(tweet_id)})
+        return result.deleted_count > 0
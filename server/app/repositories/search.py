@@ -0,0 +1,90 @@
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.repositories.base import DUPLICATE_KEY_ERROR, BaseRepository
+
+# Document des statistiques du corpus dans `search_terms` ('#' n'apparaît jamais dans un terme)
+CORPUS_STATS_ID = "#corpus"
+
+
+class SearchPostingRepository(BaseRepository):
+    """Index inversé : une entrée par (terme, tweet) avec sa fréquence et la longueur du tweet"""
+    collection_name = "search_postings"
+
+    async def add_document(
+        self, tweet_id: str, created_at: datetime, length: int, frequencies: Dict[str, int]
+    ) -> List[str]:
+        """
+        Ajoute les entrées du tweet (upserts idempotents sur (tweet_id, term)) ;
+        renvoie les termes qui n'étaient pas encore indexés pour ce tweet.
+        """
+        terms = list(frequencies)
+        if not terms:
+            return []
+        result = await self.collection.bulk_write([
+            UpdateOne(
+                {"tweet_id": tweet_id, "term": term},
+                {"$setOnInsert": {"tf": frequencies[term], "length": length, "created_at": created_at}},
+                upsert=True,
+            )
+            for term in terms
+        ], ordered=False)
+        return [terms[index] for index in result.upserted_ids]
+
+    async def list_recent(self, term: str, before: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Entrées les plus récentes d'un terme, antérieures à `before`"""
+        return await self.find_many(
+            {"term": term, "created_at": {"$lte": before}},
+            sort=[("created_at", DESCENDING)],
+            limit=limit,
+            projection={"_id": 0, "tweet_id": 1, "tf": 1, "length": 1, "created_at": 1},
+        )
+
+    async def insert_postings(self, postings: List[Dict[str, Any]]) -> None:
+        """Insertion en masse ; les entrées déjà écrites par la tâche d'indexation sont ignorées"""
+        try:
+            await self.insert_many(postings)
+        except BulkWriteError as e:
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+
+    async def clear(self) -> None:
+        await self.collection.delete_many({})
+
+
+class SearchTermRepository(BaseRepository):
+    """Fréquence documentaire de chaque terme et statistiques du corpus (nombre et longueur des tweets)"""
+    collection_name = "search_terms"
+
+    async def get_statistics(self, terms: List[str]) -> Tuple[Dict[str, int], int, int]:
+        """({terme: df}, nombre de tweets indexés, somme de leurs longueurs) en une requête"""
+        documents = await self.find_many({"_id": {"$in": [*terms, CORPUS_STATS_ID]}})
+        frequencies = {}
+        docs = total_length = 0
+        for document in documents:
+            if document["_id"] == CORPUS_STATS_ID:
+                docs, total_length = document.get("docs", 0), document.get("total_length", 0)
+            else:
+                frequencies[document["_id"]] = document.get("df", 0)
+        return frequencies, docs, total_length
+
+    async def add_document(self, new_terms: List[str], length: int, new_document: bool) -> None:
+        """Incrémente la df des termes nouvellement indexés et, pour un nouveau tweet, les statistiques du corpus"""
+        operations = [UpdateOne({"_id": term}, {"$inc": {"df": 1}}, upsert=True) for term in new_terms]
+        if new_document:
+            operations.append(UpdateOne(
+                {"_id": CORPUS_STATS_ID}, {"$inc": {"docs": 1, "total_length": length}}, upsert=True
+            ))
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def replace_all(self, frequencies: Dict[str, int], docs: int, total_length: int, batch_size: int = 1000) -> None:
+        """Remplace toutes les statistiques (reconstruction complète de l'index)"""
+        await self.collection.delete_many({})
+        items = list(frequencies.items())
+        for start in range(0, len(items), batch_size):
+            await self.collection.insert_many(
+                [{"_id": term, "df": df} for term, df in items[start:start + batch_size]], ordered=False
+            )
+        await self.collection.insert_one({"_id": CORPUS_STATS_ID, "docs": docs, "total_length": total_length})
@@ -0,0 +1,60 @@
+from typing import Any, Dict, List
+from pymongo import UpdateOne
+from app.repositories.base import BaseRepository
+
+
+class TimelineRepository(BaseRepository):
+    """Fils d'actualité matérialisés : un document par utilisateur, entrées bornées et triées"""
+    collection_name = "timelines"
+
+    async def get(self, owner_id: str, limit: int):
+        """Lecture ponctuelle du fil, limitée aux `limit` entrées les plus récentes"""
+        return await self.collection.find_one(
+            {"_id": owner_id}, {"entries": {"$slice": limit}, "built": 1, "merged_authors": 1}
+        )
+
+    async def push_entry(self, owner_ids: List[str], entry: Dict[str, Any], max_entries: int) -> None:
+        if not owner_ids:
+            return
+        update = {"$push": {"entries": {
+            "$each": [entry],
+            "$sort": {"created_at": -1},
+            "$slice": max_entries,
+        }}}
+        await self.collection.bulk_write(
+            [UpdateOne({"_id": owner_id}, update, upsert=True) for owner_id in owner_ids],
+            ordered=False
+        )
+
+    async def merge_entries(self, owner_id: str, entries: List[Dict[str, Any]], max_entries: int) -> None:
+        await self.collection.update_one(
+            {"_id": owner_id},
+            {"$push": {"entries": {"$each": entries, "$sort": {"created_at": -1}, "$slice": max_entries}}},
+            upsert=True
+        )
+
+    async def replace_entries(self, owner_id: str, entries: List[Dict[str, Any]], merged_authors: List[str]) -> None:
+        """Remplace le fil complet et les comptes fusionnés à la lecture, et le marque comme construit"""
+        await self.collection.update_one(
+            {"_id": owner_id},
+            {"$set": {"entries": entries, "merged_authors": merged_authors, "built": True}},
+            upsert=True,
+        )
+
+    async def add_merged_author(self, owner_ids: List[str], author_id: str) -> None:
+        """
+        Ajoute un compte fusionné à la lecture aux fils qui tiennent déjà cette liste ;
+        les autres la calculeront à leur (re)construction.
+        """
+        if not owner_ids:
+            return
+        await self.collection.bulk_write(
+            [UpdateOne({"_id": owner_id, "merged_authors": {"$exists": True}}, {"$addToSet": {"merged_authors": author_id}}) for owner_id in owner_ids],
+            ordered=False
+        )
+
+    async def remove_author(self, owner_id: str, author_id: str) -> None:
+        await self.collection.update_one(
+            {"_id": owner_id},
+            {"$pull": {"entries": {"author_id": author_id}, "merged_authors": author_id}},
+        )
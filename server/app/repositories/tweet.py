@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+from app.repositories.base import BaseRepository, to_object_id
+
+
+class TweetRepository(BaseRepository):
+    collection_name = "tweets"
+    buffered_counters = True
+
+    async def get_many_by_ids(
+        self, tweet_ids: Iterable[str], projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.find_many({"_id": {"$in": [to_object_id(tid) for tid in tweet_ids]}}, projection=projection)
+
+    async def page_recent(self, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.find_page({}, cursor, limit)
+
+    async def page_by_author_username(
+        self, username: str, cursor: Optional[str], limit: int, retweets_only: bool = False
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        query: Dict[str, Any] = {"author_username": username}
+        if retweets_only:
+            query["is_retweet"] = True
+        return await self.find_page(query, cursor, limit)
+
+    async def list_recent_by_authors(
+        self, author_ids: List[str], limit: int, before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"author_id": {"$in": author_ids}}
+        if before is not None:
+            query["created_at"] = {"$lt": before}
+        return await self.find_many(query, sort=[("created_at", DESCENDING)], limit=limit)
+
+    async def list_recent_by_tag(self, tag: str, since: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Tweets les plus récents portant `tag`, publiés depuis `since` (index tags, created_at)"""
+        return await self.find_many(
+            {"tags": tag, "created_at": {"$gte": since}}, sort=[("created_at", DESCENDING)], limit=limit
+        )
+
+    async def list_recent_by_author(self, author_id: str, since: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Tweets originaux les plus récents de `author_id`, publiés depuis `since` (index author_id, created_at)"""
+        return await self.find_many(
+            {"author_id": author_id, "created_at": {"$gte": since}, "is_retweet": {"$ne": True}},
+            sort=[("created_at", DESCENDING)], limit=limit,
+        )
+
+    async def list_popular(self, limit: int) -> List[Dict[str, Any]]:
+        return await self.find_many({}, sort=[("like_count", DESCENDING)], limit=limit)
+
+    async def list_originals_after(
+        self, last_id: Optional[ObjectId], limit: int, projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Tweets hors retweets par _id croissant, après `last_id` (parcours complet par lots)"""
+        query: Dict[str, Any] = {"is_retweet": {"$ne": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        return await self.find_many(query, sort=[("_id", ASCENDING)], limit=limit, projection=projection)
+
+    async def list_tagged_since(
+        self, since: datetime, after_id: Optional[ObjectId], limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Tweets avec tags par (created_at, _id) croissants, à partir de `since`
+        (strictement après `after_id` pour les documents datés de `since`)
+        """
+        if after_id is None:
+            position: Dict[str, Any] = {"created_at": {"$gte": since}}
+        else:
+            position = {"$or": [{"created_at": {"$gt": since}}, {"created_at": since, "_id": {"$gt": after_id}}]}
+        return await self.find_many(
+            {**position, "tags": {"$exists": True, "$ne": []}},
+            sort=[("created_at", ASCENDING), ("_id", ASCENDING)],
+            limit=limit,
+            projection={"tags": 1, "content": 1, "created_at": 1},
+        )
+
+    async def get_user_retweet(self, original_tweet_id: str, user_id: str):
+        return await self.collection.find_one({
+            "original_tweet_id": original_tweet_id,
+            "author_id": user_id,
+            "is_retweet": True
+        })
+
+    async def insert_retweet(self, retweet: Dict[str, Any]) -> Optional[str]:
+        """Insère le retweet ; None si l'utilisateur avait déjà retweeté ce tweet (index unique partiel)"""
+        try:
+            return await self.insert(retweet)
+        except DuplicateKeyError:
+            return None
+
+    async def delete_user_retweet(self, original_tweet_id: str, user_id: str) -> bool:
+        """Supprime le retweet de l'utilisateur ; False s'il n'existait pas"""
+        result = await self.collection.delete_one({
+            "original_tweet_id": original_tweet_id,
+            "author_id": user_id,
+            "is_retweet": True
+        })
+        return result.deleted_count > 0
+
+    async def list_user_retweets_of(self, original_tweet_ids: List[str], user_id: str) -> List[Dict[str, Any]]:
+        return await self.find_many({
+            "original_tweet_id": {"$in": original_tweet_ids},
+            "author_id": user_id,
+            "is_retweet": True
+        })
+
+    async def set_tags(self, tweet_id, tags: List[str]) -> None:
+        await self.collection.update_one({"_id": to_object_id(tweet_id)}, {"$set": {"tags": tags}})
@@ -0,0 +1,46 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING
+from app.repositories.base import BaseRepository, to_object_id
+
+
+class UserRepository(BaseRepository):
+    collection_name = "users"
+    buffered_counters = True
+
+    async def get_by_username(self, username: str):
+        return await self.find_one({"username": username})
+
+    async def get_by_email(self, email: str):
+        return await self.find_one({"email": email})
+
+    async def get_many_by_ids(
+        self, user_ids: Iterable[str], projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.find_many({"_id": {"$in": [to_object_id(uid) for uid in user_ids]}}, projection=projection)
+
+    async def get_many_by_usernames(
+        self, usernames: Iterable[str], projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self.find_many({"username": {"$in": list(usernames)}}, projection=projection)
+
+    async def filter_ids_with_min_followers(self, user_ids: Iterable[str], min_followers: int) -> List[str]:
+        users = await self.find_many(
+            {"_id": {"$in": [to_object_id(uid) for uid in user_ids]}, "followers_count": {"$gte": min_followers}},
+            projection={"_id": 1}
+        )
+        return [str(user["_id"]) for user in users]
+
+    async def search_by_prefix(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        return await self.find_many({"username": {"$regex": f"^{re.escape(query)}", "$options": "i"}}, limit=limit)
+
+    async def list_after(
+        self, last_id: Optional[ObjectId], limit: int, projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Utilisateurs par _id croissant, après `last_id` (parcours complet par lots)"""
+        query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+        return await self.find_many(query, sort=[("_id", ASCENDING)], limit=limit, projection=projection)
+
+    async def update_fields(self, user_id: str, updates: Dict[str, Any]) -> None:
+        await self.collection.update_one({"_id": to_object_id(user_id)}, {"$set": updates})
@@ -1,23 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Form, UploadFile, File, Query
 from fastapi.responses import Response
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta, datetime
-from typing import List
-from app.database import db, fs
-from app.models import UserCreate, User
+from typing import Dict, List, Optional
+from app.models import UserCreate, User, UserBatchRequest, FollowStatusRequest
 from app.models.follow import Follow
 from app.models.tweet import Tweet
 from app.models.token import Token
-from app.services.auth import authenticate_user, create_access_token, get_password_hash, get_current_user
-from app.config import ACCESS_TOKEN_EXPIRE_MINUTES
-from bson import ObjectId
+from app.services.auth import authenticate_user, create_access_token, get_password_hash, get_current_user, invalidate_principal
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from app.services import interactions
+from app.services.profiles import PUBLIC_PROFILE_PROJECTION, get_profile_by_username, invalidate_profile, to_public_profile
+from app.services.dataloader import RequestLoaders, get_loaders
+from app.services.username_index import username_index
+from app.config import ACCESS_TOKEN_EXPIRE_MINUTES, USERNAME_INDEX_TOP_K
+from app.repositories import (
+    user_repository,
+    tweet_repository,
+    like_repository,
+    follow_repository,
+    media_repository,
+)
 
 router = APIRouter(prefix="", tags=["Authentication"])
 
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,26 +43,27 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
 @router.post("/users", response_model=User)
 async def create_user(user: UserCreate):
-    if db.users.find_one({"username": user.username}):
+    if await user_repository.get_by_username(user.username):
         raise HTTPException(status_code=400, detail="Username already taken")
 
-    if db.users.find_one({"email": user.email}):
+    if await user_repository.get_by_email(user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     user_data = {
         "username": user.username,
         "email": user.email,
         "hashed_password": hashed_password,
         "created_at": datetime.utcnow()
     }
-    result = db.users.insert_one(user_data)
-    return User(id=str(result.inserted_id), **user_data)
+    user_id = await user_repository.insert(user_data)
+    username_index.add(user.username, user_id)
+    return User(id=user_id, **user_data)
 
 
 @router.get("/users/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_user)):
-    user_data = db.users.find_one({"_id": ObjectId(current_user.id)})
+    user_data = await user_repository.get_by_id(current_user.id)
     
     if not user_data:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
@@ -78,9 +89,16 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     return user_response
 
 @router.get("/users/{username}/tweets", response_model=List[Tweet])
-async def read_user_tweets(username: str):
+async def read_user_tweets(
+    username: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    page, next_cursor = await tweet_repository.page_by_author_username(username, cursor, limit)
+    set_next_cursor(response, next_cursor)
     tweets = []
-    for tweet in db.tweets.find({"author_username": username}).sort("created_at", -1):
+    for tweet in page:
         tweet["id"] = str(tweet["_id"])
         del tweet["_id"]
         tweets.append(Tweet(**tweet))
@@ -89,178 +107,97 @@ async def read_user_tweets(username: str):
 
 @router.post("/users/{username}/follow", response_model=Follow)
 async def follow_user(username: str, current_user: User = Depends(get_current_user)):
-    # Vérifier si l'utilisateur à suivre existe
-    user_to_follow = db.users.find_one({"username": username})
-    if not user_to_follow:
-        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
-    
-    # Convertir l'ID en string pour faciliter les comparaisons
-    user_to_follow_id = str(user_to_follow["_id"])
-    
-    # Vérifier que l'utilisateur ne tente pas de se suivre lui-même
-    if current_user.id == user_to_follow_id:
-        raise HTTPException(status_code=400, detail="Vous ne pouvez pas vous suivre vous-même")
-    
-    # Vérifier si déjà suivi
-    existing_follow = db.follows.find_one({
-        "follower_id": current_user.id,
-        "followed_id": user_to_follow_id
-    })
-    
-    if existing_follow:
-        raise HTTPException(status_code=400, detail="Vous suivez déjà cet utilisateur")
-    
-    # Créer la relation de suivi
-    follow_data = {
-        "follower_id": current_user.id,
-        "follower_username": current_user.username,
-        "followed_id": user_to_follow_id,
-        "followed_username": username,
-        "created_at": datetime.utcnow()
-    }
-    
-    result = db.follows.insert_one(follow_data)
-    follow_data["id"] = str(result.inserted_id)
-    
-    # Mettre à jour les compteurs de followers/following
-    db.users.update_one(
-        {"_id": ObjectId(user_to_follow_id)},
-        {"$inc": {"followers_count": 1}}
-    )
-    
-    db.users.update_one(
-        {"_id": ObjectId(current_user.id)},
-        {"$inc": {"following_count": 1}}
-    )
-    
-    # Créer une notification pour l'utilisateur suivi
-    notification_data = {
-        "recipient_id": user_to_follow_id,
-        "sender_id": current_user.id,
-        "sender_username": current_user.username,
-        "type": "follow",
-        "read": False,
-        "created_at": datetime.utcnow()
-    }
-    db.notifications.insert_one(notification_data)
-    
-    return Follow(**follow_data)
+    return Follow(**await interactions.follow_user(username, current_user))
 
 @router.delete("/users/{username}/unfollow", status_code=status.HTTP_204_NO_CONTENT)
 async def unfollow_user(username: str, current_user: User = Depends(get_current_user)):
-    # Vérifier si l'utilisateur à ne plus suivre existe
-    user_to_unfollow = db.users.find_one({"username": username})
-    if not user_to_unfollow:
-        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
-    
-    user_to_unfollow_id = str(user_to_unfollow["_id"])
-    
-    # Vérifier si la relation de suivi existe
-    follow = db.follows.find_one({
-        "follower_id": current_user.id,
-        "followed_id": user_to_unfollow_id
-    })
-    
-    if not follow:
-        raise HTTPException(status_code=404, detail="Vous ne suivez pas cet utilisateur")
-    
-    # Supprimer la relation de suivi
-    db.follows.delete_one({"_id": follow["_id"]})
-    
-    # Mettre à jour les compteurs
-    db.users.update_one(
-        {"_id": ObjectId(user_to_unfollow_id)},
-        {"$inc": {"followers_count": -1}}
-    )
-    
-    db.users.update_one(
-        {"_id": ObjectId(current_user.id)},
-        {"$inc": {"following_count": -1}}
-    )
-    
+    await interactions.unfollow_user(username, current_user)
     return None
 
 @router.get("/users/{username}/follow_status")
 async def check_follow_status(username: str, current_user: User = Depends(get_current_user)):
     # Vérifier si l'utilisateur existe
-    user = db.users.find_one({"username": username})
+    user = await user_repository.get_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     user_id = str(user["_id"])
     
     # Vérifier si l'utilisateur courant suit cet utilisateur
-    follow = db.follows.find_one({
-        "follower_id": current_user.id,
-        "followed_id": user_id
-    })
+    follow = await follow_repository.get(current_user.id, user_id)
     
     return {"following": follow is not None}
 
+@router.post("/users/follow_status", response_model=Dict[str, Dict[str, bool]])
+async def get_follow_statuses(
+    batch: FollowStatusRequest,
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
+    """
+    Pour chaque username : l'utilisateur courant le suit-il ? Un username
+    inconnu répond `following: false`. Une requête `$in` sur les profils, une
+    sur les relations.
+    """
+    if len(batch.usernames) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PAGE_SIZE} utilisateurs par requête")
+
+    usernames = list(dict.fromkeys(batch.usernames))
+    profiles = await loaders.users_by_username.load_many(usernames)
+    following = await loaders.follow_status(current_user.id).load_many(
+        profile["id"] for profile in profiles.values()
+    )
+    return {
+        username: {"following": username in profiles and following[profiles[username]["id"]]}
+        for username in usernames
+    }
+
 @router.get("/users/{username}/followers", response_model=List[User])
-async def get_user_followers(username: str):
+async def get_user_followers(
+    username: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
     # Vérifier si l'utilisateur existe
-    user = db.users.find_one({"username": username})
+    user = await user_repository.get_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     user_id = str(user["_id"])
     
-    # Récupérer les relations de suivi où cet utilisateur est suivi
-    follows = db.follows.find({"followed_id": user_id})
-    
-    # Récupérer les données des utilisateurs qui suivent
-    followers = []
-    for follow in follows:
-        follower = db.users.find_one({"_id": ObjectId(follow["follower_id"])})
-        if follower:
-            followers.append({
-                "id": str(follower["_id"]),
-                "username": follower["username"],
-                "email": follower["email"],
-                "bio": follower.get("bio"),
-                "profile_picture_url": follower.get("profile_picture_url"),
-                "followers_count": follower.get("followers_count", 0),
-                "following_count": follower.get("following_count", 0),
-                "created_at": follower["created_at"]
-            })
-    
-    return followers
+    # Récupérer une page des utilisateurs qui suivent cet utilisateur
+    # (une seule agrégation $lookup, les plus récents d'abord)
+    users, next_cursor = await follow_repository.page_followers(user_id, PUBLIC_PROFILE_PROJECTION, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    
+    return [to_public_profile(u) for u in users]
 
 @router.get("/users/{username}/following", response_model=List[User])
-async def get_user_following(username: str):
+async def get_user_following(
+    username: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
     # Vérifier si l'utilisateur existe
-    user = db.users.find_one({"username": username})
+    user = await user_repository.get_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     user_id = str(user["_id"])
     
-    # Récupérer les relations de suivi où cet utilisateur suit d'autres
-    follows = db.follows.find({"follower_id": user_id})
-    
-    # Récupérer les données des utilisateurs suivis
-    following = []
-    for follow in follows:
-        followed = db.users.find_one({"_id": ObjectId(follow["followed_id"])})
-        if followed:
-            following.append({
-                "id": str(followed["_id"]),
-                "username": followed["username"],
-                "email": followed["email"],
-                "bio": followed.get("bio"),
-                "profile_picture_url": followed.get("profile_picture_url"),
-                "followers_count": followed.get("followers_count", 0),
-                "following_count": followed.get("following_count", 0),
-                "created_at": followed["created_at"]
-            })
-    
-    return following
+    # Récupérer une page des utilisateurs suivis par cet utilisateur
+    # (une seule agrégation $lookup, les plus récents d'abord)
+    users, next_cursor = await follow_repository.page_following(user_id, PUBLIC_PROFILE_PROJECTION, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    
+    return [to_public_profile(u) for u in users]
 
 @router.get("/users/{username}/stats")
 async def get_user_stats(username: str):
     # Vérifier si l'utilisateur existe
-    user = db.users.find_one({"username": username})
+    user = await user_repository.get_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
@@ -270,33 +207,48 @@ async def get_user_stats(username: str):
     }
 
 @router.get("/users/{username}/liked-tweets", response_model=List[Tweet])
-async def get_user_liked_tweets(username: str):
+async def get_user_liked_tweets(
+    username: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
     # Vérifier si l'utilisateur existe
-    user = db.users.find_one({"username": username})
+    user = await user_repository.get_by_username(username)
     if not user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
     user_id = str(user["_id"])
     
-    # Récupérer tous les likes de l'utilisateur
-    likes = list(db.likes.find({"user_id": user_id}))
-    tweet_ids = [ObjectId(like["tweet_id"]) for like in likes]
+    # Récupérer une page de likes de l'utilisateur (du plus récent au plus ancien)
+    likes, next_cursor = await like_repository.page_by_user(user_id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    tweet_ids = [like["tweet_id"] for like in likes]
     
-    # Récupérer les tweets correspondants
+    # Récupérer les tweets correspondants, dans l'ordre des likes
     liked_tweets = []
     if tweet_ids:
-        for tweet in db.tweets.find({"_id": {"$in": tweet_ids}}).sort("created_at", -1):
-            tweet["id"] = str(tweet["_id"])
-            del tweet["_id"]
-            liked_tweets.append(Tweet(**tweet))
+        tweets_by_id = await loaders.tweets_by_id.load_many(tweet_ids)
+        for tweet_id in tweet_ids:
+            tweet = tweets_by_id.get(tweet_id)
+            if tweet:
+                liked_tweets.append(Tweet(id=tweet_id, **{k: v for k, v in tweet.items() if k != "_id"}))
     
     return liked_tweets
 
 @router.get("/users/{username}/retweeted-tweets", response_model=List[Tweet])
-async def get_user_retweeted_tweets(username: str):
+async def get_user_retweeted_tweets(
+    username: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
     # Récupérer les retweets (tweets où is_retweet est True et author_username est l'utilisateur)
+    page, next_cursor = await tweet_repository.page_by_author_username(username, cursor, limit, retweets_only=True)
+    set_next_cursor(response, next_cursor)
     retweeted_tweets = []
-    for tweet in db.tweets.find({"author_username": username, "is_retweet": True}).sort("created_at", -1):
+    for tweet in page:
         tweet["id"] = str(tweet["_id"])
         del tweet["_id"]
         retweeted_tweets.append(Tweet(**tweet))
@@ -304,16 +256,25 @@ async def get_user_retweeted_tweets(username: str):
     return retweeted_tweets
 
 @router.get("/users/search", response_model=List[User])
-async def search_users(query: str):
+async def search_users(
+    query: str,
+    limit: int = Query(5, ge=1, le=USERNAME_INDEX_TOP_K),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
     """
     Recherche des utilisateurs par nom d'utilisateur.
-    Utilisé pour l'autocomplétion des mentions (@username)
+    Utilisé pour l'autocomplétion des mentions (@username) : préfixe insensible à la
+    casse, comptes les plus suivis d'abord, résolu en mémoire (app/services/username_index.py)
     """
-    # Effectuer une recherche insensible à la casse
+    completions = username_index.complete(query, limit)
+    if completions is not None:
+        # Profils complets depuis le cache des profils (les comptes les plus suivis y sont chauds)
+        profiles = await loaders.users_by_id.load_many(completion.user_id for completion in completions)
+        return [profiles[completion.user_id] for completion in completions if completion.user_id in profiles]
+
+    # Index pas encore construit (démarrage) : préfixe échappé, insensible à la casse
     users = []
-    # Utiliser une expression régulière pour rechercher les noms d'utilisateur qui commencent par la requête
-    regex_pattern = f"^{query}"
-    for user in db.users.find({"username": {"$regex": regex_pattern, "$options": "i"}}).limit(5):
+    for user in await user_repository.search_by_prefix(query, limit=limit):
         users.append({
             "id": str(user["_id"]),
             "username": user["username"],
@@ -345,23 +306,21 @@ async def upload_profile_photo(
         # Si l'utilisateur a déjà une photo de profil, la supprimer
         if hasattr(current_user, 'profile_picture_id') and current_user.profile_picture_id:
             try:
-                fs.delete(ObjectId(current_user.profile_picture_id))
+                await media_repository.delete(current_user.profile_picture_id)
             except:
                 pass  # Ignorer les erreurs si l'ancien fichier n'existe pas
         
         # Stocker le fichier dans GridFS
-        file_id = fs.put(
+        file_id = await media_repository.put(
             contents, 
             filename=file.filename,
-            content_type=content_type,
-            metadata={"user_id": current_user.id, "type": "profile_picture"}
+            metadata={"user_id": current_user.id, "type": "profile_picture", "content_type": content_type}
         )
         
         # Mettre à jour le document utilisateur avec l'ID du fichier
-        db.users.update_one(
-            {"_id": ObjectId(current_user.id)},
-            {"$set": {"profile_picture_id": str(file_id)}}
-        )
+        await user_repository.update_fields(current_user.id, {"profile_picture_id": file_id})
+        invalidate_profile(current_user.id, current_user.username)
+        invalidate_principal(current_user.username)
         
         return {
             "success": True, 
@@ -392,23 +351,21 @@ async def upload_banner_photo(
         # Si l'utilisateur a déjà une bannière, la supprimer
         if hasattr(current_user, 'banner_picture_id') and current_user.banner_picture_id:
             try:
-                fs.delete(ObjectId(current_user.banner_picture_id))
+                await media_repository.delete(current_user.banner_picture_id)
             except:
                 pass  # Ignorer les erreurs si l'ancien fichier n'existe pas
         
         # Stocker le fichier dans GridFS
-        file_id = fs.put(
+        file_id = await media_repository.put(
             contents, 
             filename=file.filename,
-            content_type=content_type,
-            metadata={"user_id": current_user.id, "type": "banner_picture"}
+            metadata={"user_id": current_user.id, "type": "banner_picture", "content_type": content_type}
         )
         
         # Mettre à jour le document utilisateur avec l'ID du fichier
-        db.users.update_one(
-            {"_id": ObjectId(current_user.id)},
-            {"$set": {"banner_picture_id": str(file_id)}}
-        )
+        await user_repository.update_fields(current_user.id, {"banner_picture_id": file_id})
+        invalidate_profile(current_user.id, current_user.username)
+        invalidate_principal(current_user.username)
         
         return {
             "success": True, 
@@ -423,15 +380,15 @@ async def get_user_media(file_id: str):
     """Récupère un fichier média (photo de profil ou bannière) depuis GridFS"""
     try:
         # Vérifier si le fichier existe
-        if not fs.exists(ObjectId(file_id)):
+        if not await media_repository.exists(file_id):
             raise HTTPException(status_code=404, detail="Fichier non trouvé")
         
         # Récupérer le fichier et ses métadonnées
-        grid_out = fs.get(ObjectId(file_id))
-        content_type = grid_out.content_type
+        grid_out = await media_repository.open(file_id)
+        content_type = (grid_out.metadata or {}).get("content_type") or grid_out.content_type
         
         # Lire le contenu du fichier
-        contents = grid_out.read()
+        contents = await grid_out.read()
         
         # Retourner le fichier avec le bon type MIME
         return Response(content=contents, media_type=content_type)
@@ -455,13 +412,12 @@ async def update_user_profile(
     
     # Ne mettre à jour que si des modifications sont demandées
     if updates:
-        db.users.update_one(
-            {"_id": ObjectId(current_user.id)},
-            {"$set": updates}
-        )
+        await user_repository.update_fields(current_user.id, updates)
+        invalidate_profile(current_user.id, current_user.username)
+        invalidate_principal(current_user.username)
     
     # Récupérer les informations mises à jour
-    updated_user = db.users.find_one({"_id": ObjectId(current_user.id)})
+    updated_user = await user_repository.get_by_id(current_user.id)
     if not updated_user:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
@@ -491,27 +447,29 @@ async def update_user_profile(
 @router.get("/users/by-username/{username}", response_model=User)
 async def get_user_by_username(username: str):
     """Récupère les informations d'un utilisateur par son nom d'utilisateur"""
-    user_data = db.users.find_one({"username": username})
+    user_response = await get_profile_by_username(username)
     
-    if not user_data:
+    if not user_response:
         raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
     
-    # Construire l'objet de réponse
-    user_response = {
-        "id": str(user_data["_id"]),
-        "username": user_data["username"],
-        "email": user_data["email"],
-        "created_at": user_data["created_at"],
-        "followers_count": user_data.get("followers_count", 0),
-        "following_count": user_data.get("following_count", 0),
-        "bio": user_data.get("bio", None)
-    }
-    
-    # Ajouter les IDs des photos s'ils existent
-    if "profile_picture_id" in user_data:
-        user_response["profile_picture_id"] = user_data["profile_picture_id"]
-    
-    if "banner_picture_id" in user_data:
-        user_response["banner_picture_id"] = user_data["banner_picture_id"]
-    
-    return user_response
\ No newline at end of file
+    return user_response
+
+@router.post("/users/batch", response_model=List[User])
+async def get_users_batch(
+    batch: UserBatchRequest,
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
+    """
+    Récupère plusieurs profils en un seul appel (par ids et/ou usernames).
+    Permet au client d'hydrater tous les avatars d'une page en une requête.
+    Réservé aux utilisateurs connectés : les profils renvoyés contiennent l'email.
+    """
+    if len(batch.ids) + len(batch.usernames) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PAGE_SIZE} utilisateurs par requête")
+
+    profiles = dict(await loaders.users_by_id.load_many(batch.ids))
+    for profile in (await loaders.users_by_username.load_many(batch.usernames)).values():
+        profiles[profile["id"]] = profile
+
+    return list(profiles.values())
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
 from fastapi.responses import StreamingResponse
-from bson import ObjectId
-from app.database import db, fs
+from app.repositories import media_repository
 from app.models.tweet import TweetCreate, Tweet
 from app.models.user import User
 from app.services.auth import get_current_user
@@ -52,11 +51,11 @@ async def upload_media(
         "upload_date": datetime.utcnow()
     }
     
-    stored_id = fs.put(contents, filename=file_id, metadata=metadata)
+    stored_id = await media_repository.put(contents, filename=file_id, metadata=metadata)
     
     # Retourner l'ID du fichier stocké et les métadonnées
     return {
-        "media_id": str(stored_id),
+        "media_id": stored_id,
         "media_type": media_type
     }
 
@@ -64,16 +63,16 @@ async def upload_media(
 async def get_media(media_id: str):
     try:
         # Chercher le fichier dans GridFS
-        file_obj = fs.get(ObjectId(media_id))
+        file_obj = await media_repository.open(media_id)
         
         # Définir le type de contenu
         content_type = file_obj.metadata.get("content_type", "application/octet-stream")
         
         # Créer un générateur pour les données du fichier
-        def file_iterator():
+        async def file_iterator():
             chunk_size = 1024 * 1024  # 1 MB chunks
             while True:
-                chunk = file_obj.read(chunk_size)
+                chunk = await file_obj.read(chunk_size)
                 if not chunk:
                     break
                 yield chunk
@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+from app.services.auth import principal_cache_stats
+from app.services.profiles import cache_stats as profile_cache_stats
+from app.services.passwords import hashing_stats
+from app.services.hashtag import cache_stats as hashtag_cache_stats
+from app.services.counters import counter_buffer
+from app.services.jobs import queue_stats
+from app.services.notification_stream import notification_hub
+from app.services.username_index import username_index
+from app.services.trends import trend_engine
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Compteurs internes (caches) pour le suivi du service"""
+    return {
+        "principal_cache": principal_cache_stats(),
+        "profile_cache": profile_cache_stats(),
+        "hashtag_cache": hashtag_cache_stats(),
+        "password_hashing": hashing_stats(),
+        "counter_buffer": counter_buffer.stats(),
+        "job_queue": await queue_stats(),
+        "notification_stream": notification_hub.stats(),
+        "username_index": username_index.stats(),
+        "trends": trend_engine.stats(),
+    }
@@ -1,15 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from bson import ObjectId
-from app.database import db, fs
-from app.models.tweet import TweetCreate, Tweet
+from app.repositories import (
+    tweet_repository,
+    like_repository,
+    comment_repository,
+    bookmark_repository,
+    notification_repository,
+    emotion_reaction_repository,
+    media_repository,
+)
+from app.models.tweet import TweetCreate, Tweet, TweetStatus, TweetStatusRequest
 from app.models.comment import Comment, CommentCreate
 from app.models.like import Like
 from app.models.user import User
 from app.models.notification import Notification
-from app.services.auth import get_current_user
-from datetime import datetime, timedelta
+from app.services.auth import get_current_user, get_stream_user
+from app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, set_next_cursor
+from app.services.timeline import fan_out_job, read_home_timeline
+from app.services.profiles import to_author_info
+from app.services.dataloader import RequestLoaders, get_loaders
+from app.services import interactions, recommendations, search
+from datetime import datetime
+import asyncio
 import base64
 import cv2
 import numpy as np
@@ -17,9 +32,25 @@ from fer import FER
 import uuid
 import shutil
 from pathlib import Path
-import re
 
-from app.services.hashtag import create_or_get_hashtag, attach_hashtag_to_tweet, get_tweet_hashtags
+from app.services.hashtag import hashtags_job, normalize_tags
+from app.services.jobs import enqueue_many
+from app.services.notifications import (
+    excerpt,
+    group_notification_job,
+    mark_all_notifications_read,
+    mark_notification_read,
+    mentions_job,
+    unread_count,
+)
+from app.services.notification_stream import notification_hub
+from app.services.trends import trend_engine
+from app.config import (
+    TRENDS_DEFAULT_WINDOW_MINUTES,
+    TRENDS_MAX_WINDOW_MINUTES,
+    TRENDS_READY_TIMEOUT_SECONDS,
+    TRENDS_SNAPSHOT_SIZE,
+)
 
 router = APIRouter()
 
@@ -67,17 +98,12 @@ async def save_media_file(file: UploadFile) -> Optional[str]:
     return f"/media/{media_type}/{filename}"
 
 
-def extract_mentions(content: str) -> list:
-    """
-    Extrait les mentions (@username) du contenu d'un tweet
-    """
-    # Pattern pour capturer les mentions: un @ suivi d'un nom d'utilisateur (lettres, chiffres, underscore)
-    mentions_pattern = r'@(\w+)'
-    return re.findall(mentions_pattern, content)
-
-
 @router.post("/tweets", response_model=Tweet)
-async def create_tweet(tweet: TweetCreate, current_user=Depends(get_current_user), hashtags=None):
+async def create_tweet(
+        tweet: TweetCreate,
+        current_user=Depends(get_current_user),
+        hashtags=None
+):
     print(f"📥 Tags reçus dans le backend : {tweet.tags}")
     tweet_data = {
         "author_id": current_user.id,
@@ -90,38 +116,21 @@ async def create_tweet(tweet: TweetCreate, current_user=Depends(get_current_user
         "is_retweet": False,
         "tags": tweet.tags
     }
-    result = db.tweets.insert_one(tweet_data)
-    tweet_id = str(result.inserted_id)
-    saved_hashtags = []
-    hashtags = hashtags or []
-    for tag in hashtags:
-        hashtag = create_or_get_hashtag(tag)
-        attach_hashtag_to_tweet(tweet_id, hashtag.id)
-        saved_hashtags.append(hashtag.tag)
+    tweet_id = await tweet_repository.insert(tweet_data)
+    saved_hashtags = normalize_tags(hashtags or [])
+
+    # Diffusion, hashtags et mentions : tâches de fond programmées en une écriture
+    await enqueue_many([
+        fan_out_job({**tweet_data, "_id": tweet_id}),
+        hashtags_job(tweet_id, saved_hashtags),
+        mentions_job(tweet_id, tweet.content, current_user.id, current_user.username),
+        search.search_index_job(tweet_id, tweet_data),
+    ])
     tweet_data["tags"] = saved_hashtags
     print(f"[LOG] Tweet créé avec ID {tweet_id} et tags: {saved_hashtags}")
 
     tweet_data["id"] = tweet_id
 
-    # Extraire et traiter les mentions
-    mentions = extract_mentions(tweet.content)
-    for username in mentions:
-        # Vérifier si l'utilisateur mentionné existe
-        mentioned_user = db.users.find_one({"username": username})
-        if mentioned_user and str(mentioned_user["_id"]) != current_user.id:  # Ne pas notifier l'auteur du tweet
-            # Créer une notification pour l'utilisateur mentionné
-            notification_data = {
-                "recipient_id": str(mentioned_user["_id"]),
-                "sender_id": current_user.id,
-                "sender_username": current_user.username,
-                "type": "mention",
-                "tweet_id": tweet_id,
-                "tweet_content": tweet.content[:50] + ("..." if len(tweet.content) > 50 else ""),
-                "read": False,
-                "created_at": datetime.utcnow()
-            }
-            db.notifications.insert_one(notification_data)
-
     return Tweet(**tweet_data)
 
 
@@ -133,11 +142,12 @@ async def create_tweet_with_media(
         hashtags: Optional[str] = Form(None),
         current_user: User = Depends(get_current_user)
 ):
-    extracted_tags = hashtags.split(",") if hashtags else []
+    # Hashtags normalisés (espaces supprimés) dès l'écriture du tweet
+    saved_hashtags = normalize_tags(hashtags.split(",") if hashtags else [])
     # Vérifier si le média existe si un media_id est fourni
     if media_id:
         try:
-            file_exists = fs.exists(ObjectId(media_id))
+            file_exists = await media_repository.exists(media_id)
             if not file_exists:
                 raise HTTPException(status_code=404, detail="Média non trouvé")
         except:
@@ -155,49 +165,34 @@ async def create_tweet_with_media(
         "comment_count": 0,
         "retweet_count": 0,
         "is_retweet": False,
+        "tags": saved_hashtags,
     }
 
-    result = db.tweets.insert_one(tweet_data)
-    tweet_id = str(result.inserted_id)
+    tweet_id = await tweet_repository.insert(tweet_data)
     tweet_data["id"] = tweet_id
 
-    # Extraire les Hashtag
-    saved_hashtags = []
-    for tag in extracted_tags:
-        hashtag = create_or_get_hashtag(tag.strip())  # Supprimer espaces potentiels
-        attach_hashtag_to_tweet(tweet_id, hashtag.id)
-        saved_hashtags.append(hashtag.tag)
-
-    db.tweets.update_one({"_id": result.inserted_id}, {"$set": {"tags": saved_hashtags}})
-    tweet_data["tags"] = saved_hashtags
+    # Diffusion, hashtags et mentions : tâches de fond programmées en une écriture
+    await enqueue_many([
+        fan_out_job({**tweet_data, "_id": tweet_id}),
+        hashtags_job(tweet_id, saved_hashtags),
+        mentions_job(tweet_id, content, current_user.id, current_user.username),
+        search.search_index_job(tweet_id, tweet_data),
+    ])
     print(f"[LOG] Tweet avec média créé avec ID {tweet_id} et tags: {saved_hashtags}")
 
-    # Extraire et traiter les mentions
-    mentions = extract_mentions(content)
-    for username in mentions:
-        # Vérifier si l'utilisateur mentionné existe
-        mentioned_user = db.users.find_one({"username": username})
-        if mentioned_user and str(mentioned_user["_id"]) != current_user.id:  # Ne pas notifier l'auteur du tweet
-            # Créer une notification pour l'utilisateur mentionné
-            notification_data = {
-                "recipient_id": str(mentioned_user["_id"]),
-                "sender_id": current_user.id,
-                "sender_username": current_user.username,
-                "type": "mention",
-                "tweet_id": tweet_id,
-                "tweet_content": content[:50] + ("..." if len(content) > 50 else ""),
-                "read": False,
-                "created_at": datetime.utcnow()
-            }
-            db.notifications.insert_one(notification_data)
-
     return Tweet(**tweet_data)
 
 
 @router.get("/tweets", response_model=List[Tweet])
-async def read_tweets():
+async def read_tweets(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    page, next_cursor = await tweet_repository.page_recent(cursor, limit)
+    set_next_cursor(response, next_cursor)
     tweets = []
-    for tweet in db.tweets.find().sort("created_at", -1).limit(50):
+    for tweet in page:
         tweet["id"] = str(tweet["_id"])
         tweet["tags"] = tweet.get("tags", [])  # Ajoute les tags si absents
         del tweet["_id"]
@@ -207,23 +202,17 @@ async def read_tweets():
 
 
 @router.get("/tweets/{searchword}/search", response_model=List[Tweet])
-async def search_tweets(searchword: str, skip: int = 0, limit: int = 10):
-    # Create a case-insensitive regex pattern for the search word
-    regex_pattern = f".*{searchword}.*"
-    regex_options = "i"  # Case-insensitive
-
-    # Query to search across content, author_username, and tags
-    query = {
-        "$or": [
-            {"content": {"$regex": regex_pattern, "$options": regex_options}},
-            {"author_username": {"$regex": regex_pattern, "$options": regex_options}},
-            {"tags": {"$regex": regex_pattern, "$options": regex_options}}
-        ]
-    }
-
-    # Fetch tweets matching the query
+async def search_tweets(
+    searchword: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE)
+):
+    # Index inversé et classement BM25 + fraîcheur (voir app/services/search.py)
+    page, next_cursor = await search.search_tweets(searchword, cursor, limit)
+    set_next_cursor(response, next_cursor)
     tweets = []
-    for tweet in db.tweets.find(query).sort("created_at", -1).skip(skip).limit(limit):
+    for tweet in page:
         # Convert MongoDB ObjectId to string and add it as "id"
         tweet["id"] = str(tweet["_id"])
         # Ensure the "tags" field exists, defaulting to an empty list if absent
@@ -241,17 +230,41 @@ async def search_tweets(searchword: str, skip: int = 0, limit: int = 10):
 
 @router.get("/tweets/{tweet_id}/like_status")
 async def check_like_status(tweet_id: str, current_user: User = Depends(get_current_user)):
-    like = db.likes.find_one({
-        "tweet_id": tweet_id,
-        "user_id": current_user.id
-    })
+    like = await like_repository.get(tweet_id, current_user.id)
     return {"liked": like is not None}
 
 
+@router.post("/tweets/status", response_model=Dict[str, TweetStatus])
+async def get_tweets_status(
+    batch: TweetStatusRequest,
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders),
+):
+    """
+    États like/retweet/favori de l'utilisateur courant pour plusieurs tweets :
+    une requête `$in` par relation au lieu de trois appels par carte.
+    """
+    if len(batch.tweet_ids) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_PAGE_SIZE} tweets par requête")
+
+    tweet_ids = list(dict.fromkeys(batch.tweet_ids))
+    liked, retweeted, bookmarked = await asyncio.gather(
+        loaders.like_status(current_user.id).load_many(tweet_ids),
+        loaders.retweet_status(current_user.id).load_many(tweet_ids),
+        loaders.bookmark_status(current_user.id).load_many(tweet_ids),
+    )
+    return {
+        tweet_id: TweetStatus(
+            liked=liked[tweet_id], retweeted=retweeted[tweet_id], bookmarked=bookmarked[tweet_id]
+        )
+        for tweet_id in tweet_ids
+    }
+
+
 @router.post("/comments", response_model=Comment)
 async def create_comment(comment: CommentCreate, current_user: User = Depends(get_current_user)):
     # Vérifier si le tweet existe
-    tweet = db.tweets.find_one({"_id": ObjectId(comment.tweet_id)})
+    tweet = await tweet_repository.get_by_id(comment.tweet_id)
     if not tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
@@ -263,39 +276,35 @@ async def create_comment(comment: CommentCreate, current_user: User = Depends(ge
         "created_at": datetime.utcnow()
     }
 
-    result = db.comments.insert_one(comment_data)
-    comment_id = str(result.inserted_id)
+    comment_id = await comment_repository.insert(comment_data)
     comment_data["id"] = comment_id
 
     # Mettre à jour le compteur de commentaires dans le tweet
-    db.tweets.update_one(
-        {"_id": ObjectId(comment.tweet_id)},
-        {"$inc": {"comment_count": 1}}
-    )
+    await tweet_repository.increment(comment.tweet_id, "comment_count", 1)
 
     # Créer une notification (sauf si l'utilisateur commente son propre tweet)
     if tweet["author_id"] != current_user.id:
-        notification_data = {
-            "recipient_id": tweet["author_id"],
-            "sender_id": current_user.id,
-            "sender_username": current_user.username,
-            "type": "comment",
-            "tweet_id": comment.tweet_id,
-            "tweet_content": tweet["content"][:50] + ("..." if len(tweet["content"]) > 50 else ""),
-            "comment_id": comment_id,
-            "comment_content": comment.content[:50] + ("..." if len(comment.content) > 50 else ""),
-            "read": False,
-            "created_at": datetime.utcnow()
-        }
-        db.notifications.insert_one(notification_data)
+        await enqueue_many([group_notification_job(
+            tweet["author_id"], "comment", current_user.id, current_user.username, comment.tweet_id,
+            tweet_content=excerpt(tweet["content"]),
+            comment_id=comment_id,
+            comment_content=excerpt(comment.content),
+        )])
 
     return Comment(**comment_data)
 
 
 @router.get("/tweets/{tweet_id}/comments", response_model=List[Comment])
-async def get_tweet_comments(tweet_id: str):
+async def get_tweet_comments(
+    tweet_id: str,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    page, next_cursor = await comment_repository.page_for_tweet(tweet_id, cursor, limit)
+    set_next_cursor(response, next_cursor)
     comments = []
-    for comment in db.comments.find({"tweet_id": tweet_id}).sort("created_at", -1):
+    for comment in page:
         comment["id"] = str(comment["_id"])
         del comment["_id"]
         comments.append(Comment(**comment))
@@ -304,57 +313,13 @@ async def get_tweet_comments(tweet_id: str):
 
 @router.post("/tweets/{tweet_id}/like", response_model=Like)
 async def like_tweet(tweet_id: str, current_user: User = Depends(get_current_user)):
-    # Vérifier si le tweet existe
-    tweet = db.tweets.find_one({"_id": ObjectId(tweet_id)})
-    if not tweet:
-        raise HTTPException(status_code=404, detail="Tweet not found")
-
-    # Vérifier si l'utilisateur a déjà liké ce tweet
-    existing_like = db.likes.find_one({
-        "tweet_id": tweet_id,
-        "user_id": current_user.id
-    })
-
-    if existing_like:
-        raise HTTPException(status_code=400, detail="Tweet already liked")
-
-    like_data = {
-        "tweet_id": tweet_id,
-        "user_id": current_user.id,
-        "username": current_user.username,
-        "created_at": datetime.utcnow()
-    }
-
-    result = db.likes.insert_one(like_data)
-    like_data["id"] = str(result.inserted_id)
-
-    # Mettre à jour le compteur de likes dans le tweet
-    db.tweets.update_one(
-        {"_id": ObjectId(tweet_id)},
-        {"$inc": {"like_count": 1}}
-    )
-
-    # Créer une notification (sauf si l'utilisateur like son propre tweet)
-    if tweet["author_id"] != current_user.id:
-        notification_data = {
-            "recipient_id": tweet["author_id"],
-            "sender_id": current_user.id,
-            "sender_username": current_user.username,
-            "type": "like",
-            "tweet_id": tweet_id,
-            "tweet_content": tweet["content"][:50] + ("..." if len(tweet["content"]) > 50 else ""),
-            "read": False,
-            "created_at": datetime.utcnow()
-        }
-        db.notifications.insert_one(notification_data)
-
-    return Like(**like_data)
+    return Like(**await interactions.like_tweet(tweet_id, current_user))
 
 
 @router.get("/notifications", response_model=List[Notification])
 async def get_notifications(current_user: User = Depends(get_current_user)):
     notifications = []
-    for notification in db.notifications.find({"recipient_id": current_user.id}).sort("created_at", -1).limit(50):
+    for notification in await notification_repository.list_for_recipient(current_user.id, limit=50):
         notification["id"] = str(notification["_id"])
         del notification["_id"]
 
@@ -384,19 +349,33 @@ async def get_notifications(current_user: User = Depends(get_current_user)):
 
 @router.get("/notifications/count", response_model=dict)
 async def get_unread_notifications_count(current_user: User = Depends(get_current_user)):
-    count = db.notifications.count_documents({
-        "recipient_id": current_user.id,
-        "read": False
-    })
+    count = await unread_count(current_user.id)
     return {"count": count}
 
 
+@router.get("/notifications/stream")
+async def stream_notifications(
+    current_user: User = Depends(get_stream_user),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Flux Server-Sent Events des notifications : `notification` à chaque nouvelle
+    notification, `unread_count` à chaque changement du compteur (et à l'ouverture).
+    """
+    async def initial():
+        return [("unread_count", {"count": await unread_count(current_user.id)})]
+
+    return StreamingResponse(
+        notification_hub.stream(current_user.id, last_event_id, initial),
+        media_type="text/event-stream",
+        # Pas de mise en tampon par un proxy (nginx) : chaque événement part aussitôt
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.put("/notifications/read-all")
 async def mark_all_notifications_as_read(current_user: User = Depends(get_current_user)):
-    db.notifications.update_many(
-        {"recipient_id": current_user.id, "read": False},
-        {"$set": {"read": True}}
-    )
+    await mark_all_notifications_read(current_user.id)
 
     return {"success": True}
 
@@ -404,48 +383,20 @@ async def mark_all_notifications_as_read(current_user: User = Depends(get_curren
 @router.put("/notifications/{notification_id}/read")
 async def mark_notification_as_read(notification_id: str, current_user: User = Depends(get_current_user)):
     # Vérifier si la notification existe et appartient à l'utilisateur actuel
-    notification = db.notifications.find_one({
-        "_id": ObjectId(notification_id),
-        "recipient_id": current_user.id
-    })
+    notification = await notification_repository.get_for_recipient(notification_id, current_user.id)
 
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
 
-    # Marquer comme lu
-    db.notifications.update_one(
-        {"_id": ObjectId(notification_id)},
-        {"$set": {"read": True}}
-    )
+    # Marquer comme lu (et décrémenter le compteur si elle ne l'était pas déjà)
+    await mark_notification_read(notification_id, current_user.id)
 
     return {"success": True}
 
 
 @router.delete("/tweets/{tweet_id}/unlike", status_code=status.HTTP_204_NO_CONTENT)
 async def unlike_tweet(tweet_id: str, current_user: User = Depends(get_current_user)):
-    # Vérifier si le tweet existe
-    tweet = db.tweets.find_one({"_id": ObjectId(tweet_id)})
-    if not tweet:
-        raise HTTPException(status_code=404, detail="Tweet not found")
-
-    # Vérifier si l'utilisateur a liké ce tweet
-    like = db.likes.find_one({
-        "tweet_id": tweet_id,
-        "user_id": current_user.id
-    })
-
-    if not like:
-        raise HTTPException(status_code=404, detail="Like not found")
-
-    # Supprimer le like
-    db.likes.delete_one({"_id": like["_id"]})
-
-    # Mettre à jour le compteur de likes dans le tweet
-    db.tweets.update_one(
-        {"_id": ObjectId(tweet_id)},
-        {"$inc": {"like_count": -1}}
-    )
-
+    await interactions.unlike_tweet(tweet_id, current_user)
     return None
 
 
@@ -571,14 +522,8 @@ async def create_emotion_reaction(tweet_id: str, data: EmotionReactionCreate):
             "created_at": datetime.now()
         }
 
-        # Supprimer toute réaction existante de cet utilisateur pour ce tweet
-        db.emotion_reactions.delete_many({
-            "tweet_id": ObjectId(tweet_id),
-            "user_id": data.user_id
-        })
-
-        # Insérer la nouvelle réaction en base de données
-        db.emotion_reactions.insert_one(reaction_data)
+        # Remplacer toute réaction existante de cet utilisateur pour ce tweet
+        await emotion_reaction_repository.replace_for_user(reaction_data)
 
         response_data = {
             "id": str(reaction_data["_id"]),
@@ -599,7 +544,7 @@ async def create_emotion_reaction(tweet_id: str, data: EmotionReactionCreate):
 async def get_tweet_reactions(tweet_id: str):
     try:
         # Récupérer les réactions depuis la base de données
-        reactions = list(db.emotion_reactions.find({"tweet_id": ObjectId(tweet_id)}))
+        reactions = await emotion_reaction_repository.list_for_tweet(tweet_id)
 
         # Convertir les objets MongoDB en format compatible avec Pydantic
         result = []
@@ -622,7 +567,7 @@ async def get_tweet_reactions(tweet_id: str):
 async def get_tweet_reactions_summary(tweet_id: str):
     try:
         # Récupérer les réactions depuis la base de données
-        reactions = list(db.emotion_reactions.find({"tweet_id": ObjectId(tweet_id)}))
+        reactions = await emotion_reaction_repository.list_for_tweet(tweet_id)
 
         # Compter le nombre de chaque émotion
         summary = {}
@@ -645,11 +590,9 @@ async def get_tweet_reactions_summary(tweet_id: str):
 @router.delete("/api/tweets/{tweet_id}/reactions/{user_id}", status_code=204)
 async def delete_emotion_reaction(tweet_id: str):
     try:
-        result = db.emotion_reactions.delete_one({
-            "tweet_id": ObjectId(tweet_id)
-        })
+        deleted = await emotion_reaction_repository.delete_one_for_tweet(tweet_id)
 
-        if result.deleted_count == 0:
+        if not deleted:
             raise HTTPException(status_code=404, detail="Réaction non trouvée")
 
         return None
@@ -659,132 +602,55 @@ async def delete_emotion_reaction(tweet_id: str):
 
 @router.post("/tweets/{tweet_id}/retweet", response_model=Tweet)
 async def retweet_tweet(tweet_id: str, current_user: User = Depends(get_current_user)):
-    # Vérifier si le tweet existe
-    original_tweet = db.tweets.find_one({"_id": ObjectId(tweet_id)})
-    if not original_tweet:
-        raise HTTPException(status_code=404, detail="Tweet not found")
-
-    # Vérifier si l'utilisateur a déjà retweeté ce tweet
-    existing_retweet = db.tweets.find_one({
-        "original_tweet_id": tweet_id,
-        "author_id": current_user.id,
-        "is_retweet": True
-    })
-
-    if existing_retweet:
-        raise HTTPException(status_code=400, detail="Tweet already retweeted")
-
-    # Créer un retweet
-    retweet_data = {
-        "author_id": current_user.id,
-        "author_username": current_user.username,
-        "content": original_tweet["content"],
-        "media_url": original_tweet.get("media_url"),
-        "is_retweet": True,
-        "original_tweet_id": tweet_id,
-        "original_author_username": original_tweet["author_username"],
-        "created_at": datetime.utcnow(),
-        "like_count": 0,
-        "comment_count": 0,
-        "retweet_count": 0
-    }
-
-    result = db.tweets.insert_one(retweet_data)
-
-    # Mettre à jour le compteur de retweets du tweet original
-    db.tweets.update_one(
-        {"_id": ObjectId(tweet_id)},
-        {"$inc": {"retweet_count": 1}}
-    )
-
-    # Créer une notification (sauf si l'utilisateur retweete son propre tweet)
-    if original_tweet["author_id"] != current_user.id:
-        notification_data = {
-            "recipient_id": original_tweet["author_id"],
-            "sender_id": current_user.id,
-            "sender_username": current_user.username,
-            "type": "retweet",
-            "tweet_id": tweet_id,
-            "tweet_content": original_tweet["content"][:50] + ("..." if len(original_tweet["content"]) > 50 else ""),
-            "read": False,
-            "created_at": datetime.utcnow()
-        }
-        db.notifications.insert_one(notification_data)
-
-    # Préparer les données pour le retour avec l'ID
-    response_data = {**retweet_data, "id": str(result.inserted_id)}
-    return Tweet(**response_data)
+    return Tweet(**await interactions.retweet_tweet(tweet_id, current_user))
 
 
 @router.delete("/tweets/{tweet_id}/unretweet", status_code=status.HTTP_204_NO_CONTENT)
 async def unretweet_tweet(tweet_id: str, current_user: User = Depends(get_current_user)):
-    # Trouver le retweet de l'utilisateur pour ce tweet
-    retweet = db.tweets.find_one({
-        "original_tweet_id": tweet_id,
-        "author_id": current_user.id,
-        "is_retweet": True
-    })
-
-    if not retweet:
-        raise HTTPException(status_code=404, detail="Retweet not found")
-
-    # Supprimer le retweet
-    db.tweets.delete_one({"_id": retweet["_id"]})
-
-    # Mettre à jour le compteur de retweets du tweet original
-    db.tweets.update_one(
-        {"_id": ObjectId(tweet_id)},
-        {"$inc": {"retweet_count": -1}}
-    )
-
+    await interactions.unretweet_tweet(tweet_id, current_user)
     return None
 
 
 @router.get("/tweets/{tweet_id}/retweet_status")
 async def check_retweet_status(tweet_id: str, current_user: User = Depends(get_current_user)):
-    retweet = db.tweets.find_one({
-        "original_tweet_id": tweet_id,
-        "author_id": current_user.id,
-        "is_retweet": True
-    })
+    retweet = await tweet_repository.get_user_retweet(tweet_id, current_user.id)
 
     return {"retweeted": retweet is not None}
 
 
 @router.get("/tweets/feed", response_model=List[Dict])
-async def get_feed(current_user: User = Depends(get_current_user)):
+async def get_feed(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
     """
     Récupère le fil d'actualité avec toutes les informations nécessaires en une seule requête
     """
-    # Récupérer les tweets
-    tweets = list(db.tweets.find().sort("created_at", -1).limit(50))
+    # Récupérer les tweets du fil matérialisé de l'utilisateur
+    tweets = await read_home_timeline(current_user.id, limit)
     
     # Préparer les IDs pour les opérations en batch
     tweet_ids = [ObjectId(tweet["_id"]) for tweet in tweets]
     tweet_ids_str = [str(tweet["_id"]) for tweet in tweets]
     
-    # Récupérer tous les statuts de like en une seule requête
-    likes = {}
-    user_likes = list(db.likes.find({
-        "tweet_id": {"$in": tweet_ids_str},
-        "user_id": current_user.id
-    }))
-    for like in user_likes:
-        likes[like["tweet_id"]] = True
+    # Récupérer les informations des utilisateurs
+    usernames = set()
+    for tweet in tweets:
+        usernames.add(tweet["author_username"])
+        if "original_author_username" in tweet:
+            usernames.add(tweet["original_author_username"])
     
-    # Récupérer tous les statuts de retweet en une seule requête
-    retweets = {}
-    user_retweets = list(db.tweets.find({
-        "original_tweet_id": {"$in": tweet_ids_str},
-        "author_id": current_user.id,
-        "is_retweet": True
-    }))
-    for retweet in user_retweets:
-        retweets[retweet["original_tweet_id"]] = True
+    # Statuts like/retweet et profils : une requête $in par loader, exécutées en parallèle
+    likes, retweets, profiles = await asyncio.gather(
+        loaders.like_status(current_user.id).load_many(tweet_ids_str),
+        loaders.retweet_status(current_user.id).load_many(tweet_ids_str),
+        loaders.users_by_username.load_many(usernames),
+    )
     
     # Récupérer tous les résumés de réactions en une seule requête
     reactions_summary = {}
-    all_reactions = list(db.emotion_reactions.aggregate([
+    all_reactions = await emotion_reaction_repository.aggregate([
         {"$match": {"tweet_id": {"$in": tweet_ids}}},
         {"$group": {
             "_id": "$tweet_id",
@@ -796,7 +662,7 @@ async def get_feed(current_user: User = Depends(get_current_user)):
                 }
             }
         }}
-    ]))
+    ])
     
     for summary in all_reactions:
         tweet_id = str(summary["_id"])
@@ -818,23 +684,7 @@ async def get_feed(current_user: User = Depends(get_current_user)):
             "user_reaction": user_reaction
         }
     
-    # Récupérer les informations des utilisateurs
-    usernames = set()
-    for tweet in tweets:
-        usernames.add(tweet["author_username"])
-        if "original_author_username" in tweet:
-            usernames.add(tweet["original_author_username"])
-    
-    users_info = {}
-    for username in usernames:
-        user_data = db.users.find_one({"username": username})
-        if user_data:
-            users_info[username] = {
-                "id": str(user_data["_id"]),
-                "username": user_data["username"],
-                "profile_picture_id": user_data.get("profile_picture_id"),
-                "bio": user_data.get("bio")
-            }
+    users_info = {username: to_author_info(profile) for username, profile in profiles.items()}
     
     # Construire la réponse enrichie
     result = []
@@ -871,189 +721,71 @@ async def get_feed(current_user: User = Depends(get_current_user)):
     return result
 
 
+@router.get("/tweets/{tweet_id}", response_model=Tweet)
+async def read_tweet(tweet_id: str):
+    """Un tweet par son id (déclaré après /tweets/feed, qu'il masquerait sinon)"""
+    tweet = await tweet_repository.get_by_id(tweet_id) if ObjectId.is_valid(tweet_id) else None
+    if not tweet:
+        raise HTTPException(status_code=404, detail="Tweet not found")
+    tweet["id"] = str(tweet.pop("_id"))
+    tweet["tags"] = tweet.get("tags", [])
+    return Tweet(**tweet)
+
+
 @router.get("/trends", response_model=List[Dict])
-async def get_trending_hashtags(limit: int = 10):
+async def get_trending_hashtags(
+    limit: int = Query(10, ge=1, le=TRENDS_SNAPSHOT_SIZE),
+    window_minutes: int = Query(TRENDS_DEFAULT_WINDOW_MINUTES, ge=1, le=TRENDS_MAX_WINDOW_MINUTES),
+    mode: str = Query("count", pattern="^(count|velocity)$")
+):
     """
-    Récupère les hashtags en tendance (les plus utilisés dans les dernières 24h)
+    Récupère les hashtags en tendance : les plus utilisés sur les `window_minutes` dernières minutes
+    (mode=count), ou ceux qui accélèrent le plus par rapport à leur ligne de base (mode=velocity,
+    fenêtres fixées par TRENDS_VELOCITY_SHORT_MINUTES / TRENDS_VELOCITY_BASELINE_MINUTES)
     """
-    # Calculer la date d'il y a 24 heures
-    one_day_ago = datetime.utcnow() - timedelta(days=1)
-    
-    # Agréger les tags à partir des tweets des dernières 24 heures
-    pipeline = [
-        # Filtrer les tweets des dernières 24h qui ont des tags
-        {"$match": {
-            "created_at": {"$gte": one_day_ago},
-            "tags": {"$exists": True, "$ne": []}
-        }},
-        # Déconstruire le tableau tags pour traiter chaque tag individuellement
-        {"$unwind": "$tags"},
-        # Grouper par tag et compter
-        {"$group": {
-            "_id": "$tags",
-            "count": {"$sum": 1},
-            "tweets": {"$push": {"id": "$_id", "content": "$content"}}
-        }},
-        # Trier par nombre d'occurrences décroissant
-        {"$sort": {"count": -1}},
-        # Limiter le nombre de résultats
-        {"$limit": limit},
-        # Reformater pour la sortie
-        {"$project": {
-            "_id": 0,
-            "tag": "$_id",
-            "count": 1,
-            "sample_tweets": {"$slice": ["$tweets", 3]}  # Inclure quelques tweets d'exemple
-        }}
-    ]
-    
-    trends = list(db.tweets.aggregate(pipeline))
-    
-    # Transformer les ObjectId en strings pour la sérialisation JSON
-    for trend in trends:
-        for tweet in trend.get("sample_tweets", []):
-            tweet["id"] = str(tweet["id"])
-    
-    return trends
+    # Classements tenus en mémoire par le moteur de tendances (app/services/trends.py)
+    if not await trend_engine.wait_ready(TRENDS_READY_TIMEOUT_SECONDS):
+        return []
+    if mode == "velocity":
+        return trend_engine.velocity(limit)
+    return trend_engine.top(window_minutes, limit)
 
 @router.get("/recommendations", response_model=List[Dict])
-async def get_tweet_recommendations(limit: int = 10, current_user: User = Depends(get_current_user)):
+async def get_tweet_recommendations(
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
     """
     Obtient des recommandations de tweets pour l'utilisateur en fonction de ses likes
     """
-    # 1. Récupérer les tweets que l'utilisateur a aimés
-    user_likes = list(db.likes.find({"user_id": current_user.id}))
-    liked_tweet_ids = [ObjectId(like["tweet_id"]) for like in user_likes]
-
-    if not liked_tweet_ids:
+    # Candidats bornés, classés selon le profil d'affinité précalculé (app/services/recommendations.py)
+    recommended_tweets = await recommendations.recommend_tweets(current_user.id, limit, loaders)
+    if recommended_tweets is None:
         # Si l'utilisateur n'a pas de likes, retourner les tweets les plus populaires
-        popular_tweets = list(db.tweets.find().sort("like_count", -1).limit(limit))
-        return _format_tweets_for_response(popular_tweets, current_user.id)
-
-    # 2. Récupérer ces tweets aimés pour analyser les tags et auteurs
-    liked_tweets = list(db.tweets.find({"_id": {"$in": liked_tweet_ids}}))
-
-    # 3. Extraire les tags préférés
-    user_preferred_tags = []
-    for tweet in liked_tweets:
-        if "tags" in tweet and tweet["tags"]:
-            user_preferred_tags.extend(tweet["tags"])
-
-    # Compter la fréquence des tags
-    tag_counter = {}
-    for tag in user_preferred_tags:
-        if tag:  # S'assurer que le tag n'est pas None ou vide
-            tag_counter[tag] = tag_counter.get(tag, 0) + 1
-
-    # Prendre les 5 tags les plus fréquents
-    top_tags = sorted(tag_counter.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_tag_names = [tag[0] for tag in top_tags]
-
-    # 4. Extraire les auteurs préférés
-    user_preferred_authors = []
-    for tweet in liked_tweets:
-        user_preferred_authors.append(tweet["author_id"])
-
-    # Compter la fréquence des auteurs
-    author_counter = {}
-    for author_id in user_preferred_authors:
-        author_counter[author_id] = author_counter.get(author_id, 0) + 1
-
-    # Prendre les 3 auteurs les plus fréquents
-    top_authors = sorted(author_counter.items(), key=lambda x: x[1], reverse=True)[:3]
-    top_author_ids = [author[0] for author in top_authors]
-
-    # 5. Trouver des tweets similaires (par tags ou auteurs)
-    # Exclure les tweets que l'utilisateur a déjà likés
-    query = {
-        "_id": {"$nin": liked_tweet_ids},  # Ne pas recommander des tweets déjà aimés
-        "author_id": {"$ne": current_user.id},  # Ne pas recommander ses propres tweets
-        "$or": [
-            {"tags": {"$in": top_tag_names}},  # Tweets avec des tags similaires
-            {"author_id": {"$in": top_author_ids}}  # Tweets des auteurs préférés
-        ]
-    }
-
-    # 6. Ajouter un champ calculé pour le score de recommandation
-    pipeline = [
-        {"$match": query},
-        # S'assurer que le champ tags existe et est un tableau
-        {"$addFields": {
-            "tags": {"$ifNull": ["$tags", []]}
-        }},
-        {"$addFields": {
-            "tag_match_count": {
-                "$size": {
-                    "$ifNull": [
-                        {"$setIntersection": ["$tags", top_tag_names]},
-                        []
-                    ]
-                }
-            },
-            "author_preferred": {
-                "$cond": [
-                    {"$in": ["$author_id", top_author_ids]},
-                    1,
-                    0
-                ]
-            }
-        }},
-        {"$addFields": {
-            "recommendation_score": {
-                "$sum": [
-                    {"$multiply": ["$tag_match_count", 3]},  # 3 points par tag correspondant
-                    {"$multiply": ["$author_preferred", 5]}, # 5 points si l'auteur est préféré
-                    {"$ifNull": [{"$divide": ["$like_count", 10]}, 0]},        # 0.1 point par like
-                    {"$ifNull": [{"$divide": ["$retweet_count", 20]}, 0]},     # 0.05 point par retweet
-                    {"$ifNull": [{"$divide": ["$comment_count", 30]}, 0]}      # 0.033 point par commentaire
-                ]
-            }
-        }},
-        {"$sort": {"recommendation_score": -1}},
-        {"$limit": limit}
-    ]
+        recommended_tweets = await tweet_repository.list_popular(limit)
 
-    recommended_tweets = list(db.tweets.aggregate(pipeline))
+    return await _format_tweets_for_response(recommended_tweets, current_user.id, loaders)
 
-    # 7. Formater les tweets pour la réponse
-    return _format_tweets_for_response(recommended_tweets, current_user.id)
-
-def _format_tweets_for_response(tweets, user_id):
+async def _format_tweets_for_response(tweets, user_id, loaders: RequestLoaders):
     """Formatage des tweets pour la réponse API avec infos supplémentaires"""
     result = []
 
     # Récupérer les ids de tweets pour des opérations en batch
-    tweet_ids = [tweet["_id"] for tweet in tweets]
     tweet_ids_str = [str(tweet["_id"]) for tweet in tweets]
 
-    # Vérifier les likes de l'utilisateur en une requête
-    user_likes = list(db.likes.find({
-        "tweet_id": {"$in": tweet_ids_str},
-        "user_id": user_id
-    }))
-    liked_tweet_ids = [like["tweet_id"] for like in user_likes]
-
-    # Vérifier les retweets de l'utilisateur en une requête
-    user_retweets = list(db.tweets.find({
-        "original_tweet_id": {"$in": tweet_ids_str},
-        "author_id": user_id,
-        "is_retweet": True
-    }))
-    retweeted_tweet_ids = [retweet["original_tweet_id"] for retweet in user_retweets]
-
-    # Récupérer les infos utilisateurs pour tous les auteurs en une requête
+    # Récupérer les infos utilisateurs pour tous les auteurs
     author_ids = set()
     for tweet in tweets:
         author_ids.add(tweet["author_id"])
 
-    authors = {}
-    for author in db.users.find({"_id": {"$in": list(author_ids)}}):
-        authors[str(author["_id"])] = {
-            "id": str(author["_id"]),
-            "username": author["username"],
-            "profile_picture_id": author.get("profile_picture_id"),
-            "bio": author.get("bio")
-        }
+    # Statuts like/retweet et auteurs : une requête $in par loader, exécutées en parallèle
+    liked, retweeted, profiles = await asyncio.gather(
+        loaders.like_status(user_id).load_many(tweet_ids_str),
+        loaders.retweet_status(user_id).load_many(tweet_ids_str),
+        loaders.users_by_id.load_many(author_ids),
+    )
+    authors = {author_id: to_author_info(profile) for author_id, profile in profiles.items()}
 
     # Formater chaque tweet
     for tweet in tweets:
@@ -1074,8 +806,8 @@ def _format_tweets_for_response(tweets, user_id):
             "media_type": tweet.get("media_type"),
             "tags": tweet.get("tags", []),
             # Statuts spécifiques à l'utilisateur
-            "user_liked": tweet_id in liked_tweet_ids,
-            "user_retweeted": tweet_id in retweeted_tweet_ids,
+            "user_liked": liked.get(tweet_id, False),
+            "user_retweeted": retweeted.get(tweet_id, False),
             # Infos auteur
             "author_info": authors.get(tweet["author_id"])
         }
@@ -1105,37 +837,35 @@ async def toggle_bookmark(tweet_id: str, current_user: User = Depends(get_curren
     """
     Ajoute ou retire un tweet des favoris de l'utilisateur.
     """
-    tweet = db.tweets.find_one({"_id": ObjectId(tweet_id)})
-    if not tweet:
-        raise HTTPException(status_code=404, detail="Tweet non trouvé")
-
-    existing_bookmark = db.bookmarks.find_one({"user_id": current_user.id, "tweet_id": tweet_id})
-
-    if existing_bookmark:
-        db.bookmarks.delete_one({"_id": existing_bookmark["_id"]})
-        return {"message": "Tweet retiré des favoris"}
-    else:
-        # Ajouter aux favoris
-        bookmark_data = {
-            "user_id": current_user.id,
-            "tweet_id": tweet_id,
-            "created_at": datetime.utcnow()
-        }
-        db.bookmarks.insert_one(bookmark_data)
+    if await interactions.toggle_bookmark(tweet_id, current_user):
         return {"message": "Tweet ajouté aux favoris"}
+    return {"message": "Tweet retiré des favoris"}
 
 @router.get("/users/me/bookmarks")
-async def get_user_bookmarks(current_user: User = Depends(get_current_user)):
+async def get_user_bookmarks(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    loaders: RequestLoaders = Depends(get_loaders)
+):
     """
-    Récupère tous les tweets enregistrés en favoris par l'utilisateur.
+    Récupère les tweets enregistrés en favoris par l'utilisateur, page par page
+    (du favori le plus récent au plus ancien).
     """
-    bookmarks = list(db.bookmarks.find({"user_id": current_user.id}))
-    tweet_ids = [ObjectId(bm["tweet_id"]) for bm in bookmarks]
+    bookmarks, next_cursor = await bookmark_repository.page_by_user(current_user.id, cursor, limit)
+    set_next_cursor(response, next_cursor)
+    tweet_ids = [bm["tweet_id"] for bm in bookmarks]
 
-    # Récupérer les tweets correspondants
-    tweets = list(db.tweets.find({"_id": {"$in": tweet_ids}}))
-    for tweet in tweets:
-        tweet["id"] = str(tweet["_id"])
-        del tweet["_id"]
+    # Récupérer les tweets correspondants, dans l'ordre des favoris
+    tweets_by_id = await loaders.tweets_by_id.load_many(tweet_ids)
+    tweets = []
+    for tweet_id in tweet_ids:
+        tweet = tweets_by_id.get(tweet_id)
+        if tweet:
+            # Copie : les documents du loader sont partagés pour toute la requête
+            tweet = {k: v for k, v in tweet.items() if k != "_id"}
+            tweet["id"] = tweet_id
+            tweets.append(tweet)
 
     return tweets
@@ -1,25 +1,30 @@
 from fastapi.security import OAuth2PasswordBearer
 from datetime import datetime, timedelta
+import time
 import jwt
-import bcrypt
-from bson import ObjectId
-from app.config import SECRET_KEY, ALGORITHM
-from app.database import db
+from app.config import SECRET_KEY, ALGORITHM, PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS
+from app.repositories import user_repository
 from app.models import UserInDB
-from typing import Optional
-from fastapi import HTTPException, Depends, status
+from app.services.cache import TTLCache
+from app.services.passwords import hash_password, check_password, needs_rehash
+from typing import Any, Dict, Optional
+from fastapi import HTTPException, Depends, Query, status
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
-def get_password_hash(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+# Utilisateurs authentifiés, indexés par (sujet, expiration) du jeton
+_principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL_SECONDS)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+async def get_password_hash(password: str) -> str:
+    return await hash_password(password)
 
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await check_password(plain_password, hashed_password)
 
-def get_user(username: str):
-    user = db.users.find_one({"username": username})
+
+async def get_user(username: str):
+    user = await user_repository.get_by_username(username)
 
     if user:
 
@@ -41,10 +46,16 @@ def get_user(username: str):
     return None
 
 
-def authenticate_user(username: str, password: str) -> Optional[UserInDB]:
-    user = get_user(username)
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(username: str, password: str) -> Optional[UserInDB]:
+    user = await get_user(username)
+    if not user or not await verify_password(password, user.hashed_password):
         return False
+
+    # Le coût bcrypt a changé depuis le dernier hachage : on profite du mot de passe en clair pour rehacher
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash(password)
+        await user_repository.update_fields(user.id, {"hashed_password": user.hashed_password})
+        invalidate_principal(user.username)
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta) -> str:
@@ -68,7 +79,42 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserInDB:
     except jwt.InvalidTokenError:
         raise credentials_exception
 
-    user = get_user(username)
+    # Le jeton est valide : éviter l'aller-retour en base si l'utilisateur est en cache
+    cache_key = (username, payload.get("exp"))
+    user = _principal_cache.get(cache_key)
+    if user is not None:
+        return user
+
+    user = await get_user(username)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+
+    # Ne jamais garder l'utilisateur en cache au-delà de l'expiration du jeton
+    ttl = PRINCIPAL_CACHE_TTL_SECONDS
+    if payload.get("exp"):
+        ttl = min(ttl, payload["exp"] - time.time())
+    _principal_cache.set(cache_key, user, ttl=ttl)
+    return user
+
+
+async def get_stream_user(
+    bearer: Optional[str] = Depends(optional_oauth2_scheme),
+    token: Optional[str] = Query(None),
+) -> UserInDB:
+    """Comme get_current_user, mais accepte aussi ?token= : EventSource ne peut pas envoyer d'en-tête"""
+    if not bearer and not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await get_current_user(bearer or token)
+
+
+def invalidate_principal(username: str) -> None:
+    """À appeler après toute modification du profil d'un utilisateur"""
+    _principal_cache.invalidate_where(lambda key: key[0] == username)
+
+
+def principal_cache_stats() -> Dict[str, Any]:
+    return _principal_cache.stats()
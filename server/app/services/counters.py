@@ -0,0 +1,193 @@
+"""
+Tampon d'écriture différée (write-behind) pour les compteurs.
+
+Les `$inc` des routes (likes, commentaires, retweets, follows) ne touchent plus
+directement le document : ils sont cumulés en mémoire par (collection, _id, champ)
+puis appliqués périodiquement par un `bulk_write` non ordonné, une opération par
+document. Un tweet viral reçoit ainsi une écriture par intervalle au lieu d'une
+par requête.
+
+Les lectures des dépôts concernés ajoutent les deltas en attente (et ceux du
+flush en cours) aux documents renvoyés, pour que les compteurs affichés restent
+à jour. Au pire, un lecteur qui tombe entre l'écriture d'un flush et sa
+confirmation voit ce delta deux fois, le temps de ce flush.
+
+À l'arrêt, le tampon est vidé (avec quelques tentatives) ; les deltas qui n'ont
+pas pu être écrits sont journalisés pour pouvoir être rejoués. Sans boucle de
+flush démarrée (scripts, benchmarks), les incréments sont écrits immédiatement.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from app.config import (
+    COUNTER_FLUSH_INTERVAL_SECONDS,
+    COUNTER_FLUSH_MAX_PENDING,
+    COUNTER_SHUTDOWN_FLUSH_RETRIES,
+)
+from app.database import db
+
+logger = logging.getLogger(__name__)
+
+# (collection, _id) -> {champ: delta}
+Deltas = Dict[Tuple[str, str], Dict[str, int]]
+
+
+class CounterBuffer:
+    def __init__(self, database, interval: float, max_pending: int):
+        self._database = database
+        self._interval = interval
+        self._max_pending = max_pending
+        self._pending: Deltas = {}
+        self._inflight: Deltas = {}
+        self._lock = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flushes = 0
+        self._flushed_updates = 0
+        self._failed_updates = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def increment(self, collection: str, document_id, field: str, amount: int = 1) -> None:
+        if not self.running:
+            await self._database[collection].update_one({"_id": ObjectId(document_id)}, {"$inc": {field: amount}})
+            return
+        self._add(self._pending, (collection, str(document_id)), {field: amount})
+        if len(self._pending) >= self._max_pending:
+            self._wake.set()
+
+    async def increment_many(self, collection: str, increments: Iterable[Tuple[str, str, int]]) -> None:
+        """Plusieurs `(document_id, champ, delta)` : un seul `bulk_write` si la boucle de flush ne tourne pas"""
+        if self.running:
+            for document_id, field, amount in increments:
+                await self.increment(collection, document_id, field, amount)
+            return
+        by_document: Dict[str, Dict[str, int]] = {}
+        for document_id, field, amount in increments:
+            self._add(by_document, str(document_id), {field: amount})
+        if by_document:
+            await self._database[collection].bulk_write(
+                [UpdateOne({"_id": ObjectId(document_id)}, {"$inc": deltas}) for document_id, deltas in by_document.items()],
+                ordered=False,
+            )
+
+    def has_pending(self) -> bool:
+        return bool(self._pending or self._inflight)
+
+    def merge(self, collection: str, document: Dict[str, Any], projection: Optional[Dict[str, Any]] = None) -> None:
+        """Ajoute au document les deltas non encore écrits (lecture « read-through »)"""
+        key = (collection, str(document["_id"]))
+        for deltas in (self._inflight.get(key), self._pending.get(key)):
+            if not deltas:
+                continue
+            for field, amount in deltas.items():
+                # Ne pas faire apparaître un champ exclu par la projection
+                if field in document or projection is None or projection.get(field):
+                    document[field] = document.get(field, 0) + amount
+
+    async def flush(self) -> int:
+        """Écrit les deltas en attente ; renvoie le nombre de documents mis à jour"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+            self._inflight, self._pending = self._pending, {}
+            try:
+                by_collection: Dict[str, list] = {}
+                for (collection, document_id), deltas in self._inflight.items():
+                    deltas = {field: amount for field, amount in deltas.items() if amount}
+                    if deltas:
+                        by_collection.setdefault(collection, []).append((document_id, deltas))
+
+                written = 0
+                for collection, entries in by_collection.items():
+                    written += await self._write(collection, entries)
+                self._flushes += 1
+                self._flushed_updates += written
+                return written
+            finally:
+                self._inflight = {}
+
+    async def _write(self, collection: str, entries) -> int:
+        operations = [UpdateOne({"_id": ObjectId(document_id)}, {"$inc": deltas}) for document_id, deltas in entries]
+        try:
+            await self._database[collection].bulk_write(operations, ordered=False)
+            return len(entries)
+        except BulkWriteError as e:
+            # Non ordonné : seules les opérations en erreur sont remises en attente
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.warning("%d incrément(s) de %s en échec, remis en attente", len(failed), collection)
+        except PyMongoError as e:
+            failed = set(range(len(entries)))
+            logger.warning("Flush des compteurs de %s impossible (%s), remis en attente", collection, e)
+        for index in failed:
+            document_id, deltas = entries[index]
+            self._add(self._pending, (collection, document_id), deltas)
+        self._failed_updates += len(failed)
+        return len(entries) - len(failed)
+
+    @staticmethod
+    def _add(target: Deltas, key: Tuple[str, str], deltas: Dict[str, int]) -> None:
+        current = target.setdefault(key, {})
+        for field, amount in deltas.items():
+            current[field] = current.get(field, 0) + amount
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Erreur inattendue pendant le flush des compteurs")
+
+    def start(self) -> None:
+        if not self.running:
+            self._wake = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Arrête la boucle puis vide le tampon ; journalise ce qui n'a pas pu être écrit"""
+        if self._task is not None:
+            # Pas d'annulation : un flush interrompu perdrait les deltas qu'il a retirés
+            # de `_pending` ; la boucle termine le flush en cours puis sort d'elle-même.
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+
+        for attempt in range(COUNTER_SHUTDOWN_FLUSH_RETRIES):
+            await self.flush()
+            if not self._pending:
+                return
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+        lost = [
+            {"collection": collection, "_id": document_id, "$inc": deltas}
+            for (collection, document_id), deltas in self._pending.items()
+        ]
+        logger.error("Compteurs non écrits à l'arrêt (à rejouer) : %s", json.dumps(lost))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending_documents": len(self._pending),
+            "flushes": self._flushes,
+            "flushed_updates": self._flushed_updates,
+            "failed_updates": self._failed_updates,
+        }
+
+
+counter_buffer = CounterBuffer(db, COUNTER_FLUSH_INTERVAL_SECONDS, COUNTER_FLUSH_MAX_PENDING)
@@ -0,0 +1,138 @@
+"""
+DataLoader à portée de requête.
+
+Les chargements (`load`) émis pendant le même tour de boucle d'événements sont
+regroupés en un seul appel de la fonction de batch (une requête `$in`), puis
+mémorisés pour le reste de la requête HTTP. Toutes les routes d'enrichissement
+(auteurs, tweets, statuts like/retweet/favori/follow) passent par `RequestLoaders` afin
+qu'aucun motif N+1 ne puisse réapparaître.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+
+from app.repositories import bookmark_repository, follow_repository, tweet_repository, like_repository
+from app.services.profiles import get_profiles_by_ids, get_profiles_by_usernames
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]]):
+        self._batch_fn = batch_fn
+        self._futures: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+        self.batches = 0
+
+    def load(self, key: K) -> "asyncio.Future[Optional[V]]":
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[key] = future
+            self._queue.append(key)
+            if len(self._queue) == 1:
+                # Laisser les autres coroutines du même tour ajouter leurs clés avant d'exécuter le batch
+                loop.call_soon(self._dispatch)
+        return future
+
+    def load_many(self, keys: Iterable[K]) -> Awaitable[Dict[K, V]]:
+        """
+        Charge plusieurs clés ; les clés introuvables sont absentes du résultat.
+        Les clés sont enregistrées dès l'appel (pas au premier await) pour rejoindre
+        le batch en cours même quand l'appel est passé à `asyncio.gather`.
+        """
+        keys = list(dict.fromkeys(keys))
+        futures = [self.load(key) for key in keys]
+
+        async def collect() -> Dict[K, V]:
+            values = await asyncio.gather(*futures)
+            return {key: value for key, value in zip(keys, values) if value is not None}
+
+        return collect()
+
+    def prime(self, key: K, value: V) -> None:
+        """Renseigne une valeur déjà connue sans requête"""
+        if key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._futures[key] = future
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        if keys:
+            asyncio.ensure_future(self._run_batch(keys))
+
+    async def _run_batch(self, keys: List[K]) -> None:
+        self.batches += 1
+        try:
+            results = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+async def _load_tweets(tweet_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    return {str(tweet["_id"]): tweet for tweet in await tweet_repository.get_many_by_ids(tweet_ids)}
+
+
+class RequestLoaders:
+    """Ensemble des loaders d'une requête HTTP"""
+
+    def __init__(self):
+        self.users_by_id: DataLoader[str, Dict[str, Any]] = DataLoader(get_profiles_by_ids)
+        self.users_by_username: DataLoader[str, Dict[str, Any]] = DataLoader(get_profiles_by_usernames)
+        self.tweets_by_id: DataLoader[str, Dict[str, Any]] = DataLoader(_load_tweets)
+        self._like_status: Dict[str, DataLoader[str, bool]] = {}
+        self._retweet_status: Dict[str, DataLoader[str, bool]] = {}
+        self._bookmark_status: Dict[str, DataLoader[str, bool]] = {}
+        self._follow_status: Dict[str, DataLoader[str, bool]] = {}
+
+    def like_status(self, user_id: str) -> DataLoader[str, bool]:
+        """tweet_id -> True si `user_id` a liké le tweet"""
+        if user_id not in self._like_status:
+            async def batch(tweet_ids: List[str]) -> Dict[str, bool]:
+                liked = {like["tweet_id"] for like in await like_repository.list_for_tweets(tweet_ids, user_id)}
+                return {tweet_id: tweet_id in liked for tweet_id in tweet_ids}
+            self._like_status[user_id] = DataLoader(batch)
+        return self._like_status[user_id]
+
+    def retweet_status(self, user_id: str) -> DataLoader[str, bool]:
+        """tweet_id -> True si `user_id` a retweeté le tweet"""
+        if user_id not in self._retweet_status:
+            async def batch(tweet_ids: List[str]) -> Dict[str, bool]:
+                retweets = await tweet_repository.list_user_retweets_of(tweet_ids, user_id)
+                retweeted = {retweet["original_tweet_id"] for retweet in retweets}
+                return {tweet_id: tweet_id in retweeted for tweet_id in tweet_ids}
+            self._retweet_status[user_id] = DataLoader(batch)
+        return self._retweet_status[user_id]
+
+    def bookmark_status(self, user_id: str) -> DataLoader[str, bool]:
+        """tweet_id -> True si le tweet est dans les favoris de `user_id`"""
+        if user_id not in self._bookmark_status:
+            async def batch(tweet_ids: List[str]) -> Dict[str, bool]:
+                bookmarked = {bookmark["tweet_id"] for bookmark in await bookmark_repository.list_for_tweets(tweet_ids, user_id)}
+                return {tweet_id: tweet_id in bookmarked for tweet_id in tweet_ids}
+            self._bookmark_status[user_id] = DataLoader(batch)
+        return self._bookmark_status[user_id]
+
+    def follow_status(self, user_id: str) -> DataLoader[str, bool]:
+        """id d'utilisateur -> True si `user_id` le suit"""
+        if user_id not in self._follow_status:
+            async def batch(followed_ids: List[str]) -> Dict[str, bool]:
+                followed = set(await follow_repository.list_followed_among(user_id, followed_ids))
+                return {followed_id: followed_id in followed for followed_id in followed_ids}
+            self._follow_status[user_id] = DataLoader(batch)
+        return self._follow_status[user_id]
+
+
+def get_loaders() -> RequestLoaders:
+    """Dépendance FastAPI : une instance neuve par requête"""
+    return RequestLoaders()
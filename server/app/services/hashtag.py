@@ -1,28 +1,92 @@
-from bson import ObjectId
-from app.database import db
+"""
+Hashtags : résolution tag -> id et association aux tweets.
+
+La création passe par un upsert atomique sur l'index unique `tag` (plus de
+`find_one` suivi d'un `insert_one` concurrent qui créait des doublons). Les ids
+résolus sont gardés dans un cache LRU borné : un tag courant ne coûte plus
+aucune requête. Les routes lisent les tags recopiés dans chaque tweet (`tags`) ;
+la lecture des associations d'une page de tweets, elle, se fait en une seule
+agrégation (`get_hashtags_for_tweets`).
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from app.config import HASHTAG_CACHE_SIZE, HASHTAG_CACHE_TTL_SECONDS
+from app.repositories import hashtag_repository, tweet_hashtag_repository
 from app.models.hashtag import Hashtag
+from app.services.cache import TTLCache
+from app.services.jobs import JobRequest, job_handler
+
+_tag_ids = TTLCache(HASHTAG_CACHE_SIZE, HASHTAG_CACHE_TTL_SECONDS)
 
-def create_or_get_hashtag(tag: str) -> Hashtag:
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Tags en minuscules, sans espaces ni doublons, dans l'ordre d'origine"""
+    return list(dict.fromkeys(tag.strip().lower() for tag in tags if tag and tag.strip()))
+
+async def create_or_get_hashtag(tag: str) -> Hashtag:
     """Créer un hashtag s'il n'existe pas, sinon le récupérer"""
-    existing_hashtag = db.hashtags.find_one({"tag": tag.lower()})
+    tag = tag.strip().lower()
+    hashtag_id = _tag_ids.get(tag)
+    if hashtag_id is None:
+        hashtag_id = await hashtag_repository.get_or_create(tag)
+        _tag_ids.set(tag, hashtag_id)
+    return Hashtag(id=hashtag_id, tag=tag)
 
-    if existing_hashtag:
-        return Hashtag(id=str(existing_hashtag["_id"]), tag=existing_hashtag["tag"])
+async def resolve_hashtag_ids(tags: List[str]) -> Dict[str, str]:
+    """{tag: id} pour des tags normalisés ; seuls les tags absents du cache touchent la base"""
+    resolved = {}
+    missing = []
+    for tag in tags:
+        hashtag_id = _tag_ids.get(tag)
+        if hashtag_id is None:
+            missing.append(tag)
+        else:
+            resolved[tag] = hashtag_id
 
-    result = db.hashtags.insert_one({"tag": tag.lower()})
-    return Hashtag(id=str(result.inserted_id), tag=tag.lower())
+    if len(missing) == 1:
+        created = {missing[0]: await hashtag_repository.get_or_create(missing[0])}
+    else:
+        # Plusieurs tags inconnus : un seul bulk_write d'upserts plutôt qu'un aller-retour par tag
+        created = await hashtag_repository.upsert_many(missing)
+    for tag, hashtag_id in created.items():
+        _tag_ids.set(tag, hashtag_id)
+    resolved.update(created)
+    return resolved
 
-def attach_hashtag_to_tweet(tweet_id: str, hashtag_id: str):
+async def attach_hashtag_to_tweet(tweet_id: str, hashtag_id: str):
     """Associer un hashtag à un tweet"""
-    db.tweet_hashtags.insert_one({
-        "tweet_id": tweet_id,
-        "hashtag_id": hashtag_id
-    })
+    await tweet_hashtag_repository.link_many(tweet_id, [hashtag_id])
+
+async def attach_hashtags_to_tweet(tweet_id: str, tags: Iterable[str]) -> List[str]:
+    """
+    Crée les hashtags manquants et les associe au tweet. Avec un cache chaud,
+    une seule requête (upsert groupé des liens). Renvoie les tags normalisés.
+    """
+    normalized = normalize_tags(tags)
+    if not normalized:
+        return []
+
+    hashtag_ids = await resolve_hashtag_ids(normalized)
+    await tweet_hashtag_repository.link_many(tweet_id, [hashtag_ids[tag] for tag in normalized if tag in hashtag_ids])
+    return normalized
+
+def hashtags_job(tweet_id: str, tags: List[str]) -> Optional[JobRequest]:
+    """Tâche d'association des hashtags d'un nouveau tweet (None s'il n'y en a pas)"""
+    if not tags:
+        return None
+    return JobRequest("tweets.hashtags", {"tweet_id": tweet_id, "tags": tags}, f"hashtags:{tweet_id}")
+
+@job_handler("tweets.hashtags")
+async def _attach_hashtags_job(payload: Dict[str, Any]) -> None:
+    await attach_hashtags_to_tweet(payload["tweet_id"], payload["tags"])
+
+async def get_hashtags_for_tweets(tweet_ids: Iterable[str]) -> Dict[str, List[str]]:
+    """Hashtags de toute une page de tweets : {tweet_id: [tags]}, en une seule agrégation"""
+    tweet_ids = [str(tweet_id) for tweet_id in tweet_ids]
+    tags = await tweet_hashtag_repository.tags_for_tweets(tweet_ids)
+    return {tweet_id: tags.get(tweet_id, []) for tweet_id in tweet_ids}
 
-def get_tweet_hashtags(tweet_id: str):
+async def get_tweet_hashtags(tweet_id: str):
     """Récupérer les hashtags associés à un tweet"""
-    hashtag_links = db.tweet_hashtags.find({"tweet_id": tweet_id})
-    hashtag_ids = [link["hashtag_id"] for link in hashtag_links]
+    return (await get_hashtags_for_tweets([tweet_id]))[tweet_id]
 
-    hashtags = [h["tag"] for h in db.hashtags.find({"_id": {"$in": [ObjectId(hid) for hid in hashtag_ids]}})]
-    return hashtags
+def cache_stats() -> Dict[str, Any]:
+    return _tag_ids.stats()
@@ -0,0 +1,185 @@
+"""
+Likes, retweets, favoris et follows : bascules idempotentes.
+
+Chaque bascule est une seule écriture conditionnelle sur un index unique
+(`insert_one` qui échoue en `DuplicateKeyError`, upsert, `delete_one`) et c'est
+son résultat qui décide du delta de compteur. Plus de lecture de l'état avant
+l'écriture : deux clics simultanés ne peuvent plus créer deux likes ni décaler
+`like_count`. Les compteurs passent par le tampon d'écriture différée
+(`app/services/counters.py`) et ne coûtent donc pas d'aller-retour.
+
+Un follow est un upsert de la relation suivi d'une seule écriture groupée des
+deux compteurs (`followers_count` du compte suivi, `following_count` du
+follower) : pas de transaction multi-documents, qui exigerait un replica set,
+mais plus de compteurs modifiés sans relation correspondante.
+"""
+from datetime import datetime
+from typing import Any, Dict
+
+from fastapi import HTTPException, status
+
+from app.models.user import User
+from app.repositories import bookmark_repository, follow_repository, like_repository, tweet_repository, user_repository
+from app.services.jobs import enqueue_many
+from app.services.notifications import excerpt, group_notification_job
+from app.services.profiles import invalidate_profile, resolve_user_id
+from app.services.recommendations import like_affinity_job, unlike_affinity_job
+from app.services.timeline import fan_out_job, follow_job
+
+
+async def _get_tweet(tweet_id: str, detail: str = "Tweet not found") -> Dict[str, Any]:
+    tweet = await tweet_repository.get_by_id(tweet_id)
+    if not tweet:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    return tweet
+
+
+async def like_tweet(tweet_id: str, user: User) -> Dict[str, Any]:
+    """Like du tweet ; 400 s'il était déjà liké. Renvoie le like créé"""
+    tweet = await _get_tweet(tweet_id)
+
+    like_data = {
+        "tweet_id": tweet_id,
+        "user_id": user.id,
+        "username": user.username,
+        "created_at": datetime.utcnow()
+    }
+    like_id = await like_repository.add(like_data)
+    if like_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tweet already liked")
+    like_data["id"] = like_id
+
+    await tweet_repository.increment(tweet_id, "like_count", 1)
+
+    # Profil d'affinité et notification (sauf si l'utilisateur like son propre tweet) en tâches de fond
+    jobs = [like_affinity_job(user.id, tweet_id, like_id)]
+    if tweet["author_id"] != user.id:
+        jobs.append(group_notification_job(
+            tweet["author_id"], "like", user.id, user.username, tweet_id,
+            tweet_content=excerpt(tweet["content"]),
+        ))
+    await enqueue_many(jobs)
+    return like_data
+
+
+async def unlike_tweet(tweet_id: str, user: User) -> None:
+    """Retire le like ; 404 s'il n'existait pas"""
+    like = await like_repository.remove(tweet_id, user.id)
+    if like is None:
+        # Chemin d'erreur seulement : distinguer tweet inconnu et like absent
+        await _get_tweet(tweet_id)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Like not found")
+
+    await tweet_repository.increment(tweet_id, "like_count", -1)
+    await enqueue_many([unlike_affinity_job(user.id, tweet_id, like)])
+
+
+async def toggle_bookmark(tweet_id: str, user: User) -> bool:
+    """Ajoute ou retire le tweet des favoris ; renvoie True s'il est maintenant en favori"""
+    if await bookmark_repository.remove(user.id, tweet_id):
+        return False
+
+    await _get_tweet(tweet_id, "Tweet non trouvé")
+    # Un double-clic qui perd la course trouve le favori déjà créé : il reste en favori
+    await bookmark_repository.add(user.id, tweet_id)
+    return True
+
+
+async def retweet_tweet(tweet_id: str, user: User) -> Dict[str, Any]:
+    """Retweet ; 400 si l'utilisateur l'a déjà retweeté. Renvoie le retweet créé"""
+    original_tweet = await _get_tweet(tweet_id)
+
+    retweet_data = {
+        "author_id": user.id,
+        "author_username": user.username,
+        "content": original_tweet["content"],
+        "media_url": original_tweet.get("media_url"),
+        "is_retweet": True,
+        "original_tweet_id": tweet_id,
+        "original_author_username": original_tweet["author_username"],
+        "created_at": datetime.utcnow(),
+        "like_count": 0,
+        "comment_count": 0,
+        "retweet_count": 0
+    }
+    retweet_id = await tweet_repository.insert_retweet(retweet_data)
+    if retweet_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tweet already retweeted")
+
+    await tweet_repository.increment(tweet_id, "retweet_count", 1)
+
+    # Diffusion et notification (sauf si l'utilisateur retweete son propre tweet) en tâches de fond
+    jobs = [fan_out_job({**retweet_data, "_id": retweet_id})]
+    if original_tweet["author_id"] != user.id:
+        jobs.append(group_notification_job(
+            original_tweet["author_id"], "retweet", user.id, user.username, tweet_id,
+            tweet_content=excerpt(original_tweet["content"]),
+        ))
+    await enqueue_many(jobs)
+
+    retweet_data.pop("_id", None)
+    return {**retweet_data, "id": retweet_id}
+
+
+async def unretweet_tweet(tweet_id: str, user: User) -> None:
+    """Supprime le retweet ; 404 s'il n'existait pas"""
+    if not await tweet_repository.delete_user_retweet(tweet_id, user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Retweet not found")
+
+    await tweet_repository.increment(tweet_id, "retweet_count", -1)
+
+
+async def _resolve_user(username: str) -> str:
+    user_id = await resolve_user_id(username)
+    if user_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Utilisateur non trouvé")
+    return user_id
+
+
+async def _apply_follow_counters(follower_id: str, followed_id: str, delta: int) -> None:
+    await user_repository.increment_many([
+        (followed_id, "followers_count", delta),
+        (follower_id, "following_count", delta),
+    ])
+    invalidate_profile(followed_id)
+    invalidate_profile(follower_id)
+
+
+async def follow_user(username: str, user: User) -> Dict[str, Any]:
+    """Suit `username` ; 400 si c'est soi-même ou si la relation existe déjà. Renvoie la relation"""
+    followed_id = await _resolve_user(username)
+    if followed_id == user.id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Vous ne pouvez pas vous suivre vous-même")
+
+    follow_data = {
+        "follower_id": user.id,
+        "follower_username": user.username,
+        "followed_id": followed_id,
+        "followed_username": username,
+        "created_at": datetime.utcnow()
+    }
+    follow_id = await follow_repository.add(follow_data)
+    if follow_id is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Vous suivez déjà cet utilisateur")
+    follow_data["id"] = follow_id
+
+    await _apply_follow_counters(user.id, followed_id, 1)
+
+    # Notification (regroupée) et ajout des tweets récents du compte suivi au fil du follower, en tâches de fond
+    await enqueue_many([
+        group_notification_job(followed_id, "follow", user.id, user.username),
+        follow_job(user.id, followed_id, following=True),
+    ])
+    return follow_data
+
+
+async def unfollow_user(username: str, user: User) -> None:
+    """Ne plus suivre `username` ; 404 si la relation n'existait pas"""
+    followed_id = await _resolve_user(username)
+    if not await follow_repository.remove(user.id, followed_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vous ne suivez pas cet utilisateur")
+
+    await _apply_follow_counters(user.id, followed_id, -1)
+
+    # Retirer ses tweets du fil matérialisé
+    await enqueue_many([follow_job(user.id, followed_id, following=False)])
@@ -0,0 +1,196 @@
+"""
+File de tâches persistante pour les effets de bord après écriture.
+
+Les routes insèrent leur document principal puis délèguent le reste
+(notifications, hashtags, fan-out des fils) à une tâche enregistrée dans la
+collection `jobs`. Des workers asyncio réclament les tâches par bail, dans le
+processus de l'API (`JOB_RUN_IN_PROCESS`) ou dans un processus séparé
+(`python -m app.worker`).
+
+- Livraison au moins une fois : une tâche n'est retirée qu'après succès ; si son
+  worker meurt, le bail expire et elle est reprise. Les handlers doivent donc
+  pouvoir être rejoués sans effet visible.
+- Clé d'idempotence optionnelle : deux `enqueue` avec la même clé ne créent
+  qu'une tâche (tant que la tâche terminée est conservée, `JOB_RETENTION_SECONDS`).
+- Échecs : nouvel essai avec un délai exponentiel, puis statut `failed` après
+  `JOB_MAX_ATTEMPTS` tentatives.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from app.config import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL_SECONDS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_RETRY_MAX_SECONDS,
+    JOB_WORKER_CONCURRENCY,
+)
+from app.repositories import job_repository
+from app.repositories.job import FAILED, PENDING, RUNNING
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobRequest(NamedTuple):
+    name: str
+    payload: Dict[str, Any]
+    idempotency_key: Optional[str] = None
+
+
+_handlers: Dict[str, Handler] = {}
+
+
+def job_handler(name: str) -> Callable[[Handler], Handler]:
+    """Décorateur : enregistre `func(payload)` comme traitement des tâches `name`"""
+    def register(func: Handler) -> Handler:
+        _handlers[name] = func
+        return func
+    return register
+
+
+async def enqueue(
+    name: str,
+    payload: Dict[str, Any],
+    idempotency_key: Optional[str] = None,
+    delay_seconds: float = 0,
+) -> str:
+    """Enregistre une tâche et réveille les workers locaux ; renvoie l'id de la tâche"""
+    run_at = datetime.utcnow() + timedelta(seconds=delay_seconds)
+    job_id = await job_repository.enqueue(
+        job_repository.new_job(name, payload, idempotency_key, run_at, JOB_MAX_ATTEMPTS)
+    )
+    job_worker.notify()
+    return job_id
+
+
+async def enqueue_many(requests: Iterable[Optional[JobRequest]]) -> int:
+    """Enregistre les tâches d'une requête HTTP en un seul `insert_many` (les None sont ignorés)"""
+    now = datetime.utcnow()
+    jobs = [
+        job_repository.new_job(request.name, request.payload, request.idempotency_key, now, JOB_MAX_ATTEMPTS)
+        for request in requests if request is not None
+    ]
+    inserted = await job_repository.enqueue_many(jobs)
+    job_worker.notify()
+    return inserted
+
+
+def retry_delay(attempts: int) -> float:
+    """Délai exponentiel avant la tentative suivante (1 s, 2 s, 4 s… plafonné)"""
+    return min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+
+
+class JobWorker:
+    def __init__(self, concurrency: int):
+        self._concurrency = concurrency
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._processed = 0
+        self._retried = 0
+        self._failed = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run_once(self) -> bool:
+        """Traite une tâche si une est prête ; renvoie False si la file est vide"""
+        job = await job_repository.claim(self._worker_id, JOB_LEASE_SECONDS)
+        if job is None:
+            return False
+
+        handler = _handlers.get(job["name"])
+        try:
+            if handler is None:
+                raise LookupError(f"aucun handler pour la tâche {job['name']!r}")
+            await handler(job["payload"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if job["attempts"] >= job.get("max_attempts", JOB_MAX_ATTEMPTS):
+                self._failed += 1
+                logger.error("Tâche %s (%s) abandonnée après %d tentatives : %s",
+                             job["_id"], job["name"], job["attempts"], error)
+                held = await job_repository.fail(job, error)
+            else:
+                self._retried += 1
+                delay = retry_delay(job["attempts"])
+                logger.warning("Tâche %s (%s) en échec, nouvel essai dans %.0f s : %s",
+                               job["_id"], job["name"], delay, error)
+                held = await job_repository.retry(job, datetime.utcnow() + timedelta(seconds=delay), error)
+        else:
+            self._processed += 1
+            held = await job_repository.complete(job)
+        if not held:
+            # Bail expiré pendant le traitement : la tâche a été reprise, son nouvel essai fait foi
+            logger.warning("Tâche %s (%s) reprise par un autre worker, résultat ignoré", job["_id"], job["name"])
+        return True
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except Exception:
+                # Base indisponible : on réessaie au prochain tour
+                logger.exception("Erreur du worker de tâches")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._wake = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._loop()) for _ in range(self._concurrency)]
+
+    async def stop(self) -> None:
+        """Arrête les workers ; une tâche interrompue sera reprise à l'expiration de son bail"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wake = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "concurrency": self._concurrency,
+            "processed": self._processed,
+            "retried": self._retried,
+            "failed": self._failed,
+        }
+
+
+async def queue_stats() -> Dict[str, Any]:
+    """Profondeur de la file par statut et retard de la plus ancienne tâche prête"""
+    depth, running, failed, oldest = await asyncio.gather(
+        job_repository.count({"status": PENDING}),
+        job_repository.count({"status": RUNNING}),
+        job_repository.count({"status": FAILED}),
+        job_repository.oldest_ready(),
+    )
+    return {
+        "depth": depth,
+        "running": running,
+        "failed": failed,
+        "lag_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+        "worker": job_worker.stats(),
+    }
+
+
+job_worker = JobWorker(JOB_WORKER_CONCURRENCY)
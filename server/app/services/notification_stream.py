@@ -0,0 +1,293 @@
+"""
+Flux temps réel des notifications (`GET /notifications/stream`, Server-Sent Events).
+
+Les handlers de notifications publient deux types d'événements : `notification`
+(nouvelle notification ou groupe réactivé) et `unread_count` (nouvelle valeur du
+compteur de non-lues). Le hub les distribue aux connexions ouvertes du
+destinataire ; un onglet ouvert n'interroge plus `/notifications/count`.
+
+- File bornée par connexion : un client trop lent n'accumule pas d'événements en
+  mémoire. Quand sa file déborde, le flux est fermé et le navigateur se reconnecte
+  (comportement natif d'EventSource) en envoyant `Last-Event-ID`.
+- Reprise : les derniers événements (`NOTIFICATION_STREAM_REPLAY_SIZE`, tous
+  destinataires confondus) sont gardés en mémoire et rejoués à la reconnexion. Si
+  l'id demandé est plus ancien que ce tampon, un événement `resync` indique au
+  client de recharger la liste par l'API REST.
+- Battements de cœur : un commentaire SSE toutes les
+  `NOTIFICATION_STREAM_HEARTBEAT_SECONDS` garde la connexion ouverte à travers
+  les proxys et détecte les clients partis.
+
+Le transport entre processus est interchangeable (`NOTIFICATION_STREAM_BROKER`) :
+`local` distribue directement dans le processus (API et workers de tâches dans le
+même processus), `mongo` passe par une collection plafonnée suivie par un curseur
+tailable, pour que les événements publiés par `python -m app.worker` ou par un
+autre processus de l'API atteignent toutes les connexions.
+"""
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from app.config import (
+    NOTIFICATION_STREAM_BROKER,
+    NOTIFICATION_STREAM_CAPPED_BYTES,
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS,
+    NOTIFICATION_STREAM_QUEUE_SIZE,
+    NOTIFICATION_STREAM_REPLAY_SIZE,
+)
+from app.database import db
+
+logger = logging.getLogger(__name__)
+
+# Délai de reconnexion suggéré au navigateur
+RETRY_MILLISECONDS = 3000
+
+
+class StreamEvent(NamedTuple):
+    # ObjectId en hexadécimal : croissant dans le temps, comparable entre processus
+    id: str
+    recipient_id: str
+    event: str
+    data: Dict[str, Any]
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Sérialise un événement au format text/event-stream"""
+    lines = [f"id: {event_id}"] if event_id else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(jsonable_encoder(data))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """Une connexion SSE : file bornée d'événements ; None signale la fermeture du flux"""
+
+    def __init__(self, recipient_id: str, max_queue: int):
+        self.recipient_id = recipient_id
+        self.queue: "asyncio.Queue[Optional[StreamEvent]]" = asyncio.Queue(max_queue)
+
+    def push(self, event: StreamEvent) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self) -> None:
+        # Vide la file pour y placer le marqueur de fin ; les événements perdus
+        # seront rejoués à la reconnexion grâce à Last-Event-ID
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class LocalBroker:
+    """Distribution dans le processus courant uniquement"""
+    name = "local"
+
+    def __init__(self, deliver: Callable[[StreamEvent], None]):
+        self._deliver = deliver
+
+    async def publish(self, event: StreamEvent) -> None:
+        self._deliver(event)
+
+    def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class MongoBroker:
+    """
+    Distribution entre processus par une collection plafonnée : `publish` y insère
+    l'événement, chaque processus de l'API la suit avec un curseur tailable et
+    distribue ce qu'il lit à ses propres connexions.
+    """
+    name = "mongo"
+
+    def __init__(self, deliver: Callable[[StreamEvent], None], database, collection_name: str, capped_bytes: int):
+        self._deliver = deliver
+        self._database = database
+        self._collection_name = collection_name
+        self._capped_bytes = capped_bytes
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self):
+        return self._database[self._collection_name]
+
+    async def _ensure_collection(self) -> None:
+        # Un insert sur une collection absente créerait une collection ordinaire, non tailable
+        if self._ready:
+            return
+        try:
+            await self._database.create_collection(self._collection_name, capped=True, size=self._capped_bytes)
+        except CollectionInvalid:
+            pass
+        self._ready = True
+
+    async def publish(self, event: StreamEvent) -> None:
+        await self._ensure_collection()
+        await self.collection.insert_one({
+            "_id": ObjectId(event.id),
+            "recipient_id": event.recipient_id,
+            "event": event.event,
+            "data": event.data,
+        })
+
+    async def _tail(self) -> None:
+        await self._ensure_collection()
+        # On ne suit que les événements publiés après le démarrage
+        last = await self.collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        last_id = last["_id"] if last else ObjectId()
+        while True:
+            try:
+                cursor = self.collection.find({"_id": {"$gt": last_id}}, cursor_type=CursorType.TAILABLE_AWAIT)
+                while cursor.alive:
+                    async for document in cursor:
+                        last_id = document["_id"]
+                        self._deliver(StreamEvent(
+                            str(document["_id"]), document["recipient_id"], document["event"], document["data"],
+                        ))
+                    await asyncio.sleep(0.1)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Erreur du suivi des événements de notification")
+            # Collection vide ou curseur invalidé : on relance le suivi
+            await asyncio.sleep(1)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._tail())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class NotificationHub:
+    def __init__(self, broker: str, max_queue: int, replay_size: int):
+        self._max_queue = max_queue
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._recent: Deque[StreamEvent] = deque(maxlen=replay_size)
+        # Tout événement d'id supérieur est encore dans le tampon de reprise
+        self._horizon = str(ObjectId())
+        if broker == "mongo":
+            self.broker = MongoBroker(self.deliver, db, "notification_events", NOTIFICATION_STREAM_CAPPED_BYTES)
+        else:
+            self.broker = LocalBroker(self.deliver)
+        self._published = 0
+        self._delivered = 0
+        self._overflows = 0
+
+    async def publish(self, recipient_id: str, event: str, data: Dict[str, Any]) -> None:
+        """Publie un événement ; une erreur de diffusion ne fait jamais échouer l'appelant"""
+        try:
+            await self.broker.publish(StreamEvent(str(ObjectId()), recipient_id, event, data))
+            self._published += 1
+        except Exception:
+            logger.exception("Publication de l'événement %s pour %s impossible", event, recipient_id)
+
+    def deliver(self, event: StreamEvent) -> None:
+        """Appelé par le broker pour chaque événement reçu par ce processus"""
+        if len(self._recent) == self._recent.maxlen:
+            self._horizon = self._recent[0].id
+        self._recent.append(event)
+        for subscription in list(self._subscriptions.get(event.recipient_id, ())):
+            if subscription.push(event):
+                self._delivered += 1
+            else:
+                # Client trop lent : on ferme son flux, il reprendra depuis son dernier id
+                self._overflows += 1
+                self.unsubscribe(subscription)
+                subscription.close()
+
+    def subscribe(self, recipient_id: str, last_event_id: Optional[str] = None) -> Tuple[Subscription, List[StreamEvent], bool]:
+        """
+        Ouvre une connexion ; renvoie aussi les événements manqués depuis `last_event_id`
+        et False si certains ont déjà quitté le tampon de reprise (le client doit se resynchroniser).
+        """
+        subscription = Subscription(recipient_id, self._max_queue)
+        self._subscriptions.setdefault(recipient_id, set()).add(subscription)
+        if not last_event_id:
+            return subscription, [], True
+        missed = [event for event in self._recent if event.recipient_id == recipient_id and event.id > last_event_id]
+        return subscription, missed, last_event_id >= self._horizon
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.recipient_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.recipient_id]
+
+    async def stream(
+        self,
+        recipient_id: str,
+        last_event_id: Optional[str],
+        initial: Callable[[], Awaitable[List[Tuple[str, Dict[str, Any]]]]],
+        heartbeat: float = NOTIFICATION_STREAM_HEARTBEAT_SECONDS,
+    ) -> AsyncIterator[str]:
+        """
+        Corps de la réponse SSE d'une connexion. `initial()` fournit les événements
+        envoyés à l'ouverture (sans id, pour ne pas fausser Last-Event-ID).
+        """
+        subscription, missed, complete = self.subscribe(recipient_id, last_event_id)
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if not complete:
+                yield format_event("resync", {})
+            for event in missed:
+                yield format_event(event.event, event.data, event.id)
+            for event, data in await initial():
+                yield format_event(event, data)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    return
+                yield format_event(event.event, event.data, event.id)
+        finally:
+            self.unsubscribe(subscription)
+
+    def start(self) -> None:
+        self.broker.start()
+
+    async def stop(self) -> None:
+        """Arrête le broker et ferme les flux ouverts (sinon l'arrêt attendrait leur fin)"""
+        await self.broker.stop()
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+        self._subscriptions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "broker": self.broker.name,
+            "connections": sum(len(subscriptions) for subscriptions in self._subscriptions.values()),
+            "recipients": len(self._subscriptions),
+            "published": self._published,
+            "delivered": self._delivered,
+            "overflows": self._overflows,
+            "replay_buffer": len(self._recent),
+        }
+
+
+notification_hub = NotificationHub(NOTIFICATION_STREAM_BROKER, NOTIFICATION_STREAM_QUEUE_SIZE, NOTIFICATION_STREAM_REPLAY_SIZE)
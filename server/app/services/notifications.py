@@ -0,0 +1,250 @@
+"""
+Création des notifications.
+
+Les notifications sont écrites en tâche de fond (voir `app/services/jobs.py`) :
+les routes programment la tâche et répondent aussitôt. Chaque écriture peut être
+rejouée (livraison au moins une fois) sans créer de doublon.
+
+Les likes, retweets, commentaires et follows sont regroupés : un seul document
+par (destinataire, type, tweet, fenêtre de `NOTIFICATION_GROUP_WINDOW_SECONDS`),
+mis à jour par un upsert qui garde les derniers acteurs et leur nombre
+(« alice et 41 autres ont aimé votre tweet »). Les acteurs déjà comptés sont
+enregistrés à part (`notification_group_members`, index unique) : un rejeu ou
+un re-like ne compte pas deux fois, même sorti des derniers acteurs.
+
+Les mentions d'un nouveau tweet sont résolues avec une seule requête `$in`,
+puis leurs notifications sont insérées avec un seul `insert_many` ; leurs `_id`
+sont fixés dès la programmation de la tâche.
+
+Le nombre de non-lues est matérialisé dans `notification_counters` : chaque
+passage d'une notification à « non lue » (insertion, groupe réactivé) ou à
+« lue » applique un `$inc` au compteur du destinataire, et `/notifications/count`
+n'est plus qu'une lecture par `_id`. `reconcile_unread_counters` corrige une
+éventuelle dérive (écriture de la notification réussie, `$inc` perdu) ; elle se
+lance hors de l'API, via `python -m app.worker --reconcile-unread`.
+
+Chaque changement est aussi publié sur le flux temps réel des destinataires
+(`app/services/notification_stream.py`) : événements `notification` et
+`unread_count`.
+"""
+import logging
+import re
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from app.config import NOTIFICATION_GROUP_MAX_ACTORS, NOTIFICATION_GROUP_WINDOW_SECONDS
+from app.repositories import (
+    notification_group_member_repository,
+    notification_repository,
+    unread_counter_repository,
+    user_repository,
+)
+from app.services.jobs import JobRequest, job_handler
+from app.services.notification_stream import notification_hub
+
+logger = logging.getLogger(__name__)
+
+# Une mention : un @ suivi d'un nom d'utilisateur (lettres, chiffres, underscore)
+MENTION_PATTERN = re.compile(r'@(\w+)')
+
+
+def extract_mentions(content: str) -> List[str]:
+    """Extrait les mentions (@username) du contenu d'un tweet, sans doublons"""
+    return list(dict.fromkeys(MENTION_PATTERN.findall(content)))
+
+
+def excerpt(content: str) -> str:
+    return content[:50] + ("..." if len(content) > 50 else "")
+
+
+def group_bucket(moment: datetime) -> datetime:
+    """Début de la fenêtre de regroupement qui contient `moment` (UTC naïf, comme created_at)"""
+    seconds = int((moment - datetime(1970, 1, 1)).total_seconds())
+    return datetime.utcfromtimestamp(seconds - seconds % NOTIFICATION_GROUP_WINDOW_SECONDS)
+
+
+def group_notification_job(
+    recipient_id: str,
+    notification_type: str,
+    sender_id: str,
+    sender_username: str,
+    tweet_id: Optional[str] = None,
+    **fields: Any,
+) -> JobRequest:
+    """Tâche d'ajout d'un acteur au groupe de notifications (like, retweet, commentaire, follow)"""
+    return JobRequest("notifications.group", {
+        "recipient_id": recipient_id,
+        "type": notification_type,
+        "tweet_id": tweet_id,
+        "bucket": group_bucket(datetime.utcnow()),
+        "actor": {"id": sender_id, "username": sender_username},
+        "fields": fields,
+    })
+
+
+def mentions_job(tweet_id: str, content: str, author_id: str, author_username: str) -> Optional[JobRequest]:
+    """Tâche de notification des utilisateurs mentionnés (None si le tweet n'en contient pas)"""
+    usernames = extract_mentions(content)
+    if not usernames:
+        return None
+    return JobRequest("tweets.mentions", {
+        "tweet_id": tweet_id,
+        "content": content,
+        "author_id": author_id,
+        "author_username": author_username,
+        "created_at": datetime.utcnow(),
+        "notification_ids": {username: ObjectId() for username in usernames},
+    }, f"mentions:{tweet_id}")
+
+
+async def notify_mentions(
+    tweet_id: str,
+    content: str,
+    author_id: str,
+    author_username: str,
+    notification_ids: Optional[Dict[str, ObjectId]] = None,
+    created_at: Optional[datetime] = None,
+) -> int:
+    """Notifie les utilisateurs mentionnés dans un tweet ; renvoie le nombre de notifications créées"""
+    usernames = extract_mentions(content)
+    if not usernames:
+        return 0
+
+    mentioned_users = await user_repository.get_many_by_usernames(usernames, projection={"_id": 1, "username": 1})
+    notification_ids = notification_ids or {}
+    created_at = created_at or datetime.utcnow()
+    notifications = []
+    for user in mentioned_users:
+        if str(user["_id"]) == author_id:  # Ne pas notifier l'auteur du tweet
+            continue
+        notification = {
+            "recipient_id": str(user["_id"]),
+            "sender_id": author_id,
+            "sender_username": author_username,
+            "type": "mention",
+            "tweet_id": tweet_id,
+            "tweet_content": excerpt(content),
+            "read": False,
+            "created_at": created_at,
+        }
+        if user["username"] in notification_ids:
+            notification["_id"] = notification_ids[user["username"]]
+        notifications.append(notification)
+    return await insert_notifications(notifications)
+
+
+async def insert_notifications(notifications: List[Dict[str, Any]]) -> int:
+    """Insère des notifications (rejouables) et incrémente le compteur de leurs destinataires"""
+    inserted = await notification_repository.insert_many_once(notifications)
+    deltas = Counter(notification["recipient_id"] for notification in inserted if not notification.get("read", False))
+    await unread_counter_repository.add_many(deltas)
+
+    if inserted:
+        for notification in inserted:
+            await notification_hub.publish(notification["recipient_id"], "notification", to_event(notification))
+        counts = await unread_counter_repository.get_many(list(deltas))
+        for recipient_id, unread in counts.items():
+            await notification_hub.publish(recipient_id, "unread_count", {"count": max(unread, 0)})
+    return len(inserted)
+
+
+def to_event(notification: Dict[str, Any]) -> Dict[str, Any]:
+    """Notification telle qu'envoyée sur le flux (même forme que GET /notifications)"""
+    event = {key: value for key, value in notification.items() if key != "_id"}
+    if "_id" in notification:
+        event["id"] = str(notification["_id"])
+    return event
+
+
+async def _apply_unread_delta(recipient_id: str, delta: int) -> None:
+    """Met à jour le compteur du destinataire et publie sa nouvelle valeur"""
+    unread = await unread_counter_repository.add(recipient_id, delta)
+    if unread is not None:
+        await notification_hub.publish(recipient_id, "unread_count", {"count": max(unread, 0)})
+
+
+async def unread_count(recipient_id: str) -> int:
+    """Nombre de notifications non lues : une lecture par `_id` une fois le compteur initialisé"""
+    unread = await unread_counter_repository.get(recipient_id)
+    if unread is None:
+        # Premier appel pour ce destinataire : compteur initialisé depuis les notifications.
+        # Les incréments d'ici là sont ignorés (le document n'existe pas) mais déjà comptés.
+        unread = await unread_counter_repository.initialize(
+            recipient_id, await notification_repository.count_unread(recipient_id)
+        )
+    return max(unread, 0)
+
+
+async def mark_notification_read(notification_id: str, recipient_id: str) -> None:
+    if await notification_repository.mark_read(notification_id):
+        await _apply_unread_delta(recipient_id, -1)
+
+
+async def mark_all_notifications_read(recipient_id: str) -> None:
+    # Décrément du nombre de notifications réellement modifiées plutôt qu'une remise
+    # à zéro : un groupe réactivé entre-temps reste compté.
+    modified = await notification_repository.mark_all_read(recipient_id)
+    if modified:
+        await _apply_unread_delta(recipient_id, -modified)
+
+
+async def reconcile_unread_counters(batch_size: int = 1000) -> int:
+    """
+    Recompte les non-lues de chaque compteur existant et corrige ceux qui ont dérivé ;
+    renvoie le nombre de compteurs corrigés. Une notification écrite entre le comptage
+    et la correction peut encore fausser un compteur : à lancer aux heures creuses.
+    """
+    corrected = 0
+    after = None
+    while True:
+        stored = await unread_counter_repository.list_counters(after, batch_size)
+        if not stored:
+            return corrected
+        actual = await notification_repository.count_unread_by_recipient(list(stored))
+        drifted = {
+            recipient_id: actual.get(recipient_id, 0)
+            for recipient_id, unread in stored.items() if unread != actual.get(recipient_id, 0)
+        }
+        for recipient_id, unread in drifted.items():
+            logger.warning("Compteur de non-lues de %s corrigé : %d -> %d", recipient_id, stored[recipient_id], unread)
+        await unread_counter_repository.set_many(drifted)
+        corrected += len(drifted)
+        after = max(stored)
+
+
+@job_handler("notifications.group")
+async def _group_notification_job(payload: Dict[str, Any]) -> None:
+    group = {key: payload[key] for key in ("recipient_id", "type", "tweet_id", "bucket")}
+    if not await notification_group_member_repository.claim(group, payload["actor"]["id"]):
+        return
+    added = await notification_repository.add_to_group(
+        payload["recipient_id"],
+        payload["type"],
+        payload["tweet_id"],
+        payload["bucket"],
+        payload["actor"],
+        payload["fields"],
+        NOTIFICATION_GROUP_MAX_ACTORS,
+    )
+    await notification_group_member_repository.mark_applied(group, payload["actor"]["id"])
+    if added is None:
+        return
+    notification, became_unread = added
+    await notification_hub.publish(payload["recipient_id"], "notification", to_event(notification))
+    if became_unread:
+        await _apply_unread_delta(payload["recipient_id"], 1)
+
+
+@job_handler("tweets.mentions")
+async def _notify_mentions_job(payload: Dict[str, Any]) -> None:
+    await notify_mentions(
+        payload["tweet_id"],
+        payload["content"],
+        payload["author_id"],
+        payload["author_username"],
+        payload["notification_ids"],
+        payload["created_at"],
+    )
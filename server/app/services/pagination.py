@@ -0,0 +1,65 @@
+"""
+Pagination par curseur (keyset) sur le couple (created_at, _id).
+
+Le curseur est opaque pour le client : c'est un encodage base64 de la dernière
+position renvoyée. La page suivante est une simple lecture de plage sur un index
+(created_at -1, _id -1), quelle que soit sa profondeur, contrairement à skip().
+Le curseur de la page suivante est renvoyé dans l'en-tête `X-Next-Cursor`.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, Response
+from pymongo import DESCENDING
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+KEYSET_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+
+def encode_cursor(created_at: datetime, document_id) -> str:
+    raw = json.dumps({"t": created_at.isoformat(), "id": str(document_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(raw["t"]), ObjectId(raw["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def keyset_query(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    """Restreint `query` aux documents situés après le curseur"""
+    if not cursor:
+        return query
+    created_at, document_id = decode_cursor(cursor)
+    after_cursor = {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": document_id}},
+    ]}
+    if not query:
+        return after_cursor
+    return {"$and": [query, after_cursor]}
+
+
+def split_page(documents: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Sépare le document sentinelle (limit + 1) et calcule le curseur suivant"""
+    if len(documents) <= limit:
+        return documents, None
+    page = documents[:limit]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["_id"])
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,104 @@
+"""
+Hachage bcrypt hors de la boucle d'événements.
+
+bcrypt bloque le thread appelant (~250 ms au coût 12) : les calculs sont envoyés
+dans un pool de threads dédié (bcrypt libère le GIL), avec au plus
+`PASSWORD_HASH_WORKERS` calculs simultanés et au plus `PASSWORD_HASH_MAX_QUEUE`
+demandes en attente. Au-delà, la requête est refusée (503) plutôt que d'empiler
+de la latence pour tous les autres endpoints.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import bcrypt
+from fastapi import HTTPException, status
+
+from app.config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_QUEUE
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+
+_metrics = {
+    "in_flight": 0,
+    "queued": 0,
+    "max_queued": 0,
+    "completed": 0,
+    "rejected": 0,
+    "total_wait_seconds": 0.0,
+    "total_hash_seconds": 0.0,
+}
+
+
+async def _run(func: Callable, *args):
+    if _metrics["queued"] >= PASSWORD_HASH_MAX_QUEUE:
+        _metrics["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Trop de connexions simultanées, réessayez dans un instant",
+            headers={"Retry-After": "1"},
+        )
+
+    queued_at = time.perf_counter()
+    _metrics["queued"] += 1
+    _metrics["max_queued"] = max(_metrics["max_queued"], _metrics["queued"])
+    try:
+        await _slots.acquire()
+    finally:
+        _metrics["queued"] -= 1
+
+    started_at = time.perf_counter()
+    _metrics["in_flight"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+    finally:
+        _metrics["in_flight"] -= 1
+        _metrics["completed"] += 1
+        _metrics["total_wait_seconds"] += started_at - queued_at
+        _metrics["total_hash_seconds"] += time.perf_counter() - started_at
+        _slots.release()
+
+
+def _hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def _check(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+
+async def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return await _run(_hash, password, rounds)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run(_check, plain_password, hashed_password)
+
+
+def hash_cost(hashed_password: str) -> int:
+    """Coût bcrypt encodé dans le hash (`$2b$12$...` -> 12)"""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return 0
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    return hash_cost(hashed_password) != BCRYPT_ROUNDS
+
+
+def hashing_stats() -> Dict[str, Any]:
+    completed = _metrics["completed"]
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "max_queue": PASSWORD_HASH_MAX_QUEUE,
+        "rounds": BCRYPT_ROUNDS,
+        "in_flight": _metrics["in_flight"],
+        "queue_depth": _metrics["queued"],
+        "max_queue_depth": _metrics["max_queued"],
+        "completed": completed,
+        "rejected": _metrics["rejected"],
+        "avg_wait_ms": round(1000 * _metrics["total_wait_seconds"] / completed, 2) if completed else 0.0,
+        "avg_hash_ms": round(1000 * _metrics["total_hash_seconds"] / completed, 2) if completed else 0.0,
+    }
@@ -0,0 +1,124 @@
+"""
+Service de profils publics partagé.
+
+Résout un ensemble d'identifiants ou de usernames avec une seule requête `$in`
+pour les profils absents du cache (LRU + TTL). Le cache est invalidé par les
+routes qui modifient un profil (bio, photos, compteurs de follow).
+"""
+from typing import Any, Dict, Iterable, Optional
+
+from bson import ObjectId
+from app.config import PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS
+from app.repositories import user_repository
+from app.services.cache import TTLCache
+
+# Champs publics d'un utilisateur (jamais le mot de passe)
+PUBLIC_PROFILE_PROJECTION = {
+    "username": 1,
+    "email": 1,
+    "bio": 1,
+    "profile_picture_id": 1,
+    "banner_picture_id": 1,
+    "followers_count": 1,
+    "following_count": 1,
+    "created_at": 1,
+}
+
+# Profils par id, et correspondance username -> id
+_profiles = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS)
+_username_ids = TTLCache(PROFILE_CACHE_SIZE, PROFILE_CACHE_TTL_SECONDS)
+
+
+def to_public_profile(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(user["_id"]),
+        "username": user["username"],
+        "email": user["email"],
+        "bio": user.get("bio"),
+        "profile_picture_id": user.get("profile_picture_id"),
+        "banner_picture_id": user.get("banner_picture_id"),
+        "followers_count": user.get("followers_count", 0),
+        "following_count": user.get("following_count", 0),
+        "created_at": user["created_at"],
+    }
+
+
+def to_author_info(profile: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Sous-ensemble du profil joint aux tweets (`author_info`)"""
+    if profile is None:
+        return None
+    return {
+        "id": profile["id"],
+        "username": profile["username"],
+        "profile_picture_id": profile.get("profile_picture_id"),
+        "bio": profile.get("bio"),
+    }
+
+
+def _remember(user: Dict[str, Any]) -> Dict[str, Any]:
+    profile = to_public_profile(user)
+    _profiles.set(profile["id"], profile)
+    _username_ids.set(profile["username"], profile["id"])
+    return profile
+
+
+async def get_profiles_by_ids(user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Profils publics indexés par id (une seule requête pour les absents du cache)"""
+    result: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for user_id in set(user_ids):
+        if not ObjectId.is_valid(user_id):
+            continue
+        profile = _profiles.get(user_id)
+        if profile is None:
+            missing.append(user_id)
+        else:
+            result[user_id] = profile
+
+    if missing:
+        for user in await user_repository.get_many_by_ids(missing, projection=PUBLIC_PROFILE_PROJECTION):
+            profile = _remember(user)
+            result[profile["id"]] = profile
+    return result
+
+
+async def get_profiles_by_usernames(usernames: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Profils publics indexés par username (une seule requête pour les absents du cache)"""
+    result: Dict[str, Dict[str, Any]] = {}
+    missing = []
+    for username in set(usernames):
+        user_id = _username_ids.get(username)
+        profile = _profiles.get(user_id) if user_id else None
+        if profile is None:
+            missing.append(username)
+        else:
+            result[username] = profile
+
+    if missing:
+        for user in await user_repository.get_many_by_usernames(missing, projection=PUBLIC_PROFILE_PROJECTION):
+            profile = _remember(user)
+            result[profile["username"]] = profile
+    return result
+
+
+async def get_profile_by_username(username: str) -> Optional[Dict[str, Any]]:
+    return (await get_profiles_by_usernames([username])).get(username)
+
+
+async def resolve_user_id(username: str) -> Optional[str]:
+    """Id d'un utilisateur à partir de son username, sans requête si la correspondance est en cache"""
+    user_id = _username_ids.get(username)
+    if user_id is not None:
+        return user_id
+    profile = await get_profile_by_username(username)
+    return profile["id"] if profile else None
+
+
+def invalidate_profile(user_id: str, username: Optional[str] = None) -> None:
+    _profiles.invalidate(user_id)
+    if username:
+        _username_ids.invalidate(username)
+
+
+def cache_stats() -> Dict[str, Any]:
+    return _profiles.stats()
@@ -0,0 +1,259 @@
+"""
+Recommandations de tweets à partir de profils d'affinité précalculés.
+
+`GET /recommendations` relisait à chaque appel tous les likes de l'utilisateur
+et tous les tweets aimés, recomptait tags et auteurs en Python, puis lançait
+une agrégation de score sur toute la collection `tweets`. Désormais :
+
+- Profil : un document `user_affinities` par utilisateur, avec au plus
+  `AFFINITY_MAX_TAGS` tags et `AFFINITY_MAX_AUTHORS` auteurs pondérés. Chaque
+  like pèse 1 au moment où il est donné, puis décroît avec une demi-vie de
+  `AFFINITY_HALF_LIFE_DAYS` (les poids stockés valent à la date `updated_at`).
+- Mise à jour : chaque like ou unlike programme une tâche qui décroît le profil
+  jusqu'à maintenant puis ajoute (ou retire, avec la décroissance du like
+  supprimé) le poids du tweet. Écriture conditionnelle sur la version du profil,
+  relue en cas de conflit.
+- Reconstruction : `python -m app.worker --rebuild-affinities` (à planifier)
+  recalcule tous les profils à partir des likes des `AFFINITY_LOOKBACK_DAYS`
+  derniers jours et supprime ceux qui n'ont plus de likes récents. Un profil
+  absent (nouvel utilisateur, base existante) est construit à la demande à
+  partir de ses `AFFINITY_ON_DEMAND_LIKES` derniers likes.
+- Lecture : les candidats sont les tweets récents des meilleurs tags et auteurs
+  du profil, lus sur les index (tags, created_at) et (author_id, created_at) à
+  raison de `RECOMMENDATION_CANDIDATES_PER_LIST` par liste. Seul cet ensemble
+  borné est classé, avec le barème de l'ancienne agrégation (tags et auteur
+  pondérés par l'affinité, puis likes, retweets et commentaires).
+
+Les tags sont pris tels qu'enregistrés sur les tweets, pour correspondre à
+l'index (tags, created_at).
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.config import (
+    AFFINITY_HALF_LIFE_DAYS,
+    AFFINITY_LOOKBACK_DAYS,
+    AFFINITY_MAX_AUTHORS,
+    AFFINITY_MAX_TAGS,
+    AFFINITY_MIN_WEIGHT,
+    AFFINITY_ON_DEMAND_LIKES,
+    AFFINITY_REBUILD_BATCH_SIZE,
+    AFFINITY_UPDATE_RETRIES,
+    RECOMMENDATION_CANDIDATE_AUTHORS,
+    RECOMMENDATION_CANDIDATE_TAGS,
+    RECOMMENDATION_CANDIDATES_PER_LIST,
+    RECOMMENDATION_MAX_AGE_DAYS,
+)
+from app.repositories import like_repository, tweet_repository, user_affinity_repository
+from app.services.dataloader import RequestLoaders
+from app.services.jobs import JobRequest, job_handler
+
+logger = logging.getLogger(__name__)
+
+# Champs des tweets utiles au profil
+_PROFILE_FIELDS = {"tags": 1, "author_id": 1}
+
+
+def decay(elapsed: timedelta) -> float:
+    """Facteur de décroissance d'un poids après `elapsed`"""
+    return 0.5 ** (max(elapsed.total_seconds(), 0.0) / (AFFINITY_HALF_LIFE_DAYS * 86400))
+
+
+class Affinity:
+    """Poids des tags et des auteurs d'un utilisateur, valables à la date `at`"""
+
+    def __init__(self, at: datetime, tags: Optional[Dict[str, float]] = None, authors: Optional[Dict[str, float]] = None):
+        self.at = at
+        self.tags = tags or {}
+        self.authors = authors or {}
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any], at: datetime) -> "Affinity":
+        """Profil stocké, décru jusqu'à `at`"""
+        factor = decay(at - document["updated_at"])
+        return cls(
+            at,
+            {entry["tag"]: entry["weight"] * factor for entry in document.get("tags", [])},
+            {entry["id"]: entry["weight"] * factor for entry in document.get("authors", [])},
+        )
+
+    def add(self, tweet: Dict[str, Any], weight: float) -> None:
+        for tag in dict.fromkeys(tag for tag in tweet.get("tags") or [] if tag):
+            self.tags[tag] = self.tags.get(tag, 0.0) + weight
+        author_id = tweet.get("author_id")
+        if author_id:
+            self.authors[author_id] = self.authors.get(author_id, 0.0) + weight
+        # Reconstruction : borne la mémoire des gros likeurs sans attendre la fin
+        if len(self.tags) > 4 * AFFINITY_MAX_TAGS:
+            self.tags = dict(_strongest(self.tags, 2 * AFFINITY_MAX_TAGS))
+        if len(self.authors) > 4 * AFFINITY_MAX_AUTHORS:
+            self.authors = dict(_strongest(self.authors, 2 * AFFINITY_MAX_AUTHORS))
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            "tags": [{"tag": tag, "weight": round(weight, 4)} for tag, weight in _strongest(self.tags, AFFINITY_MAX_TAGS)],
+            "authors": [{"id": author_id, "weight": round(weight, 4)}
+                        for author_id, weight in _strongest(self.authors, AFFINITY_MAX_AUTHORS)],
+            "updated_at": self.at,
+        }
+
+
+def _strongest(weights: Dict[str, float], size: int) -> List:
+    return heapq.nlargest(size, ((key, weight) for key, weight in weights.items() if weight >= AFFINITY_MIN_WEIGHT),
+                          key=lambda item: item[1])
+
+
+async def _tweets_by_id(tweet_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    tweets = await tweet_repository.get_many_by_ids(set(tweet_ids), projection=_PROFILE_FIELDS)
+    return {str(tweet["_id"]): tweet for tweet in tweets}
+
+
+async def build_profile(user_id: str, now: datetime) -> Affinity:
+    """Profil calculé à partir des derniers likes de l'utilisateur (profil absent)"""
+    likes = await like_repository.list_recent_by_user(user_id, AFFINITY_ON_DEMAND_LIKES)
+    tweets = await _tweets_by_id(like["tweet_id"] for like in likes)
+    affinity = Affinity(now)
+    for like in likes:
+        if like["tweet_id"] in tweets:
+            affinity.add(tweets[like["tweet_id"]], decay(now - like["created_at"]))
+    return affinity
+
+
+async def get_profile(user_id: str) -> Dict[str, Any]:
+    """Document d'affinité de l'utilisateur, construit et enregistré s'il n'existe pas encore"""
+    profile = await user_affinity_repository.get(user_id)
+    if profile is None:
+        profile = (await build_profile(user_id, datetime.utcnow())).to_document()
+        # Une création concurrente (tâche de like) l'emporte : le profil calculé ici reste valable pour cette requête
+        await user_affinity_repository.save(user_id, profile, None)
+    return profile
+
+
+# Mises à jour incrémentales
+
+def affinity_job(user_id: str, tweet_id: str, weight: float, event_id: str) -> JobRequest:
+    """Tâche d'ajout de `weight` (négatif pour un unlike) aux tags et à l'auteur du tweet"""
+    return JobRequest(
+        "recommendations.affinity",
+        {"user_id": user_id, "tweet_id": tweet_id, "weight": weight},
+        f"affinity:{event_id}",
+    )
+
+
+def like_affinity_job(user_id: str, tweet_id: str, like_id: str) -> JobRequest:
+    return affinity_job(user_id, tweet_id, 1.0, f"like:{like_id}")
+
+
+def unlike_affinity_job(user_id: str, tweet_id: str, like: Dict[str, Any]) -> JobRequest:
+    # Retire ce qu'il reste du like supprimé après décroissance
+    return affinity_job(user_id, tweet_id, -decay(datetime.utcnow() - like["created_at"]), f"unlike:{like['_id']}")
+
+
+@job_handler("recommendations.affinity")
+async def _apply_affinity_job(payload: Dict[str, Any]) -> None:
+    tweets = await _tweets_by_id([payload["tweet_id"]])
+    tweet = tweets.get(payload["tweet_id"])
+    if tweet is None:
+        return
+    for _ in range(AFFINITY_UPDATE_RETRIES):
+        now = datetime.utcnow()
+        current = await user_affinity_repository.get(payload["user_id"])
+        if current is None:
+            # Premier profil : les likes (y compris celui-ci, déjà écrit ou supprimé) sont relus
+            affinity, version = await build_profile(payload["user_id"], now), None
+        else:
+            affinity, version = Affinity.from_document(current, now), current["version"]
+            affinity.add(tweet, payload["weight"])
+        if await user_affinity_repository.save(payload["user_id"], affinity.to_document(), version):
+            return
+    raise RuntimeError(f"Profil d'affinité de {payload['user_id']} modifié en continu")
+
+
+async def rebuild_profiles(batch_size: int = AFFINITY_REBUILD_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Recalcule tous les profils à partir des likes récents (parcours par _id),
+    puis supprime les profils qui n'ont été ni recalculés ni mis à jour. Les profils
+    mis à jour pendant la reconstruction gardent leur version incrémentale (`skipped`).
+    """
+    started_at = time.perf_counter()
+    now = datetime.utcnow()
+    profiles: Dict[str, Affinity] = {}
+    likes_read = 0
+    last_id = None
+    while True:
+        likes = await like_repository.list_since_after(now - timedelta(days=AFFINITY_LOOKBACK_DAYS), last_id, batch_size)
+        if not likes:
+            break
+        tweets = await _tweets_by_id(like["tweet_id"] for like in likes)
+        for like in likes:
+            tweet = tweets.get(like["tweet_id"])
+            if tweet is not None:
+                profiles.setdefault(like["user_id"], Affinity(now)).add(tweet, decay(now - like["created_at"]))
+        likes_read += len(likes)
+        last_id = likes[-1]["_id"]
+        logger.info("Profils d'affinité : %d likes lus", likes_read)
+
+    documents = [(user_id, affinity.to_document()) for user_id, affinity in profiles.items()]
+    written = 0
+    for start in range(0, len(documents), batch_size):
+        written += await user_affinity_repository.upsert_many(documents[start:start + batch_size], now)
+    removed = await user_affinity_repository.delete_stale(now)
+    return {
+        "likes": likes_read,
+        "profiles": written,
+        "skipped": len(documents) - written,
+        "removed": removed,
+        "seconds": round(time.perf_counter() - started_at, 1),
+    }
+
+
+# Lecture
+
+def _score(tweet: Dict[str, Any], tag_weights: Dict[str, float], author_weights: Dict[str, float]) -> float:
+    tags = dict.fromkeys(tweet.get("tags") or [])
+    return (
+        3 * sum(tag_weights.get(tag, 0.0) for tag in tags)     # jusqu'à 3 points par tag aimé
+        + 5 * author_weights.get(tweet["author_id"], 0.0)      # jusqu'à 5 points pour un auteur aimé
+        + tweet.get("like_count", 0) / 10
+        + tweet.get("retweet_count", 0) / 20
+        + tweet.get("comment_count", 0) / 30
+    )
+
+
+def _normalized(weights: Dict[str, float]) -> Dict[str, float]:
+    """Poids ramenés à [0, 1] (l'affinité la plus forte vaut 1)"""
+    strongest = max(weights.values(), default=0.0)
+    return {key: weight / strongest for key, weight in weights.items()} if strongest > 0 else {}
+
+
+async def recommend_tweets(user_id: str, limit: int, loaders: RequestLoaders) -> Optional[List[Dict[str, Any]]]:
+    """Tweets recommandés à `user_id` ; None s'il n'a encore aucune affinité"""
+    profile = await get_profile(user_id)
+    tag_weights = _normalized({entry["tag"]: entry["weight"] for entry in profile.get("tags", [])})
+    author_weights = _normalized(
+        {entry["id"]: entry["weight"] for entry in profile.get("authors", []) if entry["id"] != user_id}
+    )
+    if not tag_weights and not author_weights:
+        return None
+
+    # Candidats : tweets récents des meilleurs tags et auteurs, une lecture d'index bornée par liste
+    since = datetime.utcnow() - timedelta(days=RECOMMENDATION_MAX_AGE_DAYS)
+    lists = await asyncio.gather(
+        *(tweet_repository.list_recent_by_tag(tag, since, RECOMMENDATION_CANDIDATES_PER_LIST)
+          for tag in list(tag_weights)[:RECOMMENDATION_CANDIDATE_TAGS]),
+        *(tweet_repository.list_recent_by_author(author_id, since, RECOMMENDATION_CANDIDATES_PER_LIST)
+          for author_id in list(author_weights)[:RECOMMENDATION_CANDIDATE_AUTHORS]),
+    )
+    candidates = {
+        str(tweet["_id"]): tweet for tweets in lists for tweet in tweets if tweet["author_id"] != user_id
+    }
+    liked = await loaders.like_status(user_id).load_many(candidates)
+    return heapq.nlargest(
+        limit,
+        (tweet for tweet_id, tweet in candidates.items() if not liked.get(tweet_id)),
+        key=lambda tweet: _score(tweet, tag_weights, author_weights),
+    )
@@ -0,0 +1,82 @@
+"""
+Rétention des notifications.
+
+`GET /notifications` n'affiche que les 50 plus récentes : le reste de l'historique
+ne sert qu'à faire grossir la collection et ses index.
+
+- Notifications lues : index TTL sur `read_at` (`NOTIFICATION_READ_TTL_DAYS`),
+  MongoDB les supprime de lui-même.
+- Notifications non lues plus anciennes que `NOTIFICATION_ARCHIVE_AFTER_DAYS` :
+  `archive_old_notifications` les copie par lots dans `notifications_archive`
+  (forme compacte) puis les retire de la collection chaude, en décrémentant le
+  compteur de non-lues de leurs destinataires.
+
+    python -m app.worker --retention   # une passe complète et le rapport de stockage
+"""
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from app.config import NOTIFICATION_ARCHIVE_AFTER_DAYS, NOTIFICATION_ARCHIVE_BATCH_SIZE
+from app.repositories import notification_archive_repository, notification_repository, unread_counter_repository
+
+logger = logging.getLogger(__name__)
+
+_SIZE_FIELDS = ("count", "size", "storage_size", "total_index_size")
+
+
+async def archive_old_notifications(
+    older_than_days: int = NOTIFICATION_ARCHIVE_AFTER_DAYS,
+    batch_size: int = NOTIFICATION_ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Archive les notifications non lues anciennes, lot par lot ; renvoie le nombre archivé"""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = await notification_repository.find_unread_before(cutoff, batch_size)
+        if not batch:
+            break
+        # Copie d'abord, suppression ensuite : une passe interrompue est simplement rejouée
+        await notification_archive_repository.archive_many(batch)
+        deleted = await notification_repository.delete_unread_before([notification["_id"] for notification in batch], cutoff)
+        await unread_counter_repository.add_many({
+            recipient_id: -count
+            for recipient_id, count in Counter(notification["recipient_id"] for notification in deleted).items()
+        })
+        archived += len(deleted)
+        batches += 1
+        if len(batch) < batch_size:
+            break
+    return archived
+
+
+async def storage_report() -> Dict[str, Dict[str, Any]]:
+    """Taille des données et des index de la collection chaude et de l'archive"""
+    return {
+        "notifications": await notification_repository.storage_stats(),
+        "notifications_archive": await notification_archive_repository.storage_stats(),
+    }
+
+
+async def apply_retention() -> Dict[str, Any]:
+    """
+    Passe complète : `read_at` des anciennes notifications lues (pour l'index TTL),
+    archivage des non-lues anciennes, puis rapport de stockage avant/après.
+    """
+    before = await storage_report()
+    backfilled = await notification_repository.backfill_read_at()
+    archived = await archive_old_notifications()
+    after = await storage_report()
+    hot_before, hot_after = before["notifications"], after["notifications"]
+    report = {
+        "read_at_backfilled": backfilled,
+        "archived": archived,
+        "before": before,
+        "after": after,
+        "saved": {field: hot_before[field] - hot_after[field] for field in _SIZE_FIELDS},
+    }
+    logger.info("Rétention des notifications : %d archivée(s), %d date(s) de lecture ajoutée(s)", archived, backfilled)
+    return report
@@ -0,0 +1,186 @@
+"""
+Recherche plein texte des tweets : index inversé persistant et classement BM25.
+
+L'ancienne recherche appliquait une regex non ancrée (et non échappée) à
+`content`, `author_username` et `tags` : un parcours complet de la collection
+par requête. Désormais :
+
+- Indexation : à la création d'un tweet, une tâche découpe son texte, son
+  auteur et ses tags (`app/services/tokenizer.py`) et écrit une entrée par
+  terme dans `search_postings` (tweet, fréquence, longueur, date). La df de
+  chaque terme et les statistiques du corpus sont tenues dans `search_terms`.
+  Les retweets ne sont pas indexés : ils dupliqueraient le tweet d'origine.
+- Requête : une lecture des statistiques (`$in` sur les termes), puis pour
+  chaque terme une lecture de plage sur l'index (term, created_at) bornée à
+  `SEARCH_MAX_POSTINGS_PER_TERM` entrées les plus récentes. Le score BM25 est
+  multiplié par un bonus de fraîcheur à demi-vie configurable.
+- Pagination : le curseur contient la date de référence de la première page,
+  le score et l'id du dernier résultat. Les pages suivantes recalculent les
+  mêmes scores (tweets postérieurs à la date de référence exclus) et reprennent
+  juste après.
+
+Un index vide ou incomplet (base existante) se reconstruit avec
+`python -m app.worker --reindex-search`.
+"""
+import asyncio
+import base64
+import json
+import logging
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.config import (
+    SEARCH_BM25_B,
+    SEARCH_BM25_K1,
+    SEARCH_MAX_POSTINGS_PER_TERM,
+    SEARCH_MAX_QUERY_TERMS,
+    SEARCH_RECENCY_HALF_LIFE_HOURS,
+    SEARCH_RECENCY_WEIGHT,
+    SEARCH_REINDEX_BATCH_SIZE,
+)
+from app.repositories import search_posting_repository, search_term_repository, tweet_repository
+from app.services.jobs import JobRequest, job_handler
+from app.services.hashtag import normalize_tags
+from app.services.tokenizer import term_frequencies, tokenize
+
+logger = logging.getLogger(__name__)
+
+
+def _document_fields(tweet: Dict[str, Any]) -> List[str]:
+    return [tweet.get("content") or "", tweet.get("author_username") or "", *normalize_tags(tweet.get("tags") or [])]
+
+
+async def index_tweet(tweet_id: str, tweet: Dict[str, Any]) -> int:
+    """Indexe un tweet (rejouable sans double comptage) ; renvoie le nombre de termes ajoutés"""
+    if tweet.get("is_retweet"):
+        return 0
+    frequencies = term_frequencies(_document_fields(tweet))
+    length = sum(frequencies.values())
+    new_terms = await search_posting_repository.add_document(tweet_id, tweet["created_at"], length, frequencies)
+    # Tous les termes nouveaux : première indexation du tweet (un rejeu n'en trouve aucun)
+    await search_term_repository.add_document(new_terms, length, new_document=len(new_terms) == len(frequencies))
+    return len(new_terms)
+
+
+def search_index_job(tweet_id: str, tweet: Dict[str, Any]) -> JobRequest:
+    """Tâche d'indexation d'un nouveau tweet (le texte est transmis : pas de relecture)"""
+    payload = {
+        "tweet_id": tweet_id,
+        "content": tweet.get("content"),
+        "author_username": tweet.get("author_username"),
+        "tags": tweet.get("tags") or [],
+        "created_at": tweet["created_at"],
+    }
+    return JobRequest("search.index", payload, f"search:{tweet_id}")
+
+
+@job_handler("search.index")
+async def _index_tweet_job(payload: Dict[str, Any]) -> None:
+    await index_tweet(payload["tweet_id"], payload)
+
+
+def encode_search_cursor(as_of: datetime, score: float, tweet_id: str) -> str:
+    raw = json.dumps({"t": as_of.isoformat(), "s": score, "id": tweet_id})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[datetime, float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(raw["t"]), float(raw["s"]), str(raw["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def _idf(df: int, docs: int) -> float:
+    return math.log(1 + (docs - df + 0.5) / (df + 0.5))
+
+
+def _recency_boost(created_at: datetime, as_of: datetime) -> float:
+    age_hours = max((as_of - created_at).total_seconds(), 0) / 3600
+    return 1 + SEARCH_RECENCY_WEIGHT * 0.5 ** (age_hours / SEARCH_RECENCY_HALF_LIFE_HOURS)
+
+
+async def rank(terms: List[str], as_of: datetime) -> List[Tuple[float, str]]:
+    """(score, tweet_id) des tweets candidats, du plus pertinent au moins pertinent"""
+    frequencies, docs, total_length = await search_term_repository.get_statistics(terms)
+    terms = [term for term in terms if frequencies.get(term)]
+    if not terms or not docs:
+        return []
+    average_length = total_length / docs or 1
+
+    postings = await asyncio.gather(*(
+        search_posting_repository.list_recent(term, as_of, SEARCH_MAX_POSTINGS_PER_TERM) for term in terms
+    ))
+    scores: Dict[str, float] = {}
+    created: Dict[str, datetime] = {}
+    for term, entries in zip(terms, postings):
+        idf = _idf(frequencies[term], docs)
+        for entry in entries:
+            tf = entry["tf"]
+            norm = SEARCH_BM25_K1 * (1 - SEARCH_BM25_B + SEARCH_BM25_B * entry["length"] / average_length)
+            scores[entry["tweet_id"]] = scores.get(entry["tweet_id"], 0.0) + idf * tf * (SEARCH_BM25_K1 + 1) / (tf + norm)
+            created[entry["tweet_id"]] = entry["created_at"]
+
+    ranked = [(round(score * _recency_boost(created[tweet_id], as_of), 9), tweet_id) for tweet_id, score in scores.items()]
+    ranked.sort(reverse=True)
+    return ranked
+
+
+async def search_tweets(query: str, cursor: Optional[str], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Une page de tweets classés pour `query` et le curseur de la page suivante"""
+    terms = list(dict.fromkeys(tokenize(query)))[:SEARCH_MAX_QUERY_TERMS]
+    if cursor:
+        as_of, last_score, last_id = decode_search_cursor(cursor)
+    else:
+        as_of, last_score, last_id = datetime.utcnow(), math.inf, ""
+    if not terms:
+        return [], None
+
+    ranked = await rank(terms, as_of)
+    if cursor:
+        ranked = [(score, tweet_id) for score, tweet_id in ranked if (score, tweet_id) < (last_score, last_id)]
+    page = ranked[:limit]
+    next_cursor = encode_search_cursor(as_of, *page[-1]) if len(ranked) > limit else None
+
+    tweets = {str(tweet["_id"]): tweet for tweet in await tweet_repository.get_many_by_ids([tweet_id for _, tweet_id in page])}
+    return [tweets[tweet_id] for _, tweet_id in page if tweet_id in tweets], next_cursor
+
+
+async def rebuild_index(batch_size: int = SEARCH_REINDEX_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Reconstruit tout l'index à partir de la collection `tweets` (parcours par _id,
+    df et statistiques calculées en mémoire puis écrites en une fois). À lancer
+    hors trafic : les df des tweets publiés pendant la reconstruction sont
+    écrasées par celles calculées ici.
+    """
+    await search_posting_repository.clear()
+    frequencies: Dict[str, int] = {}
+    docs = total_length = 0
+    last_id = None
+    while True:
+        batch = await tweet_repository.list_originals_after(
+            last_id, batch_size, projection={"content": 1, "author_username": 1, "tags": 1, "created_at": 1}
+        )
+        if not batch:
+            break
+        postings = []
+        for tweet in batch:
+            document_frequencies = term_frequencies(_document_fields(tweet))
+            length = sum(document_frequencies.values())
+            tweet_id = str(tweet["_id"])
+            for term, tf in document_frequencies.items():
+                postings.append({"term": term, "tweet_id": tweet_id, "tf": tf, "length": length, "created_at": tweet["created_at"]})
+                frequencies[term] = frequencies.get(term, 0) + 1
+            docs += 1
+            total_length += length
+        await search_posting_repository.insert_postings(postings)
+        last_id = batch[-1]["_id"]
+        logger.info("Index de recherche : %d tweets indexés", docs)
+
+    await search_term_repository.replace_all(frequencies, docs, total_length)
+    return {"tweets": docs, "terms": len(frequencies), "postings": sum(frequencies.values())}
@@ -0,0 +1,147 @@
+"""
+Fil d'actualité matérialisé (hybride fan-out à l'écriture / fusion à la lecture).
+
+À la création d'un tweet, son identifiant est poussé en tâche de fond dans le fil
+borné (`timelines`) de chaque follower. Les auteurs qui dépassent
+`FANOUT_FOLLOWER_THRESHOLD` followers ne sont pas diffusés : leurs tweets récents
+sont fusionnés au moment de la lecture.
+
+Le document du fil garde la liste de ces comptes suivis (`merged_authors`) : la
+lecture reste une seule lecture bornée du fil, sans parcourir les follows. Elle est
+calculée à la construction du fil, complétée par les tâches de follow/unfollow et,
+quand un compte franchit le seuil, une fois par son premier tweet non diffusé
+(marqueur `merged_at_read` sur l'utilisateur).
+"""
+from typing import Any, Dict, List
+
+from app.config import TIMELINE_MAX_ENTRIES, FANOUT_FOLLOWER_THRESHOLD, FANOUT_BATCH_SIZE
+from app.repositories import (
+    user_repository,
+    tweet_repository,
+    follow_repository,
+    timeline_repository,
+)
+from app.services.jobs import JobRequest, job_handler
+
+# Nombre de tweets d'un compte ajoutés au fil lorsqu'on commence à le suivre
+FOLLOW_BACKFILL_SIZE = 50
+
+
+def _entry(tweet: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "tweet_id": str(tweet["_id"]),
+        "author_id": tweet["author_id"],
+        "created_at": tweet["created_at"],
+    }
+
+
+async def fan_out_tweet(tweet: Dict[str, Any]) -> None:
+    """Pousse un nouveau tweet dans le fil de son auteur et de ses followers"""
+    entry = _entry(tweet)
+    author_id = tweet["author_id"]
+
+    # L'auteur voit toujours ses propres tweets dans son fil
+    await timeline_repository.push_entry([author_id], entry, TIMELINE_MAX_ENTRIES)
+
+    author = await user_repository.get_by_id(author_id)
+    if author is None:
+        return
+    if author.get("followers_count", 0) >= FANOUT_FOLLOWER_THRESHOLD:
+        # Compte très suivi : ses tweets seront fusionnés à la lecture. Au franchissement
+        # du seuil, les fils de ses followers l'apprennent une fois pour toutes.
+        if not author.get("merged_at_read"):
+            async for follower_ids in follow_repository.iter_follower_ids(author_id, FANOUT_BATCH_SIZE):
+                await timeline_repository.add_merged_author(follower_ids, author_id)
+            await user_repository.update_fields(author_id, {"merged_at_read": True})
+        return
+    if author.get("merged_at_read"):
+        # Repassé sous le seuil : diffusé de nouveau (les fils qui le fusionnent encore dédoublonnent)
+        await user_repository.update_fields(author_id, {"merged_at_read": False})
+
+    async for follower_ids in follow_repository.iter_follower_ids(author_id, FANOUT_BATCH_SIZE):
+        await timeline_repository.push_entry(follower_ids, entry, TIMELINE_MAX_ENTRIES)
+
+
+async def add_followed_author(follower_id: str, author_id: str) -> None:
+    """Ajoute les tweets récents d'un compte nouvellement suivi au fil du follower"""
+    author = await user_repository.get_by_id(author_id)
+    if author is not None and author.get("followers_count", 0) >= FANOUT_FOLLOWER_THRESHOLD:
+        # Compte très suivi : fusionné à la lecture plutôt que recopié dans le fil
+        await timeline_repository.add_merged_author([follower_id], author_id)
+        return
+    tweets = await tweet_repository.list_recent_by_authors([author_id], FOLLOW_BACKFILL_SIZE)
+    if tweets:
+        await timeline_repository.merge_entries(follower_id, [_entry(t) for t in tweets], TIMELINE_MAX_ENTRIES)
+
+
+async def remove_followed_author(follower_id: str, author_id: str) -> None:
+    """Retire du fil les tweets d'un compte qui n'est plus suivi"""
+    await timeline_repository.remove_author(follower_id, author_id)
+
+
+def fan_out_job(tweet: Dict[str, Any]) -> JobRequest:
+    """Tâche de diffusion d'un nouveau tweet (seuls les champs d'une entrée de fil sont transmis)"""
+    entry = _entry(tweet)
+    payload = {"_id": entry["tweet_id"], "author_id": entry["author_id"], "created_at": entry["created_at"]}
+    return JobRequest("timelines.fan_out", {"tweet": payload}, f"fan_out:{entry['tweet_id']}")
+
+
+def follow_job(follower_id: str, author_id: str, following: bool) -> JobRequest:
+    """Tâche d'ajout (follow) ou de retrait (unfollow) des tweets d'un compte dans le fil du follower"""
+    name = "timelines.follow" if following else "timelines.unfollow"
+    return JobRequest(name, {"follower_id": follower_id, "author_id": author_id})
+
+
+# Une entrée poussée deux fois (tâche rejouée) est dédoublonnée à la lecture par read_home_timeline
+@job_handler("timelines.fan_out")
+async def _fan_out_job(payload: Dict[str, Any]) -> None:
+    await fan_out_tweet(payload["tweet"])
+
+
+@job_handler("timelines.follow")
+async def _follow_job(payload: Dict[str, Any]) -> None:
+    await add_followed_author(payload["follower_id"], payload["author_id"])
+
+
+@job_handler("timelines.unfollow")
+async def _unfollow_job(payload: Dict[str, Any]) -> None:
+    await remove_followed_author(payload["follower_id"], payload["author_id"])
+
+
+async def rebuild_timeline(user_id: str) -> Dict[str, Any]:
+    """
+    Reconstruit le fil à partir des tweets récents des comptes suivis (premier accès)
+    et la liste des comptes suivis fusionnés à la lecture ; renvoie le fil construit.
+    """
+    following_ids = await follow_repository.list_following_ids(user_id)
+    merged_authors = []
+    if following_ids:
+        merged_authors = await user_repository.filter_ids_with_min_followers(following_ids, FANOUT_FOLLOWER_THRESHOLD)
+    tweets = await tweet_repository.list_recent_by_authors(following_ids + [user_id], TIMELINE_MAX_ENTRIES)
+    entries = [_entry(tweet) for tweet in tweets]
+    await timeline_repository.replace_entries(user_id, entries, merged_authors)
+    return {"entries": entries, "merged_authors": merged_authors}
+
+
+async def read_home_timeline(user_id: str, limit: int) -> List[Dict[str, Any]]:
+    """Retourne les `limit` tweets les plus récents du fil d'un utilisateur"""
+    timeline = await timeline_repository.get(user_id, limit)
+    # Un fil construit avant `merged_authors` est reconstruit une fois
+    if timeline is None or not timeline.get("built") or "merged_authors" not in timeline:
+        timeline = await rebuild_timeline(user_id)
+    entries = timeline.get("entries", [])[:limit]
+
+    # Fusion à la lecture des comptes suivis au-dessus du seuil de fan-out
+    celebrity_tweets = []
+    if timeline["merged_authors"]:
+        celebrity_tweets = await tweet_repository.list_recent_by_authors(timeline["merged_authors"], limit)
+
+    tweets_by_id = {str(tweet["_id"]): tweet for tweet in celebrity_tweets}
+    missing_ids = [entry["tweet_id"] for entry in entries if entry["tweet_id"] not in tweets_by_id]
+    if missing_ids:
+        # Les tweets supprimés depuis (ex. retweet annulé) ne sont simplement plus retrouvés
+        for tweet in await tweet_repository.get_many_by_ids(missing_ids):
+            tweets_by_id[str(tweet["_id"])] = tweet
+
+    tweets = sorted(tweets_by_id.values(), key=lambda tweet: tweet["created_at"], reverse=True)
+    return tweets[:limit]
@@ -0,0 +1,90 @@
+"""
+Découpage du texte des tweets pour la recherche plein texte.
+
+Le même traitement s'applique aux tweets indexés et aux requêtes :
+minuscules, suppression des accents (« Été » et « ete » donnent le même terme),
+découpage sur les caractères de mot, mots vides français et anglais retirés,
+puis racinisation légère. La racinisation est commune aux deux langues : un
+tweet court ne permet pas de détecter sa langue de façon fiable, et un
+texte et une requête doivent toujours produire les mêmes termes.
+"""
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List
+
+_WORD = re.compile(r"\w+")
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 40
+# Longueur minimale du radical conservé après suppression d'un suffixe
+MIN_STEM_LENGTH = 3
+
+STOPWORDS = frozenset("""
+    a ai au aux avec ce ces cet cette dans de des du elle en et eu il ils je la le les leur lui ma mais me
+    meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu
+    un une vos votre vous y c d j l m n s t est sont etre avoir fait plus tres
+    an and are as at be been but by for from has have he her his i if in into is it its me my no not of on
+    or our she so than that the their them then there these they this to too was we were what when which
+    who will with you your
+""".split())
+
+# (suffixe, remplacement) : seul le premier suffixe applicable de la liste est retiré
+_SUFFIXES = [
+    ("issements", ""), ("issement", ""), ("ements", ""), ("ement", ""),
+    ("ations", ""), ("ation", ""), ("ateurs", ""), ("ateur", ""), ("atrices", ""), ("atrice", ""),
+    ("euses", ""), ("euse", ""), ("ments", ""), ("ment", ""),
+    ("ities", ""), ("ity", ""), ("ites", ""), ("ite", ""),
+    ("ingly", ""), ("edly", ""), ("ings", ""), ("ing", ""),
+    ("ions", ""), ("ion", ""), ("ness", ""), ("ful", ""),
+    ("ies", "y"), ("ied", "y"), ("aux", "al"), ("ly", ""), ("ed", ""),
+]
+_VOWELS = frozenset("aeiouy")
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ni diacritiques"""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(term: str) -> str:
+    """Racinisation légère français/anglais d'un terme déjà normalisé (`fold`)"""
+    if term.isdigit() or len(term) <= MIN_STEM_LENGTH:
+        return term
+    for suffix, replacement in _SUFFIXES:
+        if term.endswith(suffix):
+            base = term[:-len(suffix)]
+            if len(base) >= MIN_STEM_LENGTH and _VOWELS.intersection(base):
+                term = base + replacement
+                break
+    # Pluriels (s, x) puis e final : « tweets », « animaux », « connectee » -> « connect »
+    if len(term) > MIN_STEM_LENGTH and term[-1] in "sx" and not term.endswith("ss"):
+        term = term[:-1]
+    if len(term) > MIN_STEM_LENGTH and term.endswith("e"):
+        term = term[:-1]
+    # Consonne doublée laissée par le suffixe : « running » -> « runn » -> « run »
+    if len(term) > MIN_STEM_LENGTH and term[-1] == term[-2] and term[-1] not in _VOWELS and term[-1] not in "ls":
+        term = term[:-1]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """Termes d'un texte, dans l'ordre, doublons compris"""
+    terms = []
+    for word in _WORD.findall(fold(text)):
+        if len(word) < MIN_TERM_LENGTH and not word.isdigit():
+            continue
+        if word in STOPWORDS or len(word) > MAX_TERM_LENGTH:
+            continue
+        terms.append(stem(word))
+    return terms
+
+
+def term_frequencies(fields: Iterable[str]) -> Dict[str, int]:
+    """Fréquence de chaque terme sur l'ensemble des champs d'un document"""
+    counts: Counter = Counter()
+    for text in fields:
+        if text:
+            counts.update(tokenize(text))
+    return dict(counts)
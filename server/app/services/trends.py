@@ -0,0 +1,421 @@
+"""
+Tendances des hashtags sur fenêtre glissante, calculées en flux.
+
+`GET /trends` relançait à chaque appel une agrégation `$match`/`$unwind`/`$group`
+sur 24 h de tweets, avec un `$push` de tous les tweets de chaque tag pour n'en
+garder que trois. Le moteur ci-dessous est alimenté en continu par les nouveaux
+tweets et la route ne fait plus qu'une lecture en O(k) :
+
+- Comptes par minute : un tampon circulaire de `TRENDS_MAX_WINDOW_MINUTES`
+  lignes (une par minute) et une colonne par tag suivi. Le total d'une fenêtre
+  de w minutes est la somme des w dernières lignes.
+- Longue traîne : seuls `TRENDS_TRACKED_TAGS` tags ont une colonne. Les autres
+  passent par un count-min sketch (compteurs divisés par deux toutes les
+  `TRENDS_SKETCH_DECAY_MINUTES`). Chaque tag suivi a aussi un compteur
+  « chaleur » divisé par deux au même rythme : un tag dont l'estimation dépasse
+  la chaleur la plus faible prend la colonne correspondante. Son estimation,
+  historique décru et non pic, est répartie sur les minutes de la ligne de base
+  de la vélocité. Le tag évincé rejoint le sketch.
+- Échantillons : un réservoir de `TRENDS_SAMPLES_PER_TAG` tweets par tag suivi
+  (les échantillons sortis de la fenêtre sont remplacés en priorité).
+- Lecture : le classement de chaque fenêtre demandée est recalculé en NumPy à
+  chaque cycle d'alimentation et gardé en cache ; `top` n'en renvoie qu'une tranche.
+- Vélocité : les comptes bruts favorisent les tags permanents. Toutes les
+  `TRENDS_VELOCITY_REFRESH_SECONDS`, le compte de chaque tag sur la fenêtre
+  courte (`TRENDS_VELOCITY_SHORT_MINUTES`) est comparé, en z-score, à ses
+  comptes sur les fenêtres de même durée qui la précèdent dans la ligne de base
+  (`TRENDS_VELOCITY_BASELINE_MINUTES`) ; calcul vectorisé sur toutes les colonnes.
+
+Chaque processus de l'API suit la collection `tweets` (tweets avec tags, par
+created_at croissant, avec un recouvrement pour les insertions tardives) : au
+démarrage il relit la fenêtre maximale, puis les nouveaux tweets toutes les
+`TRENDS_POLL_SECONDS`. Les processus n'ont donc pas besoin de se coordonner.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from bson import ObjectId
+
+from app.config import (
+    TRENDS_MAX_CACHED_WINDOWS,
+    TRENDS_MAX_WINDOW_MINUTES,
+    TRENDS_POLL_BATCH_SIZE,
+    TRENDS_POLL_OVERLAP_SECONDS,
+    TRENDS_POLL_SECONDS,
+    TRENDS_SAMPLES_PER_TAG,
+    TRENDS_SKETCH_DECAY_MINUTES,
+    TRENDS_SKETCH_DEPTH,
+    TRENDS_SKETCH_WIDTH,
+    TRENDS_SNAPSHOT_SIZE,
+    TRENDS_TRACKED_TAGS,
+    TRENDS_VELOCITY_BASELINE_MINUTES,
+    TRENDS_VELOCITY_MIN_COUNT,
+    TRENDS_VELOCITY_REFRESH_SECONDS,
+    TRENDS_VELOCITY_SHORT_MINUTES,
+)
+from app.repositories import tweet_repository
+from app.services.hashtag import normalize_tags
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def minute_of(moment: datetime) -> int:
+    """Numéro de minute (depuis l'epoch) d'une date UTC naïve"""
+    return int((moment - _EPOCH).total_seconds() // 60)
+
+
+class CountMinSketch:
+    """Count-min sketch : estimation par excès des fréquences, mémoire fixe"""
+
+    def __init__(self, width: int, depth: int, seed: int = 0):
+        self._width = width
+        self._rows = np.arange(depth)
+        self._seeds = [random.Random(seed + row).getrandbits(64) for row in range(depth)]
+        self._table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, key: str) -> List[int]:
+        return [hash((seed, key)) % self._width for seed in self._seeds]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Ajoute `count` occurrences et renvoie la nouvelle estimation"""
+        columns = self._columns(key)
+        self._table[self._rows, columns] += count
+        return int(self._table[self._rows, columns].min())
+
+    def estimate(self, key: str) -> int:
+        return int(self._table[self._rows, self._columns(key)].min())
+
+    def decay(self) -> None:
+        self._table >>= 1
+
+
+class Sample(NamedTuple):
+    minute: int
+    tweet_id: str
+    content: str
+
+
+class TrendEngine:
+    def __init__(
+        self,
+        window_minutes: int,
+        tracked_tags: int,
+        sketch: CountMinSketch,
+        samples_per_tag: int,
+        snapshot_size: int,
+        velocity_short_minutes: int,
+        velocity_baseline_minutes: int,
+    ):
+        if min(velocity_baseline_minutes, window_minutes) < 2 * velocity_short_minutes:
+            raise ValueError("La ligne de base de la vélocité doit couvrir au moins deux fenêtres courtes")
+        self._window = window_minutes
+        self._capacity = tracked_tags
+        self._sketch = sketch
+        self._samples_per_tag = samples_per_tag
+        self._snapshot_size = snapshot_size
+        # Tampon circulaire : ligne = minute % fenêtre, colonne = tag suivi
+        self._counts = np.zeros((window_minutes, tracked_tags), dtype=np.int32)
+        self._slot_minutes = np.full(window_minutes, -1, dtype=np.int64)
+        self._totals = np.zeros(tracked_tags, dtype=np.int64)
+        # Comptes décroissants des colonnes, comparables aux estimations du sketch
+        self._heat = np.zeros(tracked_tags, dtype=np.int64)
+        self._columns: Dict[str, int] = {}
+        self._tags: List[Optional[str]] = [None] * tracked_tags
+        self._free = list(range(tracked_tags - 1, -1, -1))
+        self._samples: List[List[Sample]] = [[] for _ in range(tracked_tags)]
+        self._sample_seen = [0] * tracked_tags
+        self._rng = random.Random()
+        self._minute: Optional[int] = None
+        self._snapshots: "OrderedDict[int, List[Dict[str, Any]]]" = OrderedDict()
+        # Vélocité : fenêtre courte comparée aux fenêtres précédentes de la ligne de base
+        self._velocity_short = velocity_short_minutes
+        self._velocity_periods = min(velocity_baseline_minutes, window_minutes) // velocity_short_minutes
+        self._velocity: List[Dict[str, Any]] = []
+        self._velocity_computed_at = float("-inf")
+        self._last_velocity_seconds = 0.0
+        # Suivi de la collection tweets
+        self._last_created: Optional[datetime] = None
+        self._recent_ids: Dict[ObjectId, datetime] = {}
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._observed = 0
+        self._admissions = 0
+        self._evictions = 0
+        self._last_poll_seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    # Alimentation
+
+    def _advance(self, minute: int) -> None:
+        """Fait avancer le tampon jusqu'à `minute` en vidant les lignes recyclées"""
+        if self._minute is not None and minute <= self._minute:
+            return
+        first = minute if self._minute is None else max(self._minute + 1, minute - self._window + 1)
+        for current in range(first, minute + 1):
+            slot = current % self._window
+            self._totals -= self._counts[slot]
+            self._counts[slot] = 0
+            self._slot_minutes[slot] = current
+            if current % TRENDS_SKETCH_DECAY_MINUTES == 0:
+                self._sketch.decay()
+                self._heat >>= 1
+        self._minute = minute
+
+    def observe(self, tag: str, minute: int, tweet_id: str, content: str) -> None:
+        """Compte une occurrence de `tag` dans la minute `minute`"""
+        if self._minute is not None and minute <= self._minute - self._window:
+            return
+        self._advance(minute)
+        slot = minute % self._window
+        self._observed += 1
+
+        column = self._columns.get(tag)
+        if column is None:
+            estimate = self._sketch.add(tag)
+            column = self._admit(tag, estimate)
+            if column is None:
+                return
+            self._heat[column] = estimate
+            # L'occurrence courante est comptée ci-dessous, le reste de l'estimation est réparti
+            self._seed(column, estimate - 1)
+        else:
+            self._heat[column] += 1
+        self._counts[slot, column] += 1
+        self._totals[column] += 1
+        self._sample(column, Sample(minute, tweet_id, content))
+
+    def observe_tweet(self, tweet: Dict[str, Any]) -> None:
+        minute = minute_of(tweet["created_at"])
+        for tag in normalize_tags(tweet.get("tags") or []):
+            self.observe(tag, minute, str(tweet["_id"]), tweet.get("content", ""))
+
+    def _admit(self, tag: str, estimate: int) -> Optional[int]:
+        """Colonne attribuée à `tag`, ou None s'il reste dans la longue traîne"""
+        if self._free:
+            column = self._free.pop()
+        else:
+            # Même horizon des deux côtés : estimation et chaleur décroissent ensemble
+            column = int(np.argmin(self._heat))
+            if estimate <= self._heat[column]:
+                return None
+            evicted = self._tags[column]
+            del self._columns[evicted]
+            # Le tag évincé garde son poids dans le sketch pour pouvoir revenir
+            self._sketch.add(evicted, int(self._heat[column]))
+            self._counts[:, column] = 0
+            self._totals[column] = 0
+            self._heat[column] = 0
+            self._evictions += 1
+        self._columns[tag] = column
+        self._tags[column] = tag
+        self._samples[column] = []
+        self._sample_seen[column] = 0
+        self._admissions += 1
+        return column
+
+    def _seed(self, column: int, estimate: int) -> None:
+        """Répartit l'estimation d'un tag admis sur les minutes de la ligne de base déjà ouvertes"""
+        minutes = self._minute - np.arange(self._velocity_periods * self._velocity_short)
+        slots = minutes % self._window
+        slots = slots[self._slot_minutes[slots] == minutes]
+        share, remainder = divmod(estimate, len(slots))
+        self._counts[slots, column] += share
+        self._counts[slots[:remainder], column] += 1
+        self._totals[column] += estimate
+
+    def _sample(self, column: int, sample: Sample) -> None:
+        """Réservoir (algorithme R) ; un échantillon sorti de la fenêtre est remplacé en priorité"""
+        samples = self._samples[column]
+        self._sample_seen[column] += 1
+        if len(samples) < self._samples_per_tag:
+            samples.append(sample)
+            return
+        oldest = min(range(len(samples)), key=lambda index: samples[index].minute)
+        if samples[oldest].minute <= self._minute - self._window:
+            samples[oldest] = sample
+            return
+        index = self._rng.randrange(self._sample_seen[column])
+        if index < self._samples_per_tag:
+            samples[index] = sample
+
+    # Lecture
+
+    def window_counts(self, window: int) -> np.ndarray:
+        """Total de chaque colonne sur les `window` dernières minutes"""
+        recent = self._slot_minutes > self._minute - window
+        return self._counts[recent].sum(axis=0, dtype=np.int64)
+
+    def _trend(self, column: int, count: int, window: int, **scores: float) -> Dict[str, Any]:
+        return {
+            "tag": self._tags[column],
+            "count": count,
+            **scores,
+            "sample_tweets": [
+                {"id": sample.tweet_id, "content": sample.content}
+                for sample in self._samples[column] if sample.minute > self._minute - window
+            ],
+        }
+
+    def _rank(self, window: int) -> List[Dict[str, Any]]:
+        if self._minute is None:
+            return []
+        counts = self.window_counts(window)
+        size = min(self._snapshot_size, self._capacity)
+        best = np.argpartition(-counts, size - 1)[:size] if size < self._capacity else np.arange(self._capacity)
+        best = best[np.argsort(-counts[best], kind="stable")]
+        ranking = []
+        for column in best:
+            if counts[column] <= 0:
+                break
+            ranking.append(self._trend(column, int(counts[column]), window))
+        return ranking
+
+    def _score_velocity(self) -> List[Dict[str, Any]]:
+        """Classement par z-score du compte de la fenêtre courte face aux fenêtres précédentes de même durée"""
+        if self._minute is None:
+            return []
+        short = self._velocity_short
+        minutes = self._minute - np.arange(self._velocity_periods * short)
+        slots = minutes % self._window
+        rows = self._counts[slots] * (self._slot_minutes[slots] == minutes)[:, None]
+        per_period = rows.reshape(self._velocity_periods, short, self._capacity).sum(axis=1, dtype=np.int64)
+        current, baseline = per_period[0], per_period[1:]
+        mean = baseline.mean(axis=0)
+        # Bruit au moins poissonnien (variance >= moyenne) : un tag régulier ou rare ne s'envole pas
+        scores = (current - mean) / np.sqrt(np.maximum(baseline.var(axis=0), mean) + 1)
+        columns = np.flatnonzero(current >= TRENDS_VELOCITY_MIN_COUNT)
+        columns = columns[np.argsort(-scores[columns], kind="stable")][:self._snapshot_size]
+        return [
+            self._trend(column, int(current[column]), short,
+                        baseline=round(float(mean[column]), 2), score=round(float(scores[column]), 3))
+            for column in columns
+        ]
+
+    def top(self, window: int, limit: int) -> List[Dict[str, Any]]:
+        """Les `limit` tags les plus utilisés sur les `window` dernières minutes"""
+        window = min(window, self._window)
+        ranking = self._snapshots.get(window)
+        if ranking is None:
+            # Première demande de cette fenêtre : classement calculé puis rafraîchi à chaque cycle
+            ranking = self._rank(window)
+            self._snapshots[window] = ranking
+            if len(self._snapshots) > TRENDS_MAX_CACHED_WINDOWS:
+                self._snapshots.popitem(last=False)
+        else:
+            self._snapshots.move_to_end(window)
+        return ranking[:limit]
+
+    def velocity(self, limit: int) -> List[Dict[str, Any]]:
+        """Les `limit` tags en plus forte accélération (dernier classement calculé)"""
+        return self._velocity[:limit]
+
+    def refresh(self, now: Optional[datetime] = None) -> None:
+        """Avance le tampon à l'heure courante et recalcule les classements en cache"""
+        self._advance(minute_of(now or datetime.utcnow()))
+        for window in self._snapshots:
+            self._snapshots[window] = self._rank(window)
+        if time.monotonic() - self._velocity_computed_at >= TRENDS_VELOCITY_REFRESH_SECONDS:
+            started = time.perf_counter()
+            self._velocity = self._score_velocity()
+            self._velocity_computed_at = time.monotonic()
+            self._last_velocity_seconds = time.perf_counter() - started
+
+    # Suivi de la collection tweets
+
+    async def poll(self) -> int:
+        """Lit les tweets avec tags publiés depuis le dernier cycle ; renvoie le nombre de tweets comptés"""
+        started = time.perf_counter()
+        overlap = timedelta(seconds=TRENDS_POLL_OVERLAP_SECONDS)
+        if self._last_created is None:
+            since = datetime.utcnow() - timedelta(minutes=self._window)
+        else:
+            since = self._last_created - overlap
+        after_id = None
+        counted = 0
+        while True:
+            tweets = await tweet_repository.list_tagged_since(since, after_id, TRENDS_POLL_BATCH_SIZE)
+            for tweet in tweets:
+                if tweet["_id"] in self._recent_ids:
+                    continue
+                self._recent_ids[tweet["_id"]] = tweet["created_at"]
+                self.observe_tweet(tweet)
+                counted += 1
+                if self._last_created is None or tweet["created_at"] > self._last_created:
+                    self._last_created = tweet["created_at"]
+            if self._last_created is not None:
+                # Seuls les tweets de la zone de recouvrement peuvent être relus
+                cutoff = self._last_created - overlap
+                self._recent_ids = {tweet_id: created for tweet_id, created in self._recent_ids.items() if created >= cutoff}
+            if len(tweets) < TRENDS_POLL_BATCH_SIZE:
+                break
+            since, after_id = tweets[-1]["created_at"], tweets[-1]["_id"]
+
+        self.refresh()
+        self._last_poll_seconds = time.perf_counter() - started
+        return counted
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                counted = await self.poll()
+                if not self._ready.is_set():
+                    logger.info("Tendances : %d tweets relus au démarrage (%.2f s)", counted, self._last_poll_seconds)
+                    self._ready.set()
+            except Exception:
+                logger.exception("Mise à jour des tendances impossible")
+            await asyncio.sleep(TRENDS_POLL_SECONDS)
+
+    async def wait_ready(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "tracked_tags": len(self._columns),
+            "observed": self._observed,
+            "admissions": self._admissions,
+            "evictions": self._evictions,
+            "cached_windows": list(self._snapshots),
+            "last_poll_seconds": round(self._last_poll_seconds, 3),
+            "velocity_tags": len(self._velocity),
+            "last_velocity_seconds": round(self._last_velocity_seconds, 3),
+        }
+
+
+trend_engine = TrendEngine(
+    TRENDS_MAX_WINDOW_MINUTES,
+    TRENDS_TRACKED_TAGS,
+    CountMinSketch(TRENDS_SKETCH_WIDTH, TRENDS_SKETCH_DEPTH),
+    TRENDS_SAMPLES_PER_TAG,
+    TRENDS_SNAPSHOT_SIZE,
+    TRENDS_VELOCITY_SHORT_MINUTES,
+    TRENDS_VELOCITY_BASELINE_MINUTES,
+)
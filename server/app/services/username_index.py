@@ -0,0 +1,174 @@
+"""
+Index en mémoire des usernames pour l'autocomplétion des mentions.
+
+`GET /users/search` était une regex `^query` insensible à la casse, qui ne peut
+pas utiliser d'index et partait à chaque frappe d'une mention dans TweetForm.
+L'autocomplétion se fait désormais dans le processus :
+
+- un tableau trié des usernames en minuscules (`casefold`), parcouru par
+  `bisect` : la plage d'un préfixe est trouvée en O(log n) ;
+- pour les préfixes courts (jusqu'à `USERNAME_INDEX_PREFIX_DEPTH` caractères,
+  préfixe vide compris), dont la plage couvre une grande partie des comptes,
+  les `USERNAME_INDEX_TOP_K` comptes les plus suivis sont précalculés ; au-delà,
+  la plage est petite et classée à la volée par `followers_count`.
+
+L'index est construit au démarrage (lecture par lots de `users`), complété à
+chaque `create_user` du processus, puis reconstruit toutes les
+`USERNAME_INDEX_REFRESH_SECONDS` : c'est ce qui remet à jour le classement
+(followers) et fait apparaître les comptes créés par d'autres processus.
+Tant que la première construction n'est pas terminée, `complete` renvoie None
+et la route se rabat sur MongoDB.
+"""
+import asyncio
+import bisect
+import heapq
+import logging
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.config import (
+    USERNAME_INDEX_BATCH_SIZE,
+    USERNAME_INDEX_PREFIX_DEPTH,
+    USERNAME_INDEX_REFRESH_SECONDS,
+    USERNAME_INDEX_TOP_K,
+)
+from app.repositories import user_repository
+
+logger = logging.getLogger(__name__)
+
+
+class Completion(NamedTuple):
+    username: str
+    user_id: str
+    followers_count: int
+
+
+def _rank(entry: Completion):
+    # Plus suivis d'abord, puis ordre alphabétique
+    return -entry.followers_count, entry.username.casefold()
+
+
+class UsernameIndex:
+    def __init__(self, prefix_depth: int, top_k: int, refresh_interval: float):
+        self._prefix_depth = prefix_depth
+        self._top_k = top_k
+        self._refresh_interval = refresh_interval
+        self._keys: List[str] = []
+        self._entries: List[Completion] = []
+        self._top: Dict[str, List[Completion]] = {}
+        self._ready = False
+        # Comptes créés pendant une reconstruction, ajoutés au résultat de la lecture
+        self._created_during_build: Optional[List[Completion]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._builds = 0
+        self._last_build_seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def complete(self, prefix: str, limit: int) -> Optional[List[Completion]]:
+        """Les `limit` comptes les plus suivis dont le username commence par `prefix` (casse ignorée)"""
+        if not self._ready:
+            return None
+        key = prefix.casefold()
+        if len(key) <= self._prefix_depth and limit <= self._top_k:
+            return self._top.get(key, [])[:limit]
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_left(self._keys, key + "\U0010ffff", start)
+        return heapq.nsmallest(limit, self._entries[start:end], key=_rank)
+
+    def add(self, username: str, user_id: str, followers_count: int = 0) -> None:
+        """Ajoute un compte (création) ; insertion triée en O(n), sans relecture"""
+        entry = Completion(username, user_id, followers_count)
+        if self._created_during_build is not None:
+            self._created_during_build.append(entry)
+        if not self._ready:
+            return
+        key = username.casefold()
+        index = bisect.bisect_left(self._keys, key)
+        if index < len(self._keys) and self._entries[index].user_id == user_id:
+            return
+        self._keys.insert(index, key)
+        self._entries.insert(index, entry)
+        for length in range(min(len(key), self._prefix_depth) + 1):
+            best = self._top.setdefault(key[:length], [])
+            if len(best) < self._top_k or _rank(entry) < _rank(best[-1]):
+                bisect.insort(best, entry, key=_rank)
+                del best[self._top_k:]
+
+    async def rebuild(self) -> int:
+        """Reconstruit l'index à partir de la collection `users` ; renvoie le nombre de comptes"""
+        started = time.perf_counter()
+        self._created_during_build = []
+        try:
+            entries: List[Completion] = []
+            last_id = None
+            while True:
+                users = await user_repository.list_after(
+                    last_id, USERNAME_INDEX_BATCH_SIZE, projection={"username": 1, "followers_count": 1}
+                )
+                if not users:
+                    break
+                entries.extend(
+                    Completion(user["username"], str(user["_id"]), user.get("followers_count", 0)) for user in users
+                )
+                last_id = users[-1]["_id"]
+            self.load(entries + self._created_during_build)
+        finally:
+            self._created_during_build = None
+        self._last_build_seconds = time.perf_counter() - started
+        return len(self._entries)
+
+    def load(self, entries: List[Completion]) -> None:
+        """Remplace le contenu de l'index (un compte présent deux fois n'est gardé qu'une fois)"""
+        entries = sorted({entry.user_id: entry for entry in entries}.values(), key=lambda entry: entry.username.casefold())
+        keys = [entry.username.casefold() for entry in entries]
+        heaps: Dict[str, List] = {}
+        for position, (entry, key) in enumerate(zip(entries, keys)):
+            # Tas min : la racine est le moins bon des k retenus (moins suivi, puis dernier alphabétiquement)
+            item = (entry.followers_count, -position, entry)
+            for length in range(min(len(key), self._prefix_depth) + 1):
+                heap = heaps.setdefault(key[:length], [])
+                if len(heap) < self._top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        self._keys, self._entries = keys, entries
+        self._top = {prefix: sorted((item[2] for item in heap), key=_rank) for prefix, heap in heaps.items()}
+        self._ready = True
+        self._builds += 1
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                count = await self.rebuild()
+                logger.info("Index des usernames : %d comptes (%.2f s)", count, self._last_build_seconds)
+            except Exception:
+                logger.exception("Construction de l'index des usernames impossible")
+            await asyncio.sleep(self._refresh_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self._ready,
+            "users": len(self._entries),
+            "cached_prefixes": len(self._top),
+            "builds": self._builds,
+            "last_build_seconds": round(self._last_build_seconds, 3),
+        }
+
+
+username_index = UsernameIndex(USERNAME_INDEX_PREFIX_DEPTH, USERNAME_INDEX_TOP_K, USERNAME_INDEX_REFRESH_SECONDS)
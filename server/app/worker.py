@@ -0,0 +1,88 @@
+"""
+Worker autonome de la file de tâches.
+
+    JOB_RUN_IN_PROCESS=0 uvicorn app.main:app   # l'API ne fait que programmer les tâches
+    python -m app.worker                         # un ou plusieurs processus les exécutent
+    python -m app.worker --reconcile-unread      # corrige les compteurs de non-lues et quitte
+    python -m app.worker --retention             # archive les vieilles notifications, affiche le stockage
+    python -m app.worker --reindex-search        # reconstruit l'index de recherche plein texte
+    python -m app.worker --rebuild-affinities    # recalcule les profils d'affinité (recommandations)
+
+Plusieurs workers peuvent tourner en parallèle : chaque tâche est réclamée par
+un seul d'entre eux (bail dans la collection `jobs`).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+from typing import List
+
+from app.database import db
+from app.indexes import ensure_indexes
+from app.services.counters import counter_buffer
+from app.services.jobs import JobWorker
+from app.config import JOB_WORKER_CONCURRENCY
+
+# Enregistrement des handlers de tâches (décorateur @job_handler)
+from app.services import hashtag, notifications, recommendations, retention, search, timeline  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+async def _main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.worker", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY,
+                        help="nombre de tâches traitées simultanément")
+    parser.add_argument("--reconcile-unread", action="store_true",
+                        help="recompte les notifications non lues de chaque compteur puis quitte")
+    parser.add_argument("--retention", action="store_true",
+                        help="archive les notifications non lues anciennes, affiche le rapport de stockage puis quitte")
+    parser.add_argument("--reindex-search", action="store_true",
+                        help="reconstruit l'index de recherche à partir de tous les tweets puis quitte")
+    parser.add_argument("--rebuild-affinities", action="store_true",
+                        help="recalcule les profils d'affinité à partir des likes récents puis quitte")
+    args = parser.parse_args(argv)
+
+    if args.rebuild_affinities:
+        await ensure_indexes(db)
+        print(json.dumps(await recommendations.rebuild_profiles(), indent=2))
+        return 0
+
+    if args.reindex_search:
+        await ensure_indexes(db)
+        print(json.dumps(await search.rebuild_index(), indent=2))
+        return 0
+
+    if args.retention:
+        await ensure_indexes(db)
+        print(json.dumps(await retention.apply_retention(), indent=2, default=str))
+        return 0
+
+    if args.reconcile_unread:
+        corrected = await notifications.reconcile_unread_counters()
+        logger.info("%d compteur(s) de non-lues corrigé(s)", corrected)
+        return 0
+
+    await ensure_indexes(db)
+    worker = JobWorker(args.concurrency)
+    counter_buffer.start()
+    worker.start()
+    logger.info("Worker démarré (%d tâches simultanées)", args.concurrency)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    await stop.wait()
+
+    logger.info("Arrêt du worker")
+    await worker.stop()
+    await counter_buffer.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
@@ -0,0 +1,143 @@
+"""
+Benchmark de follow/unfollow : allers-retours MongoDB et latence.
+
+Compare l'ancienne séquence de la route (lecture du compte, lecture de la
+relation, insert, deux `$inc`, tâches) avec `app/services/interactions.py`
+(upsert de la relation, compteurs en un `bulk_write`, tâches), avec et sans le
+tampon de compteurs démarré. Les allers-retours sont comptés par un
+`CommandListener` pymongo.
+
+Écrit dans la base MONGO_DB_NAME : à lancer sur une base de test. Les documents
+créés sont supprimés à la fin.
+
+    cd server && MONGO_DB_NAME=twitter_bench python -m benchmarks.follow_roundtrips --users 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, List
+
+from bson import ObjectId
+from pymongo import monitoring
+
+
+class _CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+# À enregistrer avant la création du client MongoDB (import de app.database)
+commands = _CommandCounter()
+monitoring.register(commands)
+
+from app.database import db  # noqa: E402
+from app.indexes import ensure_indexes  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services import interactions  # noqa: E402
+from app.services.counters import counter_buffer  # noqa: E402
+from app.services.jobs import enqueue_many  # noqa: E402
+from app.services.notifications import group_notification_job  # noqa: E402
+from app.services.timeline import follow_job  # noqa: E402
+
+
+async def _legacy_follow(username: str, user: User) -> None:
+    """Ancienne route : six allers-retours séquentiels"""
+    followed = await db.users.find_one({"username": username})
+    followed_id = str(followed["_id"])
+    if await db.follows.find_one({"follower_id": user.id, "followed_id": followed_id}):
+        raise RuntimeError("déjà suivi")
+    await db.follows.insert_one({
+        "follower_id": user.id, "follower_username": user.username,
+        "followed_id": followed_id, "followed_username": username, "created_at": datetime.utcnow(),
+    })
+    await db.users.update_one({"_id": ObjectId(followed_id)}, {"$inc": {"followers_count": 1}})
+    await db.users.update_one({"_id": ObjectId(user.id)}, {"$inc": {"following_count": 1}})
+    await enqueue_many([
+        group_notification_job(followed_id, "follow", user.id, user.username),
+        follow_job(user.id, followed_id, following=True),
+    ])
+
+
+async def _legacy_unfollow(username: str, user: User) -> None:
+    followed = await db.users.find_one({"username": username})
+    followed_id = str(followed["_id"])
+    follow = await db.follows.find_one({"follower_id": user.id, "followed_id": followed_id})
+    await db.follows.delete_one({"_id": follow["_id"]})
+    await db.users.update_one({"_id": ObjectId(followed_id)}, {"$inc": {"followers_count": -1}})
+    await db.users.update_one({"_id": ObjectId(user.id)}, {"$inc": {"following_count": -1}})
+    await enqueue_many([follow_job(user.id, followed_id, following=False)])
+
+
+async def _measure(name: str, users: List[User], target: str, action: Callable[[str, User], Awaitable]) -> None:
+    latencies: List[float] = []
+    before = commands.count
+    for user in users:
+        started = time.perf_counter()
+        await action(target, user)
+        latencies.append((time.perf_counter() - started) * 1000)
+    round_trips = (commands.count - before) / len(users)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:<22} {round_trips:>5.1f} allers-retours   "
+          f"p50={statistics.median(latencies):>7.2f} ms  p99={p99:>7.2f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200, help="nombre de followers fictifs")
+    args = parser.parse_args()
+
+    await ensure_indexes(db)
+    prefix = f"bench_{uuid.uuid4().hex[:8]}"
+    now = datetime.utcnow()
+    inserted = await db.users.insert_many([
+        {"username": f"{prefix}_{i}", "email": f"{prefix}_{i}@example.com", "hashed_password": "",
+         "followers_count": 0, "following_count": 0, "created_at": now}
+        for i in range(args.users + 1)
+    ])
+    users = [
+        User(id=str(user_id), username=f"{prefix}_{i}", email=f"{prefix}_{i}@example.com", created_at=now)
+        for i, user_id in enumerate(inserted.inserted_ids)
+    ]
+    target, followers = users[0].username, users[1:]
+    user_ids = [user.id for user in users]
+
+    print(f"{len(followers)} follow puis unfollow séquentiels vers {target}")
+    try:
+        await _measure("ancien follow", followers, target, _legacy_follow)
+        await _measure("ancien unfollow", followers, target, _legacy_unfollow)
+        await _measure("follow", followers, target, interactions.follow_user)
+        await _measure("unfollow", followers, target, interactions.unfollow_user)
+        counter_buffer.start()
+        await _measure("follow (tampon)", followers, target, interactions.follow_user)
+        await _measure("unfollow (tampon)", followers, target, interactions.unfollow_user)
+        await counter_buffer.stop()
+
+        target_doc = await db.users.find_one({"_id": inserted.inserted_ids[0]})
+        assert target_doc["followers_count"] == 0, target_doc["followers_count"]
+        assert await db.follows.count_documents({"followed_id": users[0].id}) == 0
+        print("compteurs et relations cohérents")
+    finally:
+        await counter_buffer.stop()
+        await db.follows.delete_many({"followed_id": users[0].id})
+        await db.jobs.delete_many({"$or": [
+            {"payload.recipient_id": {"$in": user_ids}},
+            {"payload.follower_id": {"$in": user_ids}},
+        ]})
+        await db.users.delete_many({"username": {"$regex": f"^{prefix}_"}})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Benchmark du débit de connexion et de la latence de la boucle d'événements.
+
+Compare la vérification bcrypt exécutée directement dans la coroutine (ancien
+comportement de /token) avec le pool dédié de app/services/passwords.py, pendant
+qu'une tâche « témoin » mesure le retard de la boucle (ce que subissent tous les
+autres endpoints pendant une rafale de connexions).
+
+    cd server && python -m benchmarks.login_throughput --logins 64 --rounds 12
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import bcrypt
+
+from app.services.passwords import check_password, hashing_stats
+
+HEARTBEAT_INTERVAL = 0.01
+
+
+async def _heartbeat(lags, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def _inline_login(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+async def _pooled_login(password: str, hashed: str) -> bool:
+    return await check_password(password, hashed)
+
+
+async def _run(mode: str, login, logins: int, password: str, hashed: str):
+    lags = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+    await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await heartbeat
+    assert all(results)
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(f"{mode:<8} {logins / elapsed:>10.1f} logins/s   "
+          f"retard boucle p50={statistics.median(lags_ms):>8.1f} ms  p99={p99:>8.1f} ms  max={lags_ms[-1]:>8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--logins", type=int, default=64, help="nombre de connexions simultanées")
+    parser.add_argument("--rounds", type=int, default=12, help="coût bcrypt du hash vérifié")
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=args.rounds)).decode()
+
+    print(f"{args.logins} connexions simultanées, bcrypt coût {args.rounds}")
+    await _run("inline", _inline_login, args.logins, password, hashed)
+    await _run("pool", _pooled_login, args.logins, password, hashed)
+    print("pool :", hashing_stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
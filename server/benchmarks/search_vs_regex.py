@@ -0,0 +1,140 @@
+"""
+Benchmark de la recherche de tweets : index inversé + BM25 contre l'ancienne regex.
+
+Génère des tweets synthétiques (vocabulaire français/anglais et mots générés,
+distribution de Zipf, dates étalées sur 30 jours), construit l'index avec
+`rebuild_index`, puis mesure pour des requêtes fréquentes, moyennes, rares et
+à plusieurs mots la latence de l'ancienne requête (regex non ancrée sur
+`content`, `author_username` et `tags`, tri par date) et celle de
+`app/services/search.py`.
+
+Exige une base dédiée et vide : les collections `tweets`, `search_postings`
+et `search_terms` sont supprimées à la fin (sauf --keep).
+
+    cd server && MONGO_DB_NAME=twitter_bench python -m benchmarks.search_vs_regex --tweets 1000000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List
+
+from app.database import db
+from app.indexes import ensure_indexes
+from app.repositories import tweet_repository
+from app.services import search
+
+WORDS = """
+    paris election vote gouvernement politique economie football match victoire musique concert film cinema
+    ete hiver pluie soleil voyage train avion ville quartier ecole universite travail bureau reunion projet
+    startup code python javascript donnees serveur reseau securite nuage telephone photo video cuisine recette
+    cafe restaurant marche sport course velo montagne plage mer livre lecture histoire science espace climat
+    energie electricite voiture transport greve manifestation president ministre depute loi budget impot
+    running coffee weather traffic meeting project release update deploy database network security cloud
+    phone picture movie music concert game season winter summer holiday travel flight city school work
+""".split()
+
+
+def _vocabulary(size: int, rng: random.Random) -> List[str]:
+    syllables = ["ba", "ko", "ri", "ta", "mu", "ne", "sol", "ver", "qui", "pra", "lo", "den", "fi", "gar", "tu"]
+    generated = set()
+    while len(generated) < size:
+        generated.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return WORDS + sorted(generated)
+
+
+async def _populate(count: int, batch_size: int, rng: random.Random) -> List[str]:
+    vocabulary = _vocabulary(50000, rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    now = datetime.utcnow()
+    for start in range(0, count, batch_size):
+        documents = []
+        for _ in range(min(batch_size, count - start)):
+            words = rng.choices(vocabulary, weights, k=rng.randint(6, 20))
+            documents.append({
+                "author_id": "bench",
+                "author_username": f"bench_user_{rng.randrange(1000)}",
+                "content": " ".join(words),
+                "tags": rng.sample(WORDS, rng.randint(0, 2)),
+                "created_at": now - timedelta(seconds=rng.randrange(30 * 86400)),
+                "like_count": 0, "comment_count": 0, "retweet_count": 0, "is_retweet": False,
+            })
+        await db.tweets.insert_many(documents, ordered=False)
+        print(f"\r{start + len(documents)} tweets insérés", end="", flush=True)
+    print()
+    return vocabulary
+
+
+async def _legacy_search(searchword: str, limit: int):
+    """Requête de l'ancienne route (regex non échappée)"""
+    regex = {"$regex": f".*{searchword}.*", "$options": "i"}
+    query = {"$or": [{"content": regex}, {"author_username": regex}, {"tags": regex}]}
+    return (await tweet_repository.find_page(query, None, limit))[0]
+
+
+async def _indexed_search(searchword: str, limit: int):
+    return (await search.search_tweets(searchword, None, limit))[0]
+
+
+async def _measure(action: Callable[[str, int], Awaitable[list]], query: str, limit: int, runs: int):
+    latencies = []
+    results = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        results = await action(query, limit)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], len(results)
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tweets", type=int, default=1_000_000, help="nombre de tweets synthétiques")
+    parser.add_argument("--batch", type=int, default=10000, help="taille des lots d'insertion")
+    parser.add_argument("--runs", type=int, default=20, help="exécutions par requête")
+    parser.add_argument("--limit", type=int, default=10, help="taille de page")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="conserver les données générées")
+    args = parser.parse_args()
+
+    if await db.tweets.estimated_document_count():
+        print("La collection tweets n'est pas vide : utiliser une base dédiée (MONGO_DB_NAME)", file=sys.stderr)
+        return 1
+
+    rng = random.Random(args.seed)
+    try:
+        await ensure_indexes(db)
+        started = time.perf_counter()
+        vocabulary = await _populate(args.tweets, args.batch, rng)
+        print(f"génération : {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        stats = await search.rebuild_index()
+        print(f"indexation : {time.perf_counter() - started:.1f} s  {stats}")
+
+        queries = [
+            ("fréquent", vocabulary[0]),
+            ("moyen", vocabulary[200]),
+            ("rare", vocabulary[-1]),
+            ("absent", "zzzzzz"),
+            ("deux mots", f"{vocabulary[3]} {vocabulary[150]}"),
+            ("trois mots", f"{vocabulary[10]} {vocabulary[500]} {vocabulary[5000]}"),
+        ]
+        print(f"\n{'requête':<11} {'termes':<36} {'regex p50/p99 (ms)':>22} {'index p50/p99 (ms)':>22}")
+        for label, query in queries:
+            legacy_p50, legacy_p99, legacy_count = await _measure(_legacy_search, query, args.limit, args.runs)
+            indexed_p50, indexed_p99, indexed_count = await _measure(_indexed_search, query, args.limit, args.runs)
+            print(f"{label:<11} {query[:36]:<36} {legacy_p50:>10.1f} /{legacy_p99:>9.1f}  "
+                  f"{indexed_p50:>10.1f} /{indexed_p99:>9.1f}   ({legacy_count} / {indexed_count} résultats)")
+    finally:
+        if not args.keep:
+            for collection in ("tweets", "search_postings", "search_terms"):
+                await db.drop_collection(collection)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
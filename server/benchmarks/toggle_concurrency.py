@@ -0,0 +1,139 @@
+"""
+Test de charge des bascules like/retweet/favori (app/services/interactions.py).
+
+Chaque utilisateur fictif envoie plusieurs fois la même action en parallèle
+(double-clics) : un seul like ou retweet doit aboutir par utilisateur, les autres
+doivent être refusés, et les compteurs du tweet doivent correspondre exactement
+au nombre de documents une fois le tampon de compteurs vidé. Le script échoue
+(code de sortie 1) au moindre écart.
+
+Écrit dans la base MONGO_DB_NAME : à lancer sur une base de test. Les documents
+créés (utilisateurs, tweet, likes, retweets, favoris, tâches) sont supprimés à la fin.
+
+    cd server && MONGO_DB_NAME=twitter_bench python -m benchmarks.toggle_concurrency --users 200 --clicks 3
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, List
+
+from fastapi import HTTPException
+
+from app.database import db
+from app.indexes import ensure_indexes
+from app.models.user import User
+from app.services import interactions
+from app.services.counters import counter_buffer
+
+
+async def _timed(action: Callable[[], Awaitable], latencies: List[float]) -> bool:
+    """Exécute l'action ; True si elle a abouti, False si elle a été refusée (4xx)"""
+    started = time.perf_counter()
+    try:
+        await action()
+        return True
+    except HTTPException as e:
+        if e.status_code >= 500:
+            raise
+        return False
+    finally:
+        latencies.append(time.perf_counter() - started)
+
+
+async def _burst(name: str, users: List[User], clicks: int, action) -> int:
+    latencies: List[float] = []
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        _timed(lambda user=user: action(user), latencies) for user in users for _ in range(clicks)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    p99 = latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.99))]
+    accepted = sum(results)
+    print(f"{name:<10} {len(results):>6} requêtes  {accepted:>6} acceptées  {len(results) / elapsed:>9.1f} req/s   "
+          f"p50={statistics.median(latencies_ms):>7.1f} ms  p99={p99:>7.1f} ms")
+    return accepted
+
+
+async def _counts(tweet_id: str):
+    await counter_buffer.flush()
+    tweet = await db.tweets.find_one({"_id": tweet_id}, {"like_count": 1, "retweet_count": 1})
+    likes = await db.likes.count_documents({"tweet_id": str(tweet_id)})
+    retweets = await db.tweets.count_documents({"original_tweet_id": str(tweet_id), "is_retweet": True})
+    return tweet["like_count"], likes, tweet["retweet_count"], retweets
+
+
+def _check(label: str, expected: int, *observed: int) -> bool:
+    ok = all(value == expected for value in observed)
+    print(f"  {'ok' if ok else 'ÉCART':<6} {label} : attendu {expected}, observé {list(observed)}")
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=200, help="nombre d'utilisateurs fictifs")
+    parser.add_argument("--clicks", type=int, default=3, help="requêtes simultanées par utilisateur et par action")
+    args = parser.parse_args()
+
+    await ensure_indexes(db)
+    prefix = f"bench_{uuid.uuid4().hex[:8]}"
+    now = datetime.utcnow()
+    users = [
+        User(id=str(user_id), username=f"{prefix}_{i}", email=f"{prefix}_{i}@example.com", created_at=now)
+        for i, user_id in enumerate((await db.users.insert_many([
+            {"username": f"{prefix}_{i}", "email": f"{prefix}_{i}@example.com", "hashed_password": "",
+             "followers_count": 0, "following_count": 0, "created_at": now}
+            for i in range(args.users)
+        ])).inserted_ids)
+    ]
+    author = users[0]
+    tweet_id = (await db.tweets.insert_one({
+        "author_id": author.id, "author_username": author.username, "content": f"{prefix} tweet",
+        "is_retweet": False, "created_at": now, "like_count": 0, "comment_count": 0, "retweet_count": 0,
+    })).inserted_id
+    tweet = str(tweet_id)
+    user_ids = [user.id for user in users]
+
+    print(f"{args.users} utilisateurs x {args.clicks} requêtes simultanées")
+    ok = True
+    try:
+        liked = await _burst("like", users, args.clicks, lambda user: interactions.like_tweet(tweet, user))
+        like_count, likes, _, _ = await _counts(tweet_id)
+        ok &= _check("likes après les likes", args.users, liked, like_count, likes)
+
+        unliked = await _burst("unlike", users, args.clicks, lambda user: interactions.unlike_tweet(tweet, user))
+        like_count, likes, _, _ = await _counts(tweet_id)
+        ok &= _check("unlikes acceptés", args.users, unliked)
+        ok &= _check("likes après les unlikes", 0, like_count, likes)
+
+        retweeted = await _burst("retweet", users, args.clicks, lambda user: interactions.retweet_tweet(tweet, user))
+        _, _, retweet_count, retweets = await _counts(tweet_id)
+        ok &= _check("retweets", args.users, retweeted, retweet_count, retweets)
+
+        await _burst("favori", users, args.clicks, lambda user: interactions.toggle_bookmark(tweet, user))
+        duplicates = await db.bookmarks.aggregate([
+            {"$match": {"tweet_id": tweet}},
+            {"$group": {"_id": "$user_id", "n": {"$sum": 1}}},
+            {"$match": {"n": {"$gt": 1}}},
+        ]).to_list(length=None)
+        ok &= _check("favoris en double", 0, len(duplicates))
+    finally:
+        await db.likes.delete_many({"tweet_id": tweet})
+        await db.bookmarks.delete_many({"tweet_id": tweet})
+        await db.tweets.delete_many({"$or": [{"_id": tweet_id}, {"original_tweet_id": tweet}]})
+        await db.jobs.delete_many({"$or": [
+            {"payload.recipient_id": {"$in": user_ids}},
+            {"payload.tweet.author_id": {"$in": user_ids}},
+        ]})
+        await db.users.delete_many({"username": {"$regex": f"^{prefix}_"}})
+
+    print("comptes exacts" if ok else "ÉCARTS DÉTECTÉS")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,119 @@
+"""
+Benchmark du moteur de tendances en flux (app/services/trends.py).
+
+Alimente un `TrendEngine` avec des occurrences de hashtags synthétiques (loi de
+Zipf sur un vocabulaire bien plus grand que le nombre de tags suivis, étalées
+sur 24 h), puis mesure le débit d'alimentation, le recalcul d'un classement et
+la latence de `top` pour plusieurs fenêtres. Compare aussi le classement du
+moteur au décompte exact, puis mesure le calcul des scores de vélocité avec un
+tag peu fréquent qui s'emballe dans la dernière heure. Vérifie enfin qu'un tag
+qui s'emballe obtient une colonne quand toutes sont occupées par des tags
+réguliers et arrive en tête de la vélocité (code de sortie 1 sinon). Ne lit ni n'écrit aucune base.
+
+    cd server && python -m benchmarks.trends_stream --occurrences 2000000
+"""
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from app.config import (
+    TRENDS_MAX_WINDOW_MINUTES,
+    TRENDS_SAMPLES_PER_TAG,
+    TRENDS_SKETCH_DEPTH,
+    TRENDS_SKETCH_WIDTH,
+    TRENDS_SNAPSHOT_SIZE,
+    TRENDS_TRACKED_TAGS,
+    TRENDS_VELOCITY_BASELINE_MINUTES,
+    TRENDS_VELOCITY_SHORT_MINUTES,
+)
+from app.services.trends import CountMinSketch, TrendEngine
+
+
+def _new_engine(tracked_tags: int = TRENDS_TRACKED_TAGS) -> TrendEngine:
+    return TrendEngine(
+        TRENDS_MAX_WINDOW_MINUTES,
+        tracked_tags,
+        CountMinSketch(TRENDS_SKETCH_WIDTH, TRENDS_SKETCH_DEPTH),
+        TRENDS_SAMPLES_PER_TAG,
+        TRENDS_SNAPSHOT_SIZE,
+        TRENDS_VELOCITY_SHORT_MINUTES,
+        TRENDS_VELOCITY_BASELINE_MINUTES,
+    )
+
+
+def check_burst_admission() -> bool:
+    """Trois colonnes tenues par des tags à 10/min pendant 5 h ; un nouveau tag à 100/min sur la dernière heure"""
+    engine = _new_engine(tracked_tags=3)
+    steady = ["steady0", "steady1", "steady2"]
+    for minute in range(300):
+        for tag in steady:
+            for _ in range(10):
+                engine.observe(tag, minute, "0" * 24, "")
+        if minute >= 240:
+            for _ in range(100):
+                engine.observe("burst", minute, "0" * 24, "")
+    found = [trend["tag"] for trend in engine.top(60, 3)]
+    fastest = [trend["tag"] for trend in engine._score_velocity()]
+    admitted = "burst" in found and engine.stats()["evictions"] > 0 and fastest[:1] == ["burst"]
+    print(f"emballement avec colonnes pleines : {'admis' if admitted else 'NON ADMIS'}  top(60)={found}  "
+          f"vélocité={fastest}  {engine.stats()}")
+    return admitted
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--occurrences", type=int, default=2_000_000, help="occurrences de hashtags générées")
+    parser.add_argument("--vocabulary", type=int, default=200_000, help="nombre de hashtags distincts")
+    parser.add_argument("--queries", type=int, default=10000, help="lectures mesurées par fenêtre")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ranks = np.minimum(rng.zipf(1.3, args.occurrences), args.vocabulary) - 1
+    minutes = np.sort(rng.integers(0, TRENDS_MAX_WINDOW_MINUTES, args.occurrences))
+    tags = [f"tag{rank}" for rank in ranks.tolist()]
+
+    engine = _new_engine()
+    started = time.perf_counter()
+    for tag, minute in zip(tags, minutes.tolist()):
+        engine.observe(tag, minute, "0" * 24, "")
+    elapsed = time.perf_counter() - started
+    print(f"{args.occurrences} occurrences en {elapsed:.2f} s ({args.occurrences / elapsed:,.0f}/s)  {engine.stats()}")
+
+    last_minute = int(minutes[-1])
+    for window in (5, 60, TRENDS_MAX_WINDOW_MINUTES):
+        started = time.perf_counter()
+        ranking = engine.top(window, 10)
+        rank_ms = (time.perf_counter() - started) * 1000
+        latencies = []
+        for _ in range(args.queries):
+            started = time.perf_counter()
+            engine.top(window, 10)
+            latencies.append((time.perf_counter() - started) * 1e6)
+        latencies.sort()
+        exact = Counter(tag for tag, minute in zip(tags, minutes.tolist()) if minute > last_minute - window)
+        expected = [tag for tag, _ in exact.most_common(10)]
+        found = [trend["tag"] for trend in ranking]
+        print(f"fenêtre {window:>5} min : classement {rank_ms:>6.1f} ms, top p50={statistics.median(latencies):>5.1f} µs "
+              f"p99={latencies[int(len(latencies) * 0.99)]:>5.1f} µs, top 10 exact retrouvé : "
+              f"{len(set(found) & set(expected))}/10")
+
+    # Emballement d'un tag de la longue traîne sur la fenêtre courte
+    burst = f"tag{args.vocabulary // 2}"
+    for minute in range(last_minute - TRENDS_VELOCITY_SHORT_MINUTES + 1, last_minute + 1):
+        for _ in range(20):
+            engine.observe(burst, minute, "0" * 24, "")
+    started = time.perf_counter()
+    ranking = engine._score_velocity()
+    print(f"vélocité : {(time.perf_counter() - started) * 1000:.1f} ms pour {engine.stats()['tracked_tags']} tags, "
+          f"tête : {[(trend['tag'], trend['score']) for trend in ranking[:3]]} (emballement : {burst})")
+
+    return 0 if check_burst_admission() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark de l'autocomplétion des usernames en mémoire (app/services/username_index.py).
+
+Charge des comptes synthétiques (followers en loi de puissance) dans un
+`UsernameIndex` sans passer par MongoDB, puis mesure la construction, la
+latence de `complete` par longueur de préfixe et celle d'un ajout
+(`create_user`). Ne lit ni n'écrit aucune base.
+
+    cd server && python -m benchmarks.username_autocomplete --users 1000000
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from app.config import USERNAME_INDEX_PREFIX_DEPTH, USERNAME_INDEX_TOP_K
+from app.services.username_index import Completion, UsernameIndex
+
+
+def _percentiles(latencies):
+    latencies.sort()
+    return statistics.median(latencies), latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1_000_000, help="nombre de comptes synthétiques")
+    parser.add_argument("--queries", type=int, default=20000, help="complétions mesurées par longueur de préfixe")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    alphabet = string.ascii_lowercase + string.digits + "_"
+    usernames = {
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(4, 14))).capitalize() if rng.random() < 0.2
+        else "".join(rng.choice(alphabet) for _ in range(rng.randint(4, 14)))
+        for _ in range(args.users)
+    }
+    entries = [
+        Completion(username, f"{i:024x}", int(rng.paretovariate(1.2)) - 1)
+        for i, username in enumerate(usernames)
+    ]
+
+    index = UsernameIndex(USERNAME_INDEX_PREFIX_DEPTH, USERNAME_INDEX_TOP_K, refresh_interval=0)
+    started = time.perf_counter()
+    index.load(entries)
+    print(f"{len(entries)} comptes indexés en {time.perf_counter() - started:.2f} s  {index.stats()}")
+
+    samples = [entry.username for entry in rng.sample(entries, min(args.queries, len(entries)))]
+    for length in range(0, 8):
+        latencies = []
+        for username in samples:
+            prefix = username[:length]
+            started = time.perf_counter()
+            index.complete(prefix, 5)
+            latencies.append((time.perf_counter() - started) * 1e6)
+        p50, p99 = _percentiles(latencies)
+        print(f"préfixe de {length} caractère(s) : p50={p50:>8.1f} µs  p99={p99:>8.1f} µs")
+
+    latencies = []
+    for i in range(1000):
+        started = time.perf_counter()
+        index.add(f"new_user_{i}", f"{args.users + i:024x}")
+        latencies.append((time.perf_counter() - started) * 1e6)
+    p50, p99 = _percentiles(latencies)
+    print(f"ajout d'un compte : p50={p50:>8.1f} µs  p99={p99:>8.1f} µs")
+
+
+if __name__ == "__main__":
+    main()